@@ -15,6 +15,7 @@ class ResponseMessage(str, Enum):
     NOT_FOUND = 'Resource not found !!!'
     BAD_REQUEST = 'Invalid request !!!'
     UNPROCESSABLE_ENTITY = 'Input is not allowed !!!'
+    GATEWAY_TIMEOUT = 'Request deadline exceeded, please retry later !!!'
 
 
 class ExceptionHandler(BaseModel):
@@ -110,3 +111,19 @@ class ExceptionHandler(BaseModel):
             ResponseMessage.UNPROCESSABLE_ENTITY.value,
             code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         )
+
+    def handle_deadline_exceeded(self, err_msg: str, extra: dict) -> JSONResponse:
+        """Handle a request whose deadline passed before its work was done
+
+        Args:
+            err_msg (str): message
+            extra (dict): extra information
+
+        Returns:
+            Response: response object
+        """
+        self.logger.warning(err_msg, extra=extra)
+        return self._build_response(
+            ResponseMessage.GATEWAY_TIMEOUT.value,
+            code=status.HTTP_504_GATEWAY_TIMEOUT,
+        )
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from typing import List
+
+from common.bases import BaseModel
+
+
+class JobInput(BaseModel):
+    # ảnh hoặc thư mục ảnh, tương đối so với jobs.input_root
+    paths: List[str]
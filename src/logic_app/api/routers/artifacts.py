@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from api.helper.exception_handler import ExceptionHandler
+from api.helper.exception_handler import ResponseMessage
+from app.side_effects import get_side_effect_queue
+from common.logs import get_logger
+from fastapi import APIRouter
+from fastapi import status
+
+# Khởi tạo router
+artifacts = APIRouter(prefix='/v1')
+logger = get_logger(__name__)
+
+
+@artifacts.get(
+    '/artifacts/{artifact_id}',
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': {
+                            'artifact_id': '0b6e4a1f2c3d4e5f8a9b0c1d2e3f4a5b',
+                            'status': 'done',
+                            'out_path': 'output/1_DungThang_Base_1_170_2025-01-01_10-00-00.jpg',
+                            'error': None,
+                        },
+                    },
+                },
+            },
+        },
+        status.HTTP_404_NOT_FOUND: {
+            'description': 'Unknown or expired artifact',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.NOT_FOUND,
+                    },
+                },
+            },
+        },
+    },
+)
+async def get_artifact(artifact_id: str):
+    """
+    Drawing and CSV rows of a `/v1/height` request of the `collect` profile,
+    written in the background: `status` is `queued` or `spilled` until
+    written, then `done` with `out_path`, `failed` with `error`, or
+    `dropped` if the queue was full. Only the last
+    `side_effects.max_artifacts` artifacts are kept.
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    artifact = get_side_effect_queue().get_artifact(artifact_id)
+    if artifact is None:
+        return exception_handler.handle_not_found_error(
+            f'Artifact {artifact_id} not found', extra={'artifact_id': artifact_id},
+        )
+    return exception_handler.handle_success(artifact.model_dump())
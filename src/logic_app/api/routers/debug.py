@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from api.helper.exception_handler import ExceptionHandler
+from common.logs import get_logger
+from common.profiling import get_profile_store
+from common.utils import get_settings
+from fastapi import APIRouter
+from fastapi import Response
+
+debug = APIRouter(prefix='/debug', include_in_schema=False)
+logger = get_logger(__name__)
+
+
+@debug.get('/profiles')
+async def list_profiles():
+    """Most recent request profiles, newest first."""
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    if not get_settings().profiling.enabled:
+        return exception_handler.handle_not_found_error('Profiling is disabled', extra={})
+    return exception_handler.handle_success({'profiles': get_profile_store().list()})
+
+
+@debug.get('/profiles/{profile_id}')
+async def get_profile(profile_id: str):
+    """Profile of one request, by correlation id.
+
+    `cpu` profiles are speedscope JSON (open in https://www.speedscope.app),
+    `cprofile` profiles are pstats files (`pstats.Stats(path)`, snakeviz).
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    profile = get_profile_store().get(profile_id) if get_settings().profiling.enabled else None
+    if profile is None:
+        return exception_handler.handle_not_found_error(
+            f'Profile {profile_id} not found', extra={'profile_id': profile_id},
+        )
+    return Response(
+        content=profile.data,
+        media_type=profile.media_type,
+        headers={'Content-Disposition': f'attachment; filename="{profile.filename}"'},
+    )
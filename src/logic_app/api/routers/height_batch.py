@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import zipfile
+
+from api.helper.exception_handler import ExceptionHandler
+from api.helper.exception_handler import ResponseMessage
+from app.height_batch import archive_images
+from app.height_batch import BATCH_MODES
+from app.height_batch import BatchImage
+from app.height_batch import HeightBatch
+from app.height_batch import is_image
+from app.height_cal_pred import HeightService
+from common.logs import get_logger
+from common.utils import get_settings
+from fastapi import APIRouter
+from fastapi import Query
+from fastapi import Request
+from fastapi import status
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile
+
+# Khởi tạo router
+height_batch = APIRouter(prefix='/v1')
+logger = get_logger(__name__)
+settings = get_settings()
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+def collect_images(form_files: list[UploadFile]) -> list[BatchImage]:
+    """Images to measure: every uploaded image, plus the images of every zip archive"""
+    images: list[BatchImage] = []
+    for file in form_files:
+        file_name = file.filename or ''
+        if file_name.lower().endswith('.zip') or file.content_type in ('application/zip', 'application/x-zip-compressed'):
+            images.extend(archive_images(file.file, len(images), settings.batch.max_image_bytes))
+        elif is_image(file_name) or (file.content_type or '').startswith('image/'):
+            images.append(BatchImage(index=len(images), file_name=file_name, load=file.read))
+        else:
+            raise ValueError(f'{file_name} is neither an image nor a zip archive')
+        if len(images) > settings.batch.max_images:
+            raise ValueError(f'A batch holds at most {settings.batch.max_images} images')
+    return images
+
+
+@height_batch.post(
+    '/height/batch',
+    response_class=StreamingResponse,
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'multipart/form-data': {
+                    'schema': {
+                        'type': 'object',
+                        'properties': {
+                            'files': {'type': 'array', 'items': {'type': 'string', 'format': 'binary'}},
+                        },
+                        'required': ['files'],
+                    },
+                },
+            },
+        },
+    },
+    responses={
+        status.HTTP_200_OK: {
+            'description': 'One JSON line per image, in completion order',
+            'content': {
+                NDJSON_MEDIA_TYPE: {
+                    'example': {
+                        'index': 0,
+                        'file_name': '1_DungThang_Base_1_170.jpg',
+                        'results': [170.2],
+                        'out_path': 'output/1_DungThang_Base_1_170.jpg',
+                        'latency_ms': 412.5,
+                    },
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Bad Request',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.BAD_REQUEST,
+                    },
+                },
+            },
+        },
+    },
+)
+async def predict_height_batch(
+    request: Request,
+    mode: str = Query(
+        'full', pattern=f'^({"|".join(BATCH_MODES)})$',
+        description='full: draw and write the CSV files (collect profile), measure: only measure (serve profile)',
+    ),
+):
+    """
+    Measure many images in one request.
+
+    The `files` form field takes any number of images and zip archives of
+    images. Images go through the pipeline `batch.concurrency` at a time and
+    each result is streamed back as one JSON line as soon as it is ready:
+    `{"index", "file_name", "results", ..., "latency_ms"}`, or
+    `{"index", "file_name", "error"}` if the image could not be measured.
+    `index` is the position of the image in the request, archives expanded.
+    Every image gets its own `deadline.default_timeout_s` budget.
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+
+    try:
+        # đọc form thủ công: FastAPI đóng file upload ngay khi endpoint trả về,
+        # trước khi các ảnh được đọc trong lúc stream kết quả
+        form = await request.form(max_files=settings.batch.max_images)
+    except Exception as e:
+        return exception_handler.handle_bad_request(
+            err_msg=f'Error while reading the batch: {e}', extra={},
+        )
+
+    try:
+        images = collect_images([
+            file for _, file in form.multi_items() if isinstance(file, UploadFile)
+        ])
+        if not images:
+            raise ValueError('No image in the batch')
+    except (ValueError, zipfile.BadZipFile) as e:
+        await form.close()
+        return exception_handler.handle_bad_request(
+            err_msg=str(e), extra={'files': len(form.getlist('files'))},
+        )
+
+    logger.info(
+        'Received height batch request',
+        extra={'images': len(images), 'mode': mode},
+    )
+    batch = HeightBatch(
+        service=HeightService(settings=settings),
+        concurrency=settings.batch.concurrency,
+        mode=mode,
+        timeout_s=settings.deadline.default_timeout_s if settings.deadline.enabled else None,
+    )
+
+    async def lines():
+        try:
+            async for result in batch.run(images):
+                yield json.dumps(result) + '\n'
+        finally:
+            await form.close()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Optional
+
 import cv2
 import numpy as np
 from api.helper.exception_handler import ExceptionHandler
@@ -7,10 +9,14 @@ from api.helper.exception_handler import ResponseMessage
 from app.height_cal_pred import HeightInput
 from app.height_cal_pred import HeightOutput
 from app.height_cal_pred import HeightService
+from app.height_cal_pred import PIPELINE_PROFILES
+from common.deadline import DeadlineExceeded
 from common.logs import get_logger
+from common.metrics import stage_timer
 from common.utils import get_settings
 from fastapi import APIRouter
 from fastapi import File
+from fastapi import Query
 from fastapi import status
 from fastapi import UploadFile
 from fastapi.encoders import jsonable_encoder
@@ -67,6 +73,16 @@ settings = get_settings()
                 },
             },
         },
+        status.HTTP_504_GATEWAY_TIMEOUT: {
+            'description': 'Request deadline exceeded',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.GATEWAY_TIMEOUT,
+                    },
+                },
+            },
+        },
         status.HTTP_404_NOT_FOUND: {
             'description': 'Destination Not Found',
             'content': {
@@ -79,7 +95,14 @@ settings = get_settings()
         },
     },
 )
-async def predict_height(file: UploadFile = File(...)):
+async def predict_height(
+    file: UploadFile = File(...),
+    profile: Optional[str] = Query(
+        None, pattern=f'^({"|".join(PIPELINE_PROFILES)})$',
+        description='serve: only measure, collect: also draw and write the CSV files; '
+                    'pipeline.profile of the deployment if omitted',
+    ),
+):
     exception_handler = ExceptionHandler(
         logger=logger.bind(), service_name=__name__,
     )
@@ -91,11 +114,16 @@ async def predict_height(file: UploadFile = File(...)):
         )
         contents = await file.read()
 
-        nparr = np.frombuffer(contents, np.uint8)
-        img_array = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with stage_timer('decode'):
+            nparr = np.frombuffer(contents, np.uint8)
+            img_array = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
 
         if img_array is None:
             raise ValueError('Failed to decode image - result is None')
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'file_name': file.filename},
+        )
     except Exception as e:
         return exception_handler.handle_exception(
             err_msg=f'Error while reading and decoding file: {e}',
@@ -123,21 +151,27 @@ async def predict_height(file: UploadFile = File(...)):
     try:
         logger.info(
             'Running height prediction...',
-            extra={'file_name': file.filename},
+            extra={'file_name': file.filename, 'profile': profile},
         )
         height_result = await height_model.process(
             inputs=HeightInput(
                 image=img_array,
                 img_name=file.filename,
             ),
+            profile=profile,
         )
         api_output = HeightOutput(
             results=height_result.results,
             out_path=height_result.out_path,
+            artifact_id=height_result.artifact_id,
         )
         logger.info('Height calculate prediction completed.')
         return exception_handler.handle_success(jsonable_encoder(api_output))
 
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'file_name': file.filename},
+        )
     except Exception as e:
         return exception_handler.handle_exception(
             f'Height prediction failed: {e}',
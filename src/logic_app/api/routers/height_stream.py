@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+
+from app.height_cal_pred import HeightService
+from app.height_stream import HeightStream
+from common.logs import get_logger
+from common.utils import get_settings
+from fastapi import APIRouter
+from fastapi import WebSocket
+from fastapi import WebSocketDisconnect
+
+# Khởi tạo router
+height_stream = APIRouter(prefix='/v1')
+logger = get_logger(__name__)
+settings = get_settings()
+
+
+@height_stream.websocket('/height/stream')
+async def stream_height(websocket: WebSocket):
+    """
+    Live height measurement for camera clients.
+
+    The client sends every frame as one binary message (JPEG or PNG bytes).
+    Frames are numbered from 0 in the order they are received. The server
+    measures the most recent frame whenever the models are free and replies
+    with one JSON message per measured frame:
+    `{"frame_id", "dropped", "results", "pixel_per_cm", "bboxes", "scores", "latency_ms"}`,
+    or `{"frame_id", "dropped", "error"}` if the frame could not be measured.
+    Frames arriving while inference is behind are dropped.
+    """
+    await websocket.accept()
+    stream = HeightStream(service=HeightService(settings=settings), send=websocket.send_json)
+    worker = asyncio.create_task(stream.run())
+    logger.info('Height stream opened', extra={'client': str(websocket.client)})
+
+    try:
+        while not worker.done():
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+
+            data = message.get('bytes')
+            if data is None:
+                await websocket.send_json({'error': 'Frames must be sent as binary messages'})
+            elif len(data) > settings.stream.max_frame_bytes:
+                await websocket.send_json({
+                    'error': f'Frame is larger than {settings.stream.max_frame_bytes} bytes',
+                })
+            else:
+                stream.push(data)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        stream.close()
+        worker.cancel()
+        with contextlib.suppress(asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+            await worker
+        logger.info(
+            'Height stream closed',
+            extra={
+                'client': str(websocket.client),
+                'frames': stream.next_frame_id,
+                'dropped': stream.slot.dropped,
+            },
+        )
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import asyncio
+import shutil
+import zipfile
+from pathlib import Path
+from pathlib import PurePosixPath
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import uuid4
+
+from api.helper.exception_handler import ExceptionHandler
+from api.helper.exception_handler import ResponseMessage
+from api.models.jobs import JobInput
+from app.height_batch import archive_images
+from app.height_batch import BATCH_MODES
+from app.height_batch import is_image
+from app.height_jobs import expand_paths
+from app.height_jobs import get_job_runner
+from common.logs import get_logger
+from common.utils import get_settings
+from fastapi import APIRouter
+from fastapi import Query
+from fastapi import Request
+from fastapi import status
+from infrastructure.job_store import get_job_store
+from infrastructure.job_store import ITEM_STATUSES
+from starlette.datastructures import UploadFile
+
+# Khởi tạo router
+jobs = APIRouter(prefix='/v1')
+logger = get_logger(__name__)
+settings = get_settings()
+
+JOB_EXAMPLE = {
+    'job_id': '6f1c0d0e5b7a4c1e9a3f2d8b7c6e5a4d',
+    'mode': 'full',
+    'created_at': 1760000000.0,
+    'total': 1200,
+    'pending': 700,
+    'running': 4,
+    'done': 490,
+    'failed': 6,
+    'status': 'running',
+}
+NOT_FOUND_RESPONSE = {
+    'description': 'Unknown job',
+    'content': {
+        'application/json': {
+            'example': {
+                'message': ResponseMessage.NOT_FOUND,
+            },
+        },
+    },
+}
+
+
+async def save_uploads(form_files: List[UploadFile], upload_dir: Path) -> List[Tuple[str, str]]:
+    """Write every uploaded image and the images of every zip archive to
+    `upload_dir`, return the `(path, file name)` job items"""
+    items: List[Tuple[str, str]] = []
+
+    async def save(file_name: str, data: bytes) -> None:
+        # tiền tố là vị trí ảnh: các ảnh trùng tên không ghi đè lên nhau
+        path = upload_dir / f'{len(items):06d}_{PurePosixPath(file_name).name}'
+        await asyncio.to_thread(path.write_bytes, data)
+        items.append((str(path), file_name))
+        if len(items) > settings.jobs.max_items:
+            raise ValueError(f'A job holds at most {settings.jobs.max_items} images')
+
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    for file in form_files:
+        file_name = file.filename or ''
+        if file_name.lower().endswith('.zip') or file.content_type in ('application/zip', 'application/x-zip-compressed'):
+            for image in archive_images(file.file, len(items), settings.batch.max_image_bytes):
+                await save(image.file_name, await image.load())
+        elif is_image(file_name) or (file.content_type or '').startswith('image/'):
+            await save(file_name, await file.read())
+        else:
+            raise ValueError(f'{file_name} is neither an image nor a zip archive')
+    return items
+
+
+@jobs.post(
+    '/jobs',
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'application/json': {
+                    'schema': JobInput.model_json_schema(),
+                    'example': {'paths': ['images', 'test/1_DungThang_Base_1_170.jpg']},
+                },
+                'multipart/form-data': {
+                    'schema': {
+                        'type': 'object',
+                        'properties': {
+                            'files': {'type': 'array', 'items': {'type': 'string', 'format': 'binary'}},
+                        },
+                        'required': ['files'],
+                    },
+                },
+            },
+        },
+    },
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': {**JOB_EXAMPLE, 'pending': 1200, 'running': 0, 'done': 0, 'failed': 0, 'status': 'pending'},
+                    },
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Bad Request',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.BAD_REQUEST,
+                    },
+                },
+            },
+        },
+    },
+)
+async def submit_job(
+    request: Request,
+    mode: str = Query(
+        'full', pattern=f'^({"|".join(BATCH_MODES)})$',
+        description='full: draw and write the CSV files (collect profile), measure: only measure (serve profile)',
+    ),
+):
+    """
+    Queue a measurement job and return at once.
+
+    Send either a JSON body `{"paths": [...]}` of images and folders of
+    images inside `jobs.input_root`, or a `files` form field of images and
+    zip archives of images. The job is stored on disk and measured in the
+    background by `jobs.concurrency` workers; follow it with
+    `GET /v1/jobs/{job_id}` and read it with `GET /v1/jobs/{job_id}/results`.
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    if not settings.jobs.enabled:
+        return exception_handler.handle_not_found_error('Jobs are disabled', extra={})
+
+    job_id = uuid4().hex
+    upload_dir = Path(settings.jobs.upload_dir) / job_id
+    try:
+        if request.headers.get('content-type', '').startswith('multipart/form-data'):
+            async with request.form(max_files=settings.jobs.max_items) as form:
+                items = await save_uploads(
+                    [file for _, file in form.multi_items() if isinstance(file, UploadFile)], upload_dir,
+                )
+        else:
+            job_input = JobInput.model_validate_json(await request.body())
+            paths = await asyncio.to_thread(expand_paths, job_input.paths, settings.jobs.input_root)
+            if len(paths) > settings.jobs.max_items:
+                raise ValueError(f'A job holds at most {settings.jobs.max_items} images')
+            items = [(str(path), path.name) for path in paths]
+        if not items:
+            raise ValueError('No image in the job')
+    except (ValueError, zipfile.BadZipFile) as e:
+        await asyncio.to_thread(shutil.rmtree, upload_dir, ignore_errors=True)
+        return exception_handler.handle_bad_request(
+            err_msg=f'Invalid job: {e}', extra={'job_id': job_id},
+        )
+    except Exception as e:
+        await asyncio.to_thread(shutil.rmtree, upload_dir, ignore_errors=True)
+        return exception_handler.handle_exception(
+            err_msg=f'Error while submitting the job: {e}', extra={'job_id': job_id},
+        )
+
+    store = get_job_store()
+    await asyncio.to_thread(store.create_job, mode, items, job_id)
+    get_job_runner().notify()
+    logger.info('Queued height job', extra={'job_id': job_id, 'images': len(items), 'mode': mode})
+    summary = await asyncio.to_thread(store.get_job, job_id)
+    if summary is None:
+        return exception_handler.handle_exception(
+            err_msg=f'Job {job_id} was not saved', extra={'job_id': job_id},
+        )
+    return exception_handler.handle_success(summary.to_dict())
+
+
+@jobs.get(
+    '/jobs/{job_id}',
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': JOB_EXAMPLE,
+                    },
+                },
+            },
+        },
+        status.HTTP_404_NOT_FOUND: NOT_FOUND_RESPONSE,
+    },
+)
+async def get_job(job_id: str):
+    """
+    Progress of a job: number of images per status, and `status` of the
+    job: `pending`, `running`, or `completed` once no image is left to
+    measure (failed images included).
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    summary = await asyncio.to_thread(get_job_store().get_job, job_id) if settings.jobs.enabled else None
+    if summary is None:
+        return exception_handler.handle_not_found_error(f'Job {job_id} not found', extra={'job_id': job_id})
+    return exception_handler.handle_success(summary.to_dict())
+
+
+@jobs.get(
+    '/jobs/{job_id}/results',
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': {
+                            'job': JOB_EXAMPLE,
+                            'items': [
+                                {
+                                    'index': 0,
+                                    'file_name': '1_DungThang_Base_1_170.jpg',
+                                    'status': 'done',
+                                    'attempts': 1,
+                                    'result': {
+                                        'results': [170.2],
+                                        'out_path': 'output/1_DungThang_Base_1_170.jpg',
+                                        'latency_ms': 412.5,
+                                    },
+                                    'error': None,
+                                },
+                            ],
+                        },
+                    },
+                },
+            },
+        },
+        status.HTTP_404_NOT_FOUND: NOT_FOUND_RESPONSE,
+    },
+)
+async def get_job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    item_status: Optional[str] = Query(
+        None, alias='status', pattern=f'^({"|".join(ITEM_STATUSES)})$',
+        description='only the images with this status',
+    ),
+):
+    """
+    Images of a job in submission order, `limit` at a time from `offset`,
+    with their result once measured or their last error.
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    store = get_job_store()
+    summary = await asyncio.to_thread(store.get_job, job_id) if settings.jobs.enabled else None
+    if summary is None:
+        return exception_handler.handle_not_found_error(f'Job {job_id} not found', extra={'job_id': job_id})
+
+    items = await asyncio.to_thread(store.results, job_id, offset, limit, item_status)
+    return exception_handler.handle_success({
+        'job': summary.to_dict(),
+        'items': [
+            item.model_dump(include={'index', 'file_name', 'status', 'attempts', 'result', 'error'})
+            for item in items
+        ],
+    })
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest
+
+metrics = APIRouter()
+
+
+@metrics.get('/metrics', include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of the request and stage metrics."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
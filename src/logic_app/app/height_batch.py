@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import itertools
+import time
+import zipfile
+from pathlib import PurePosixPath
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import BinaryIO
+from typing import Callable
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+import cv2
+import numpy as np
+from app.height_cal_pred import HeightInput
+from app.height_cal_pred import HeightService
+from common.bases import BaseModel
+from common.deadline import set_deadline
+from common.logs import get_logger
+from common.metrics import stage_timer
+
+logger = get_logger(__name__)
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.bmp')
+# full: profile collect của /v1/height (vẽ, ghi CSV); measure: chỉ đo như luồng camera
+BATCH_MODES = ('full', 'measure')
+
+
+class BatchImage(BaseModel):
+    index: int
+    file_name: str
+    # đọc ảnh khi tới lượt: không giữ cả batch trong bộ nhớ
+    load: Callable[[], Awaitable[bytes]]
+
+
+def is_image(file_name: str) -> bool:
+    return PurePosixPath(file_name).suffix.lower() in IMAGE_SUFFIXES
+
+
+def archive_images(archive: BinaryIO, start_index: int, max_image_bytes: int) -> List[BatchImage]:
+    """Images of a zip archive, in archive order, skipping folders and other files
+
+    Raises:
+        ValueError: if an image is larger than `max_image_bytes` once extracted
+        zipfile.BadZipFile: if `archive` is not a zip archive
+    """
+    zip_file = zipfile.ZipFile(archive)
+    images: List[BatchImage] = []
+    for info in zip_file.infolist():
+        if info.is_dir() or not is_image(info.filename) or PurePosixPath(info.filename).name.startswith('.'):
+            continue
+        if info.file_size > max_image_bytes:
+            raise ValueError(f'{info.filename} is larger than {max_image_bytes} bytes')
+        images.append(BatchImage(
+            index=start_index + len(images),
+            file_name=PurePosixPath(info.filename).name,
+            load=functools.partial(asyncio.to_thread, zip_file.read, info),
+        ))
+    return images
+
+
+class HeightBatch:
+    """Measures many images through the pipeline, `concurrency` at a time.
+
+    Images are read and started in order but results are yielded as soon as
+    each image is done, so the caller can stream them while the rest of the
+    batch is still running. An image that fails yields an `error` instead of
+    failing the batch.
+
+    Args:
+        service (HeightService): pipeline calling model_deployed
+        concurrency (int): number of images measured at the same time
+        mode (str): `full` to draw and write the CSV files (`collect` profile),
+            `measure` to only measure
+        timeout_s (Optional[float]): deadline of each image, counted from its
+            start; None to measure without deadline
+    """
+
+    def __init__(
+        self, service: HeightService, concurrency: int, mode: str = 'full', timeout_s: Optional[float] = None,
+    ) -> None:
+        if mode not in BATCH_MODES:
+            raise ValueError(f'Unknown batch mode {mode}')
+        self.service = service
+        self.concurrency = max(1, concurrency)
+        self.mode = mode
+        self.timeout_s = timeout_s
+
+    async def run(self, images: Iterable[BatchImage]) -> AsyncIterator[dict[str, Any]]:
+        """Yield the result of every image, in completion order"""
+        images = iter(images)
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                for image in itertools.islice(images, self.concurrency - len(pending)):
+                    pending.add(asyncio.create_task(self.measure(image)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda task: task.result()['index']):
+                    yield task.result()
+        finally:
+            # client đã ngắt: huỷ các ảnh đang đo
+            for task in pending:
+                task.cancel()
+
+    async def measure(self, image: BatchImage) -> dict[str, Any]:
+        start_time = time.perf_counter()
+        result: dict[str, Any] = {'index': image.index, 'file_name': image.file_name}
+        if self.timeout_s is not None:
+            # mỗi ảnh chạy trong task riêng: deadline chỉ áp cho ảnh này, không cho cả batch
+            set_deadline(time.time() + self.timeout_s)
+
+        try:
+            data = await image.load()
+            decoded = await asyncio.to_thread(self.decode, data)
+            output: BaseModel
+            if self.mode == 'measure':
+                output = await self.service.measure(decoded)
+            else:
+                output = await self.service.process(
+                    inputs=HeightInput(image=decoded, img_name=image.file_name), profile='collect',
+                )
+        except Exception as e:
+            logger.exception(f'Failed to measure {image.file_name}')
+            result['error'] = str(e)
+            return result
+
+        result.update(output.model_dump())
+        result['latency_ms'] = (time.perf_counter() - start_time) * 1000
+        return result
+
+    @staticmethod
+    def decode(data: bytes) -> np.ndarray:
+        with stage_timer('decode', 'batch'):
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError('Failed to decode image - result is None')
+        return image
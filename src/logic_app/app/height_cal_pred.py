@@ -1,21 +1,35 @@
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
+from app.side_effects import get_side_effect_queue
+from common.bases import AsyncBaseService
 from common.bases import BaseModel
-from common.bases import BaseService
 from common.logs import get_logger
+from common.metrics import stage_timer
 from common.settings import Settings
+from common.settings.models.pipeline import PIPELINE_PROFILES
+from common.shm import SharedImage
+from common.wire import HEIGHT_LANDMARKS
+from infrastructure.box_detector import BoxDectorOutput
 from infrastructure.box_detector import BoxDetector
 from infrastructure.box_detector import BoxDetectorInput
 from infrastructure.height_calculator import HeightCal
 from infrastructure.height_calculator import HeightCalInput
+from infrastructure.height_calculator import HeightCalOutput
 from infrastructure.height_predictor import HeightPred
+from infrastructure.height_predictor import HeightPredInput
+from infrastructure.height_predictor import HeightPredOutput
+from infrastructure.inprocess import InProcessBoxDetector
+from infrastructure.inprocess import InProcessHeightCal
+from infrastructure.inprocess import InProcessHeightPred
+from infrastructure.inprocess import InProcessPoseDetector
 from infrastructure.pose_detector import PoseDetector
 from infrastructure.pose_detector import PoseDetectorInput
-from infrastructure.height_predictor import HeightPredInput
-from infrastructure.height_predictor import HeightPred
+from infrastructure.pose_detector import PoseDetectorOutput
 from service.draw import VisualizationInput
 from service.draw import VisualizationService
 from service.write_csv import CSVWriterInput
@@ -33,26 +47,53 @@ class HeightInput(BaseModel):
 class HeightOutput(BaseModel):
     # status: bool
     results: list[float]
-    out_path: str
+    out_path: Optional[str] = None     # None với profile serve: không vẽ ảnh
+    # profile collect khi vẽ / ghi CSV chạy nền: out_path tra qua /v1/artifacts/{artifact_id}
+    artifact_id: Optional[str] = None
+
+
+class HeightMeasureOutput(BaseModel):
+    # Kết quả đo nhanh cho luồng camera: không vẽ, không ghi CSV
+    results: list[float]
+    pixel_per_cm: float
+    bboxes: list[list[float]]
+    scores: list[float]
 
 
-class HeightService(BaseService):
+class HeightService(AsyncBaseService):
     settings: Settings
 
+    @property
+    def _inprocess(self) -> bool:
+        # gọi thẳng các model của model_deployed trong process này, không qua HTTP
+        return self.settings.pipeline.transport == 'inprocess'
+
+    @property
+    def _transport_mode(self) -> str:
+        return 'inprocess' if self._inprocess else self.settings.http_client.image_transport
+
     @property
     def _get_box_detector(self) -> BoxDetector:
+        if self._inprocess:
+            return InProcessBoxDetector(settings=self.settings)
         return BoxDetector(settings=self.settings)
 
     @property
     def _get_pose_detector(self) -> PoseDetector:
+        if self._inprocess:
+            return InProcessPoseDetector(settings=self.settings)
         return PoseDetector(settings=self.settings)
 
     @property
     def _get_height_cal(self) -> HeightCal:
+        if self._inprocess:
+            return InProcessHeightCal(settings=self.settings)
         return HeightCal(settings=self.settings)
 
     @property
     def _get_height_pred(self) -> HeightPred:
+        if self._inprocess:
+            return InProcessHeightPred(settings=self.settings)
         return HeightPred(settings=self.settings)
 
     @property
@@ -63,60 +104,160 @@ class HeightService(BaseService):
     def _get_write_csv(self) -> CSVWriterService:
         return CSVWriterService(settings=self.settings)
 
-    async def process(self, inputs: HeightInput) -> HeightOutput:
-        # Step 1: Detect Box
+    async def _detect_box(
+        self, image: np.ndarray, shared_image: Optional[SharedImage] = None,
+    ) -> BoxDectorOutput:
         try:
-            box_det_out = self._get_box_detector.process(
-                inputs=BoxDetectorInput(image=inputs.image),
-            )
+            with stage_timer('box_detector', self._transport_mode):
+                box_det_out = await self._get_box_detector.process(
+                    inputs=BoxDetectorInput(image=image, shared_image=shared_image),
+                )
             logger.info('Box detection completed successfully.')
         except Exception as e:
             logger.exception('Error during Box detection.')
             raise e
+        return box_det_out
 
-        # Step 2: Detect Pose
+    async def _detect_pose(
+        self, image: np.ndarray, shared_image: Optional[SharedImage] = None,
+        landmark_indices: Optional[list[int]] = None,
+    ) -> PoseDetectorOutput:
         try:
-            pose_det_out = self._get_pose_detector.process(
-                inputs=PoseDetectorInput(img_origin=inputs.image),
-            )
+            with stage_timer('pose_detector', self._transport_mode):
+                pose_det_out = await self._get_pose_detector.process(
+                    inputs=PoseDetectorInput(
+                        img_origin=image, shared_image=shared_image, landmark_indices=landmark_indices,
+                    ),
+                )
             logger.info('Pose detection completed successfully.')
         except Exception as e:
             logger.exception('Error during Pose detection.')
             raise e
+        return pose_det_out
 
-        # Step 3: Calculate Height
+    async def _detect(
+        self, image: np.ndarray, landmark_indices: Optional[list[int]] = None,
+    ) -> tuple[BoxDectorOutput, PoseDetectorOutput]:
+        # Detect Box và Detect Pose độc lập nhau -> chạy song song
+        if self.settings.http_client.image_transport == 'shm' and not self._inprocess:
+            # ghi ảnh vào shared memory 1 lần, cả 2 detector cùng đọc
+            async with SharedImage(image) as shared_image:
+                return await asyncio.gather(
+                    self._detect_box(image, shared_image),
+                    self._detect_pose(image, shared_image, landmark_indices),
+                )
+        return await asyncio.gather(
+            self._detect_box(image),
+            self._detect_pose(image, landmark_indices=landmark_indices),
+        )
+
+    async def _calculate_height(
+        self, box_det_out: BoxDectorOutput, pose_det_out: PoseDetectorOutput,
+    ) -> HeightCalOutput:
         try:
-            height_cal_out = self._get_height_cal.process(
-                inputs=HeightCalInput(
-                    landmarks=pose_det_out.pose_landmarks,
-                    img_width=pose_det_out.img_width,
-                    img_height=pose_det_out.img_height,
-                    px_per_cm=box_det_out.pixel_per_cm,
-                ),
-            )
+            with stage_timer('height_calculator'):
+                height_cal_out = await self._get_height_cal.process(
+                    inputs=HeightCalInput(
+                        landmarks=pose_det_out.landmarks,
+                        landmark_indices=pose_det_out.landmark_indices,
+                        img_width=pose_det_out.img_width,
+                        img_height=pose_det_out.img_height,
+                        px_per_cm=box_det_out.pixel_per_cm,
+                    ),
+                )
             logger.info('Height calculation completed successfully.')
         except Exception as e:
             logger.exception('Error during Height calculation.')
             raise e
+        return height_cal_out
 
-        # Step 3.1: draw
+    async def _predict_height(self, height_cal_out: HeightCalOutput) -> HeightPredOutput:
         try:
-            height_pre = height_cal_out.heights
-            # Trích xuất thông tin từ tên file
-            pose_num, height_truth, name_no_ext = self.parse_height_input_from_img_name(
-                inputs.img_name,
-            )
+            with stage_timer('height_predictor'):
+                height_pred_out = await self._get_height_pred.process(
+                    inputs=HeightPredInput(x=[d[:6] for d in height_cal_out.distances]),
+                )
+            logger.info('Height prediction completed successfully.')
+        except Exception as e:
+            logger.exception('Error during Height prediction.')
+            raise e
+        return height_pred_out
 
-            draw_out = self._get_draw.process(
-                inputs=VisualizationInput(
-                    bboxes=np.array(box_det_out.bboxes),
-                    confidences=np.array(box_det_out.scores),
-                    height_cm=height_pre,   # Sẽ cần sửa trong tương lai
-                    image=inputs.image,
-                    name_image=name_no_ext,
-                    pose_landmarks_list=pose_det_out.pose_landmarks,
-                ),
-            )
+    async def measure(self, image: np.ndarray) -> HeightMeasureOutput:
+        """Detect, calculate and predict the height of the people on one camera frame,
+        without drawing the result nor writing the CSV files"""
+        # không vẽ, không ghi CSV: chỉ lấy các landmark mà bộ tính chiều cao dùng
+        box_det_out, pose_det_out = await self._detect(image, landmark_indices=HEIGHT_LANDMARKS)
+        height_cal_out = await self._calculate_height(box_det_out, pose_det_out)
+        height_pred_out = await self._predict_height(height_cal_out)
+
+        return HeightMeasureOutput(
+            results=height_pred_out.pred,
+            pixel_per_cm=box_det_out.pixel_per_cm,
+            bboxes=box_det_out.bboxes,
+            scores=box_det_out.scores,
+        )
+
+    async def process(self, inputs: HeightInput, profile: Optional[str] = None) -> HeightOutput:
+        """Run the pipeline on one image with the `profile` of the request,
+        or `pipeline.profile` of the deployment if None
+
+        Once the side effect queue is started, the drawing and CSV rows of
+        the `collect` profile are written in the background: the output
+        carries their `artifact_id` instead of `out_path`.
+
+        Raises:
+            ValueError: if the profile is unknown, or if the `collect` profile
+                cannot read the pose and the true height from `img_name`
+        """
+        profile = profile or self.settings.pipeline.profile
+        if profile not in PIPELINE_PROFILES:
+            raise ValueError(f'Unknown pipeline profile {profile}')
+        if profile == 'serve':
+            measure_out = await self.measure(inputs.image)
+            return HeightOutput(results=measure_out.results)
+
+        # Step 1 + 2: Detect Box và Detect Pose độc lập nhau -> chạy song song
+        box_det_out, pose_det_out = await self._detect(inputs.image)
+
+        # Step 3: Calculate Height
+        height_cal_out = await self._calculate_height(box_det_out, pose_det_out)
+
+        # Draw và CSV cần đủ 33 landmarks dạng dict
+        pose_landmarks = pose_det_out.pose_landmarks
+        height_pre = height_cal_out.heights
+        # Trích xuất thông tin từ tên file
+        pose_num, height_truth, name_no_ext = self.parse_height_input_from_img_name(
+            inputs.img_name,
+        )
+        draw_inputs = VisualizationInput(
+            bboxes=np.array(box_det_out.bboxes),
+            confidences=np.array(box_det_out.scores),
+            height_cm=height_pre,   # Sẽ cần sửa trong tương lai
+            image=inputs.image,
+            name_image=name_no_ext,
+            pose_landmarks_list=pose_landmarks,
+        )
+        csv_inputs = CSVWriterInput(
+            distances=height_cal_out.distances,
+            height_truth=height_truth,
+            pose_landmarks_list=pose_landmarks,
+            pose_num=pose_num,
+            height_pre=height_pre,
+            px_per_cm=box_det_out.pixel_per_cm,
+        )
+
+        side_effects = get_side_effect_queue()
+        if side_effects.running:
+            # Step 3.1 + 3.2 chạy nền theo thứ tự gửi, response chỉ chờ Step 4
+            artifact_id = await side_effects.submit(draw_inputs, csv_inputs)
+            height_pred_out = await self._predict_height(height_cal_out)
+            return HeightOutput(results=height_pred_out.pred, artifact_id=artifact_id)
+
+        # Step 3.1: draw
+        try:
+            with stage_timer('draw'):
+                draw_out = self._get_draw.process(inputs=draw_inputs)
             logger.info('Draw completed successfully.')
         except Exception as e:
             logger.exception('Error during Draw.')
@@ -124,16 +265,8 @@ class HeightService(BaseService):
 
         # Step 3.2: write csv
         try:
-            write_csv_out = await self._get_write_csv.process(
-                inputs=CSVWriterInput(
-                    distances=height_cal_out.distances,
-                    height_truth=height_truth,
-                    pose_landmarks_list=pose_det_out.pose_landmarks,
-                    pose_num=pose_num,
-                    height_pre=height_pre,
-                    px_per_cm=box_det_out.pixel_per_cm,
-                ),
-            )
+            with stage_timer('write_csv'):
+                write_csv_out = await self._get_write_csv.process(inputs=csv_inputs)
             logger.info(
                 f'✅ Write CSV completed successfully.{write_csv_out}',
                 extra={
@@ -146,14 +279,7 @@ class HeightService(BaseService):
             raise e
         logger.info(f'✅ pixcel per cm {box_det_out.pixel_per_cm}')
         # Step 4: Predict Height
-        try:
-            height_pred_out = self._get_height_pred.process(
-                inputs=HeightPredInput(x=[d[:6] for d in height_cal_out.distances]),
-            )
-            logger.info('Height prediction completed successfully.')
-        except Exception as e:
-            logger.exception('Error during Height prediction.')
-            raise e
+        height_pred_out = await self._predict_height(height_cal_out)
 
         return HeightOutput(
             results=height_pred_out.pred,
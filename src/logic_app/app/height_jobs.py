@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import shutil
+import time
+from contextlib import suppress
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+import httpx
+from app.height_batch import HeightBatch
+from app.height_batch import is_image
+from app.height_cal_pred import HeightInput
+from app.height_cal_pred import HeightService
+from common.bases import BaseModel
+from common.deadline import reset_deadline
+from common.deadline import set_deadline
+from common.logs import get_logger
+from common.settings.models import JobsSettings
+from common.tracing import start_trace
+from common.utils import get_settings
+from infrastructure.job_store import get_job_store
+from infrastructure.job_store import JobItem
+from infrastructure.job_store import JobStore
+
+logger = get_logger(__name__)
+
+
+def expand_paths(paths: Iterable[str], input_root: str) -> List[Path]:
+    """Images to measure: every listed image, plus the images of every listed
+    folder (recursively, sorted by path)
+
+    Raises:
+        ValueError: if a path is missing, outside `input_root` or not an image
+    """
+    root = Path(input_root).resolve()
+    images: List[Path] = []
+    for value in paths:
+        path = Path(value)
+        path = (path if path.is_absolute() else root / path).resolve()
+        if not path.is_relative_to(root):
+            raise ValueError(f'{value} is outside {input_root}')
+        if path.is_dir():
+            images.extend(
+                sorted(file for file in path.rglob('*') if file.is_file() and is_image(file.name)),
+            )
+        elif path.is_file() and is_image(path.name):
+            images.append(path)
+        else:
+            raise ValueError(f'{value} is neither an image nor a folder')
+    return images
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether retrying the item cannot help: unreadable or undecodable image,
+    or an image the models reject"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code < 500 and error.response.status_code != 429
+    return isinstance(error, (OSError, ValueError))
+
+
+class JobRunner:
+    """Worker pool measuring the items of the queued jobs.
+
+    `concurrency` workers claim items from the store one at a time, so an
+    item is measured by one worker only, even across processes. A failing
+    item goes back to the queue after an exponential backoff until
+    `max_attempts`; errors that a retry cannot fix fail it at once. A worker
+    stopped in the middle of an item gives it back; a worker killed with its
+    process leaves it leased, and it is measured again once the lease expires.
+
+    Args:
+        store (JobStore): durable queue of the jobs
+        service (HeightService): pipeline calling model_deployed
+        settings (JobsSettings): concurrency, retry and lease settings
+        timeout_s (Optional[float]): deadline of each item, counted from its
+            start; None to measure without deadline
+    """
+
+    def __init__(
+        self, store: JobStore, service: HeightService, settings: JobsSettings, timeout_s: Optional[float] = None,
+    ) -> None:
+        self.store = store
+        self.service = service
+        self.settings = settings
+        self.timeout_s = timeout_s
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._work(), name=f'job-worker-{index}')
+            for index in range(max(1, self.settings.concurrency))
+        ]
+        logger.info(f'Started {len(self._workers)} job worker(s)')
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def notify(self) -> None:
+        """Wake the idle workers up: a job was just submitted"""
+        self._wakeup.set()
+
+    async def _work(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                item = await asyncio.to_thread(self.store.claim, self.settings.lease_s)
+            except Exception:
+                logger.exception('Failed to claim a job item')
+                item = None
+            if item is None:
+                # hàng đợi trống hoặc các ảnh lỗi chưa tới lượt thử lại
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), self.settings.poll_interval_s)
+                continue
+
+            try:
+                await self.run_item(item)
+            except asyncio.CancelledError:
+                # dừng giữa chừng: trả ảnh về hàng đợi, không tính là 1 lần thử
+                self.store.release(item.job_id, item.index)
+                raise
+
+    async def run_item(self, item: JobItem) -> None:
+        if item.attempts > self.settings.max_attempts:
+            # worker trước đã chết khi đang đo ảnh này ở lần thử cuối
+            await asyncio.to_thread(
+                self.store.fail, item.job_id, item.index,
+                f'Gave up after {self.settings.max_attempts} attempts',
+            )
+            await self._cleanup(item.job_id)
+            return
+
+        token = set_deadline(None if self.timeout_s is None else time.time() + self.timeout_s)
+        start_time = time.perf_counter()
+        try:
+            with start_trace('height_job item', job_id=item.job_id, index=item.index, attempt=item.attempts):
+                result = await self.measure(item)
+        except Exception as e:
+            retry_at = None
+            if not is_permanent(e) and item.attempts < self.settings.max_attempts:
+                retry_at = time.time() + self.settings.retry_backoff_s * 2 ** (item.attempts - 1)
+            logger.exception(
+                f'Failed to measure item {item.index} of job {item.job_id}',
+                extra={'attempt': item.attempts, 'retry': retry_at is not None},
+            )
+            await asyncio.to_thread(self.store.fail, item.job_id, item.index, str(e), retry_at)
+            if retry_at is None:
+                await self._cleanup(item.job_id)
+            return
+        finally:
+            reset_deadline(token)
+
+        result['latency_ms'] = (time.perf_counter() - start_time) * 1000
+        await asyncio.to_thread(self.store.complete, item.job_id, item.index, result)
+        await self._cleanup(item.job_id)
+
+    async def measure(self, item: JobItem) -> dict[str, Any]:
+        data = await asyncio.to_thread(Path(item.source).read_bytes)
+        image = await asyncio.to_thread(HeightBatch.decode, data)
+        output: BaseModel
+        if item.mode == 'measure':
+            output = await self.service.measure(image)
+        else:
+            output = await self.service.process(
+                inputs=HeightInput(image=image, img_name=item.file_name), profile='collect',
+            )
+        return output.model_dump()
+
+    async def _cleanup(self, job_id: str) -> None:
+        """Delete the uploaded images of a job once all its items are finished"""
+        summary = await asyncio.to_thread(self.store.get_job, job_id)
+        if summary is not None and summary.status == 'completed':
+            await asyncio.to_thread(
+                shutil.rmtree, Path(self.settings.upload_dir) / job_id, ignore_errors=True,
+            )
+
+
+@lru_cache
+def get_job_runner() -> JobRunner:
+    settings = get_settings()
+    return JobRunner(
+        store=get_job_store(),
+        service=HeightService(settings=settings),
+        settings=settings.jobs,
+        timeout_s=settings.deadline.default_timeout_s if settings.deadline.enabled else None,
+    )
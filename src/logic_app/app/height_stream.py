@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Optional
+
+import cv2
+import numpy as np
+from app.height_cal_pred import HeightService
+from common.bases import BaseModel
+from common.logs import get_logger
+from common.metrics import stage_timer
+from common.tracing import start_trace
+
+logger = get_logger(__name__)
+
+
+class StreamFrame(BaseModel):
+    frame_id: int
+    data: bytes
+    received_at: float
+
+
+class LatestFrameSlot:
+    """Single-frame buffer between the WebSocket reader and the measuring worker.
+
+    `put` never waits: a frame still waiting when the next one arrives is
+    dropped, so the worker always measures the most recent frame (latest
+    frame wins) and a slow pipeline never builds a backlog.
+    """
+
+    def __init__(self) -> None:
+        self._frame: Optional[StreamFrame] = None
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, frame: StreamFrame) -> None:
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self._ready.set()
+
+    async def get(self) -> Optional[StreamFrame]:
+        """Wait for the next frame, None once the slot is closed"""
+        while self._frame is None:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        frame, self._frame = self._frame, None
+        return frame
+
+    def close(self) -> None:
+        self._closed = True
+        self._ready.set()
+
+
+class HeightStream:
+    """Measures the frames of one camera client, as fast as the models allow.
+
+    Frames are numbered in arrival order. Each result is sent back tagged with
+    the id of its frame and the number of frames dropped since the previous
+    result, because inference was behind.
+
+    Args:
+        service (HeightService): pipeline calling model_deployed
+        send (Callable[[dict], Awaitable[None]]): sends one result to the client
+    """
+
+    def __init__(self, service: HeightService, send: Callable[[dict], Awaitable[None]]) -> None:
+        self.service = service
+        self.send = send
+        self.slot = LatestFrameSlot()
+        self.next_frame_id = 0
+        self.reported_dropped = 0
+
+    def push(self, data: bytes) -> int:
+        """Queue a JPEG/PNG frame, return its id"""
+        frame_id = self.next_frame_id
+        self.next_frame_id += 1
+        self.slot.put(StreamFrame(frame_id=frame_id, data=data, received_at=time.perf_counter()))
+        return frame_id
+
+    def close(self) -> None:
+        self.slot.close()
+
+    async def run(self) -> None:
+        """Measure frames until the stream is closed"""
+        while True:
+            frame = await self.slot.get()
+            if frame is None:
+                return
+            await self.send(await self.measure(frame))
+
+    async def measure(self, frame: StreamFrame) -> dict:
+        dropped = self.slot.dropped - self.reported_dropped
+        self.reported_dropped = self.slot.dropped
+        result: Dict[str, Any] = {'frame_id': frame.frame_id, 'dropped': dropped}
+
+        try:
+            # mỗi frame là 1 trace riêng (WebSocket không đi qua TracingMiddleware)
+            with start_trace('height_stream frame', frame_id=frame.frame_id, dropped=dropped):
+                image = await asyncio.to_thread(self.decode, frame.data)
+                measure_out = await self.service.measure(image)
+        except Exception as e:
+            logger.exception(f'Failed to measure frame {frame.frame_id}')
+            result['error'] = str(e)
+            return result
+
+        result.update(measure_out.model_dump())
+        result['latency_ms'] = (time.perf_counter() - frame.received_at) * 1000
+        return result
+
+    @staticmethod
+    def decode(data: bytes) -> np.ndarray:
+        with stage_timer('decode', 'stream'):
+            image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError('Failed to decode image - result is None')
+        return image
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import glob
+import itertools
+import json
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import TextIO
+from typing import Tuple
+
+import httpx
+from app.height_batch import HeightBatch
+from app.height_batch import is_image
+from app.height_cal_pred import HeightInput
+from app.height_cal_pred import HeightService
+from common.bases import BaseModel
+from common.logs import get_logger
+
+logger = get_logger(__name__)
+
+# cột của file kết quả, mỗi ảnh 1 dòng
+COLUMNS = ('path', 'file_name', 'status', 'results', 'out_path', 'pixel_per_cm', 'latency_ms', 'error')
+
+Measure = Callable[[Path], Awaitable[Dict[str, Any]]]
+
+
+class DatasetImage:
+    """One image of the dataset: `key` identifies it in the checkpoint and picks its shard"""
+
+    def __init__(self, path: Path, key: str) -> None:
+        self.path = path
+        self.key = key
+
+
+def find_images(source: str) -> List[DatasetImage]:
+    """Images of a folder (recursively) or matching a glob pattern, sorted
+
+    Keys are relative to the folder, or the matched paths for a pattern, so
+    they stay the same on every machine holding a copy of the dataset.
+    """
+    root = Path(source)
+    if root.is_dir():
+        paths = [path for path in root.rglob('*') if path.is_file() and is_image(path.name)]
+        images = [DatasetImage(path, path.relative_to(root).as_posix()) for path in paths]
+    else:
+        paths = [Path(path) for path in glob.glob(source, recursive=True)]
+        images = [DatasetImage(path, path.as_posix()) for path in paths if path.is_file() and is_image(path.name)]
+    return sorted(images, key=lambda image: image.key)
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """`i/n` -> (i, n), shards numbered from 0"""
+    try:
+        shard, shards = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f'Shard {value} is not i/n') from None
+    if shards < 1 or not 0 <= shard < shards:
+        raise ValueError(f'Shard {value} is out of range')
+    return shard, shards
+
+
+def in_shard(key: str, shard: int, shards: int) -> bool:
+    # hash cố định theo key: các máy chia dataset giống nhau dù thứ tự liệt kê file khác nhau
+    return zlib.crc32(key.encode()) % shards == shard
+
+
+class Checkpoint:
+    """Append-only JSON lines file of the images already processed.
+
+    Every record is flushed as soon as its image is done, so an interrupted
+    run loses at most the images in flight. The last record of an image
+    wins: a failed image retried later is replaced by its new record.
+
+    Args:
+        path (str): checkpoint file, created if missing
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.records: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with self.path.open(encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # dòng cuối bị cắt khi lần chạy trước bị dừng đột ngột
+                        continue
+                    self.records[record['path']] = record
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file: Optional[TextIO] = None
+
+    def finished(self, retry_failed: bool = True) -> set:
+        """Keys of the images to skip"""
+        return {
+            key for key, record in self.records.items()
+            if record['status'] == 'ok' or not retry_failed
+        }
+
+    def append(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            self._file = self.path.open('a', encoding='utf-8')
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        self.records[record['path']] = record
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def write_table(self, output: str) -> None:
+        """Write one row per image, sorted by path, to the CSV file `output`"""
+        Path(output).parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            for key in sorted(self.records):
+                record = dict(self.records[key])
+                if record.get('results') is not None:
+                    record['results'] = json.dumps(record['results'])
+                writer.writerow(record)
+
+
+class Progress:
+    """Processed images, throughput and ETA, printed every `interval_s` seconds"""
+
+    def __init__(self, total: int, stream: TextIO = sys.stderr, interval_s: float = 1.0) -> None:
+        self.total = total
+        self.ok = 0
+        self.failed = 0
+        self.stream = stream
+        self.interval_s = interval_s
+        self.start_time = time.perf_counter()
+        self._reported_at = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.ok + self.failed
+
+    def update(self, ok: bool) -> None:
+        if ok:
+            self.ok += 1
+        else:
+            self.failed += 1
+        if time.perf_counter() - self._reported_at >= self.interval_s:
+            self.report()
+
+    def report(self, final: bool = False) -> None:
+        self._reported_at = time.perf_counter()
+        elapsed = self._reported_at - self.start_time
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else float('inf')
+        self.stream.write(
+            f'\r{self.done}/{self.total} images ({self.ok} ok, {self.failed} failed) '
+            f'{rate:.1f} img/s, {"elapsed" if final else "ETA"} {elapsed if final else eta:.0f}s',
+        )
+        if final:
+            self.stream.write('\n')
+        self.stream.flush()
+
+
+def inprocess_measure(service: HeightService, mode: str = 'full') -> Measure:
+    """Measure images by calling the pipeline of this process"""
+    async def measure(path: Path) -> Dict[str, Any]:
+        data = await asyncio.to_thread(path.read_bytes)
+        image = await asyncio.to_thread(HeightBatch.decode, data)
+        output: BaseModel
+        if mode == 'measure':
+            output = await service.measure(image)
+        else:
+            output = await service.process(inputs=HeightInput(image=image, img_name=path.name), profile='collect')
+        return output.model_dump()
+
+    return measure
+
+
+def http_measure(client: httpx.AsyncClient, url: str) -> Measure:
+    """Measure images by posting them to a running logic_app (`/v1/height`)"""
+    async def measure(path: Path) -> Dict[str, Any]:
+        data = await asyncio.to_thread(path.read_bytes)
+        response = await client.post(url, files={'file': (path.name, data, 'image/jpeg')})
+        response.raise_for_status()
+        return response.json()['info']
+
+    return measure
+
+
+class DatasetIngest:
+    """Runs every image of a dataset through the pipeline, `concurrency` at a time.
+
+    Results are recorded in the checkpoint as each image finishes; an image
+    that fails gets an `error` record instead of stopping the run.
+
+    Args:
+        measure (Measure): measures one image, in process or over HTTP
+        checkpoint (Checkpoint): record of the images already processed
+        concurrency (int): number of images in flight
+    """
+
+    def __init__(self, measure: Measure, checkpoint: Checkpoint, concurrency: int) -> None:
+        self.measure = measure
+        self.checkpoint = checkpoint
+        self.concurrency = max(1, concurrency)
+
+    async def run(self, images: Iterable[DatasetImage], progress: Progress) -> None:
+        images = iter(images)
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                for image in itertools.islice(images, self.concurrency - len(pending)):
+                    pending.add(asyncio.create_task(self.process(image)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    record = task.result()
+                    self.checkpoint.append(record)
+                    progress.update(record['status'] == 'ok')
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def process(self, image: DatasetImage) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        record: Dict[str, Any] = {'path': image.key, 'file_name': image.path.name}
+        try:
+            output = await self.measure(image.path)
+        except Exception as e:
+            logger.warning(f'Failed to process {image.key}: {e}')
+            record.update(status='error', error=str(e))
+            return record
+        record.update(output, status='ok', latency_ms=(time.perf_counter() - start_time) * 1000)
+        return record
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+from common.bases import BaseModel
+from common.logs import get_logger
+from common.metrics import SIDE_EFFECT_QUEUE_DEPTH
+from common.metrics import SIDE_EFFECTS
+from common.metrics import stage_timer
+from common.settings import Settings
+from common.utils import get_settings
+from service.draw import VisualizationInput
+from service.draw import VisualizationService
+from service.write_csv import CSVWriterInput
+from service.write_csv import CSVWriterService
+
+logger = get_logger(__name__)
+
+# hàng đợi đầy: block (chờ chỗ trống), drop (bỏ qua ảnh), spill (ghi tạm ra đĩa, ghi tiếp sau)
+OVERFLOW_POLICIES = ('block', 'drop', 'spill')
+
+
+class SideEffect(BaseModel):
+    """Drawing and CSV rows of one measured image, written in the background"""
+    artifact_id: str
+    created_ns: int         # thời điểm gửi: thứ tự các file ghi tạm
+    draw: VisualizationInput
+    write_csv: CSVWriterInput
+
+
+class Artifact(BaseModel):
+    artifact_id: str
+    status: str             # queued, spilled, done, failed hoặc dropped
+    out_path: Optional[str] = None
+    error: Optional[str] = None
+
+
+class SideEffectQueue:
+    """Ordered background writer of the drawings and CSV rows of the
+    `collect` profile.
+
+    One worker writes the submitted images in submission order, so the CSV
+    rows keep the order of the requests. At most `max_depth` images wait in
+    memory; past that, `overflow` decides: `block` makes the request wait
+    for room, `drop` skips the image, `spill` writes it to `spill_dir` until
+    the worker catches up. Spilled images left by a stopped process are
+    written at the next start, before the images submitted after it. Each
+    image gets an artifact id, giving its status and output path once
+    written.
+
+    Args:
+        settings (Settings): draw, CSV and `side_effects` settings
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        if settings.side_effects.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy {settings.side_effects.overflow}')
+        self.settings = settings
+        self.config = settings.side_effects
+        self.spill_dir = Path(self.config.spill_dir)
+        self._queue: Optional[asyncio.Queue] = None
+        self._spilled: Deque[Path] = deque()
+        self._artifacts: OrderedDict[str, Artifact] = OrderedDict()
+        self._pending = 0
+        self._drained = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=max(1, self.config.max_depth))
+        self._drained = asyncio.Event()
+        if self.spill_dir.is_dir():
+            # ảnh ghi tạm còn lại từ lần chạy trước
+            for path in sorted(self.spill_dir.glob('*.json')):
+                self._spilled.append(path)
+                self._set_status(path.stem.split('_', 1)[-1], 'spilled')
+        self._set_pending(len(self._spilled))
+        self._worker = asyncio.create_task(self._work(), name='side-effect-worker')
+        logger.info(f'Started the side effect worker, {len(self._spilled)} spilled image(s) to write')
+
+    async def stop(self) -> None:
+        """Write what is still waiting, for at most `shutdown_timeout_s`, then stop the worker
+        once the image it is writing is done"""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), self.config.shutdown_timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning(f'{self._pending} drawing(s) and CSV row(s) not written before shutdown')
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+        if self._inflight is not None:
+            # ảnh đang ghi được ghi xong: ghi lại từ đầu ở lần sau sẽ lặp ảnh và dòng CSV
+            await asyncio.gather(self._inflight, return_exceptions=True)
+            self._inflight = None
+
+        assert self._queue is not None
+        left: List[SideEffect] = []
+        while not self._queue.empty():
+            left.append(self._queue.get_nowait())
+        if left and self.config.overflow == 'spill':
+            # ghi tiếp ở lần khởi động sau
+            for job in left:
+                await asyncio.to_thread(self._spill, job)
+        elif left:
+            logger.warning(f'Dropped {len(left)} drawing(s) and CSV row(s) on shutdown')
+        self._spilled.clear()
+        self._set_pending(0)
+
+    async def flush(self) -> None:
+        """Wait until every submitted image is written"""
+        await self._drained.wait()
+
+    async def submit(self, draw: VisualizationInput, write_csv: CSVWriterInput) -> str:
+        """Queue the drawing and CSV rows of one image
+
+        Returns:
+            str: artifact id of the image, see `get_artifact`
+        """
+        job = SideEffect(
+            artifact_id=uuid.uuid4().hex, created_ns=time.time_ns(), draw=draw, write_csv=write_csv,
+        )
+        assert self._queue is not None, 'start() the side effect queue before submitting'
+        # đã có ảnh ghi tạm: các ảnh sau cũng ghi tạm để giữ đúng thứ tự
+        if self._queue.full() or (self._spilled and self.config.overflow == 'spill'):
+            if self.config.overflow == 'drop':
+                logger.warning(f'Side effect queue is full, dropped the drawing and CSV rows of {job.artifact_id}')
+                self._set_status(job.artifact_id, 'dropped')
+                SIDE_EFFECTS.labels(outcome='dropped').inc()
+                return job.artifact_id
+            if self.config.overflow == 'spill':
+                self._spilled.append(await asyncio.to_thread(self._spill, job))
+                self._set_status(job.artifact_id, 'spilled')
+                self._set_pending(self._pending + 1)
+                return job.artifact_id
+
+        self._set_status(job.artifact_id, 'queued')
+        self._set_pending(self._pending + 1)
+        await self._queue.put(job)
+        return job.artifact_id
+
+    def get_artifact(self, artifact_id: str) -> Optional[Artifact]:
+        return self._artifacts.get(artifact_id)
+
+    async def execute(self, job: SideEffect) -> str:
+        """Draw and write the CSV rows of one image, return the path of the drawing"""
+        with stage_timer('draw', 'background'):
+            draw_out = await asyncio.to_thread(VisualizationService(settings=self.settings).process, job.draw)
+        with stage_timer('write_csv', 'background'):
+            await asyncio.to_thread(CSVWriterService(settings=self.settings).write, job.write_csv)
+        return draw_out.output_path
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        while True:
+            # ảnh ghi tạm từ lần chạy trước cũ hơn mọi ảnh trong hàng đợi; với spill,
+            # ảnh ghi tạm lúc đang chạy lại mới hơn các ảnh đã vào hàng đợi
+            if self._spilled and (self.config.overflow != 'spill' or self._queue.empty()):
+                step = self._run_spilled(self._spilled[0])
+            else:
+                step = self._run(await self._queue.get())
+            # huỷ worker không huỷ ảnh đang ghi: `stop` chờ ảnh đó ghi xong
+            self._inflight = asyncio.ensure_future(step)
+            await asyncio.shield(self._inflight)
+            self._inflight = None
+
+    async def _run_spilled(self, path: Path) -> None:
+        try:
+            job = await asyncio.to_thread(self._load, path)
+        except Exception:
+            logger.exception(f'Failed to read the spilled side effect {path}')
+            job = None
+        if job is not None:
+            await self._run(job)
+        else:
+            self._set_pending(self._pending - 1)
+        # xoá file cùng bước với lúc ghi: không ghi lại ảnh đã ghi xong
+        self._spilled.popleft()
+        path.unlink(missing_ok=True)
+        path.with_suffix('.npz').unlink(missing_ok=True)
+
+    async def _run(self, job: SideEffect) -> None:
+        try:
+            out_path = await self.execute(job)
+        except Exception as e:
+            logger.exception(f'Failed to write the drawing and CSV rows of {job.artifact_id}')
+            self._set_status(job.artifact_id, 'failed', error=str(e))
+            SIDE_EFFECTS.labels(outcome='failed').inc()
+        else:
+            self._set_status(job.artifact_id, 'done', out_path=out_path)
+            SIDE_EFFECTS.labels(outcome='done').inc()
+        finally:
+            self._set_pending(self._pending - 1)
+
+    def _spill(self, job: SideEffect) -> Path:
+        """Write a job as `<name>.npz` (arrays of the drawing) and
+        `<name>.json` (everything else), no pickle: reading a spilled job
+        back cannot run code"""
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spill_dir / f'{job.created_ns:020d}_{job.artifact_id}.json'
+        arrays: Dict[str, np.ndarray] = {name: value for name, value in job.draw if isinstance(value, np.ndarray)}
+        # ghi file tạm rồi đổi tên: không để lại file ghi dở, file .json ghi sau cùng
+        tmp_path = path.with_suffix('.npz.tmp')
+        with tmp_path.open('wb') as file:
+            # stub của numpy gõ kiểu **kwargs theo tham số allow_pickle: bool
+            np.savez(file, **arrays)  # type: ignore[arg-type]
+        tmp_path.replace(path.with_suffix('.npz'))
+        tmp_path = path.with_suffix('.json.tmp')
+        tmp_path.write_text(job.model_dump_json(exclude={'draw': set(arrays)}), encoding='utf-8')
+        tmp_path.replace(path)
+        return path
+
+    @staticmethod
+    def _load(path: Path) -> SideEffect:
+        data = json.loads(path.read_text(encoding='utf-8'))
+        with np.load(path.with_suffix('.npz'), allow_pickle=False) as arrays:
+            data['draw'].update({name: arrays[name] for name in arrays.files})
+        return SideEffect.model_validate(data)
+
+    def _set_pending(self, pending: int) -> None:
+        self._pending = pending
+        SIDE_EFFECT_QUEUE_DEPTH.set(pending)
+        if pending == 0:
+            self._drained.set()
+        else:
+            self._drained.clear()
+
+    def _set_status(self, artifact_id: str, status: str, **kwargs) -> None:
+        self._artifacts[artifact_id] = Artifact(artifact_id=artifact_id, status=status, **kwargs)
+        self._artifacts.move_to_end(artifact_id)
+        while len(self._artifacts) > self.config.max_artifacts:
+            self._artifacts.popitem(last=False)
+
+
+@lru_cache
+def get_side_effect_queue() -> SideEffectQueue:
+    return SideEffectQueue(settings=get_settings())
@@ -0,0 +1,156 @@
+"""Compare the pipeline transports on a dataset: model_deployed over HTTP
+against its models loaded in this process.
+
+    python benchmark.py ../../resource/data/data/processed_data --limit 200 --concurrency 4
+    python benchmark.py ../../resource/data/data_test --transport inprocess
+
+Every image is measured once per transport with `HeightService.measure`
+(detect, calculate, predict: no drawing, no CSV), images decoded in memory
+beforehand so only the pipeline is timed. The `http` transport needs
+model_deployed running at the `HOST_*` urls; pass its pid with
+`--model-deployed-pid` to add its memory to the report.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from contextlib import suppress
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+from app.height_batch import HeightBatch
+from app.height_cal_pred import HeightService
+from app.ingest import find_images
+from common.logs import setup_logging
+from common.settings import Settings
+from common.utils import get_settings
+from infrastructure.http_client import get_http_client
+from infrastructure.inprocess import get_inprocess_models
+
+TRANSPORTS = ('http', 'inprocess')
+
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Resident memory of a process, this one by default (MB), None if unknown"""
+    try:
+        with open(f'/proc/{pid or "self"}/status') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        # không có /proc (không phải Linux) hoặc process đã dừng
+        pass
+    return None
+
+
+def percentile(values: List[float], quantile: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(quantile * len(values)))]
+
+
+async def run_transport(
+    transport: str, settings: Settings, images: List[np.ndarray], concurrency: int, warmup: int,
+) -> Dict[str, Any]:
+    settings = settings.model_copy(
+        update={'pipeline': settings.pipeline.model_copy(update={'transport': transport})},
+    )
+    if transport == 'inprocess':
+        await get_inprocess_models().start()
+    service = HeightService(settings=settings)
+    for image in images[:warmup]:
+        # lỗi thật (model_deployed không chạy, ...) được đếm ở vòng đo bên dưới
+        with suppress(Exception):
+            await service.measure(image)
+
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(images)
+
+    async def worker() -> None:
+        nonlocal errors
+        for image in queue:
+            start_time = time.perf_counter()
+            try:
+                await service.measure(image)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start_time) * 1000)
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - start_time
+    return {
+        'transport': transport,
+        'images': len(images),
+        'errors': errors,
+        'throughput_img_s': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'latency_ms_mean': statistics.fmean(latencies) if latencies else None,
+        'latency_ms_p50': percentile(latencies, 0.5) if latencies else None,
+        'latency_ms_p95': percentile(latencies, 0.95) if latencies else None,
+        'rss_mb': rss_mb(),
+    }
+
+
+def print_report(results: List[Dict[str, Any]], model_deployed_rss: Optional[float]) -> None:
+    columns = ('transport', 'images', 'errors', 'throughput_img_s', 'latency_ms_mean', 'latency_ms_p50',
+               'latency_ms_p95', 'rss_mb')
+    print(' | '.join(f'{column:>16}' for column in columns))
+    for result in results:
+        print(' | '.join(
+            f'{value:>16.1f}' if isinstance(value, float) else f'{str(value):>16}'
+            for value in (result[column] for column in columns)
+        ))
+    if model_deployed_rss is not None:
+        # http: bộ nhớ gồm cả process model_deployed
+        print(f'model_deployed rss: {model_deployed_rss:.1f} MB')
+
+
+async def benchmark(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    paths = [image.path for image in find_images(args.source)][:args.limit]
+    if not paths:
+        raise SystemExit(f'No image found in {args.source}')
+    images = [HeightBatch.decode(path.read_bytes()) for path in paths]
+    print(f'{len(images)} image(s), concurrency {args.concurrency}', file=sys.stderr)
+
+    settings = get_settings()
+    results = []
+    try:
+        for transport in args.transport:
+            results.append(await run_transport(transport, settings, images, args.concurrency, args.warmup))
+    finally:
+        await get_http_client().aclose()
+        if 'inprocess' in args.transport:
+            get_inprocess_models().stop()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='folder of images (searched recursively) or glob pattern')
+    parser.add_argument('--transport', nargs='+', choices=TRANSPORTS, default=list(TRANSPORTS))
+    parser.add_argument('--limit', type=int, default=100, help='number of images measured per transport')
+    parser.add_argument('--concurrency', type=int, default=1, help='images in flight')
+    parser.add_argument('--warmup', type=int, default=5, help='images measured before timing')
+    parser.add_argument('--model-deployed-pid', type=int, help='pid of model_deployed, for its memory')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+
+    setup_logging(json_logs=False, log_level='WARNING')
+    results = asyncio.run(benchmark(args))
+    model_deployed_rss = rss_mb(args.model_deployed_pid) if args.model_deployed_pid else None
+    print_report(results, model_deployed_rss)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'results': results, 'model_deployed_rss_mb': model_deployed_rss}, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from common.deadline import check_deadline
+from common.tracing import span
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+
+# Bucket (s) từ vài ms (vẽ, ghi CSV) tới cả pipeline gọi model_deployed
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests handled', ['method', 'route', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency', ['method', 'route'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'HTTP requests being handled',
+)
+STAGE_LATENCY = Histogram(
+    'stage_duration_seconds', 'Latency of one processing stage', ['stage', 'mode'],
+    buckets=LATENCY_BUCKETS,
+)
+HEDGED_REQUESTS = Counter(
+    'upstream_hedged_requests_total', 'Upstream calls sent to a second replica after the hedge delay',
+    ['upstream'],
+)
+REPLICA_EJECTIONS = Counter(
+    'upstream_replica_ejections_total', 'Replicas ejected after failing calls in a row',
+    ['upstream', 'replica'],
+)
+SIDE_EFFECT_QUEUE_DEPTH = Gauge(
+    'side_effect_queue_depth', 'Drawings and CSV rows waiting to be written, spilled ones included',
+)
+SIDE_EFFECTS = Counter(
+    'side_effects_total', 'Drawings and CSV rows of the collect profile, by outcome', ['outcome'],
+)
+
+
+@contextmanager
+def stage_timer(stage: str, mode: str = '') -> Iterator[None]:
+    """Observe the duration of the wrapped block in `stage_duration_seconds`
+    and record it as a span of the current trace. The stage is not started
+    once the deadline of the request has passed"""
+    check_deadline(stage)
+    start_time = time.perf_counter()
+    try:
+        with span(stage, mode=mode):
+            yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage, mode=mode).observe(time.perf_counter() - start_time)
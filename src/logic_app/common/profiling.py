@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import cProfile
+import json
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from common.bases import BaseModel
+from common.logs import get_logger
+from common.utils import get_settings
+
+logger = get_logger(__name__)
+
+PROFILE = 'X-Profile'
+PROFILE_ID = 'X-Profile-Id'
+# cpu: sampler thống kê, xuất speedscope JSON; cprofile: cProfile, xuất pstats
+PROFILE_MODES = ('cpu', 'cprofile')
+
+_active_session: ContextVar[Optional[ProfileSession]] = ContextVar('active_profile_session', default=None)
+# cProfile gắn vào luồng event loop chung: mỗi lúc chỉ 1 request được profile bằng cProfile
+_cprofile_lock = threading.Lock()
+
+Frame = Tuple[str, str, int]
+
+
+class Profile(BaseModel):
+    profile_id: str
+    mode: str
+    name: str
+    started_at: float
+    duration_s: float
+    media_type: str
+    data: bytes
+
+    @property
+    def filename(self) -> str:
+        return f'{self.profile_id}.pstats' if self.mode == 'cprofile' else f'{self.profile_id}.speedscope.json'
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'profile_id': self.profile_id,
+            'mode': self.mode,
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_s': self.duration_s,
+            'size': len(self.data),
+        }
+
+
+class ProfileSession:
+    """Profiles the threads working for one request.
+
+    The event loop thread is profiled for the whole request; worker
+    threads are attached while they run a call of the request (see
+    `run_profiled`). Other requests running on the event loop at the same
+    time are part of its samples.
+
+    Args:
+        profile_id (str): id of the stored profile, the correlation id of the request
+        mode (str): `cpu` for the statistical sampler, `cprofile` for cProfile
+        name (str): label of the profile (method and path of the request)
+        interval_s (float): sampling period of the `cpu` mode
+    """
+
+    def __init__(self, profile_id: str, mode: str, name: str, interval_s: float) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'Unknown profile mode {mode}')
+        self.profile_id = profile_id
+        self.mode = mode
+        self.name = name
+        self.interval_s = max(0.0005, interval_s)
+        self._lock = threading.Lock()
+        self._threads: Dict[int, int] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._samples: Dict[int, Counter] = {}
+        self._profilers: List[cProfile.Profile] = []
+        self._loop_profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.started_at = 0.0
+        self._start = 0.0
+        self.duration_s = 0.0
+
+    def start(self) -> None:
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        if self.mode == 'cprofile' and _cprofile_lock.acquire(blocking=False):
+            self._loop_profiler = cProfile.Profile()
+            self._loop_profiler.enable()
+        elif self.mode == 'cprofile':
+            logger.warning(f'Another request is under cProfile, profiling {self.profile_id} with the sampler')
+            self.mode = 'cpu'
+
+        if self.mode == 'cpu':
+            self._attach()
+            self._sampler = threading.Thread(target=self._sample, name='profiler', daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> Profile:
+        if self._loop_profiler is not None:
+            self._loop_profiler.disable()
+            self._profilers.append(self._loop_profiler)
+            self._loop_profiler = None
+            _cprofile_lock.release()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        self.duration_s = time.perf_counter() - self._start
+
+        if self.mode == 'cprofile':
+            data, media_type = self._pstats(), 'application/octet-stream'
+        else:
+            data, media_type = self._speedscope(), 'application/json'
+        return Profile(
+            profile_id=self.profile_id,
+            mode=self.mode,
+            name=self.name,
+            started_at=self.started_at,
+            duration_s=self.duration_s,
+            media_type=media_type,
+            data=data,
+        )
+
+    @contextmanager
+    def attach_thread(self) -> Iterator[None]:
+        """Profile the current thread while it works for the request"""
+        if self.mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                with self._lock:
+                    self._profilers.append(profiler)
+            return
+
+        thread_id = self._attach()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads[thread_id] -= 1
+                if not self._threads[thread_id]:
+                    del self._threads[thread_id]
+
+    def _attach(self) -> int:
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = self._threads.get(thread_id, 0) + 1
+            # lưu tên lúc gắn: luồng có thể đã kết thúc khi xuất profile
+            self._thread_names[thread_id] = threading.current_thread().name
+        return thread_id
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            with self._lock:
+                thread_ids = list(self._threads)
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self._samples.setdefault(thread_id, Counter())[self._stack(frame)] += 1
+
+    @staticmethod
+    def _stack(frame: Any) -> Tuple[Frame, ...]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        # speedscope đọc stack từ gốc tới lá
+        return tuple(reversed(stack))
+
+    def _pstats(self) -> bytes:
+        stats = pstats.Stats(*self._profilers)
+        # cùng định dạng với pstats.Stats.dump_stats, mở lại bằng pstats.Stats(path) hoặc snakeviz
+        # typeshed không khai báo Stats.stats
+        return marshal.dumps(stats.stats)  # type: ignore[attr-defined]
+
+    def _speedscope(self) -> bytes:
+        frames: List[Frame] = []
+        frame_index: Dict[Frame, int] = {}
+        profiles = []
+        for thread_id, stacks in self._samples.items():
+            samples, weights = [], []
+            for stack, count in stacks.items():
+                indices = []
+                for frame in stack:
+                    if frame not in frame_index:
+                        frame_index[frame] = len(frames)
+                        frames.append(frame)
+                    indices.append(frame_index[frame])
+                samples.append(indices)
+                weights.append(count * self.interval_s)
+            profiles.append({
+                'type': 'sampled',
+                'name': self._thread_names.get(thread_id, str(thread_id)),
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights,
+            })
+
+        document = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': f'{self.name} ({self.profile_id})',
+            'exporter': f'{get_settings().tracing.service_name} profiler',
+            'shared': {
+                'frames': [{'name': name, 'file': file, 'line': line} for name, file, line in frames],
+            },
+            'profiles': profiles,
+        }
+        return json.dumps(document).encode()
+
+
+class ProfileStore:
+    """Keeps the `max_profiles` most recent profiles in memory, by id"""
+
+    def __init__(self, max_profiles: int) -> None:
+        self.max_profiles = max(1, max_profiles)
+        self._profiles: OrderedDict[str, Profile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.profile_id] = profile
+            self._profiles.move_to_end(profile.profile_id)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [profile.summary() for profile in reversed(self._profiles.values())]
+
+
+@lru_cache
+def get_profile_store() -> ProfileStore:
+    return ProfileStore(max_profiles=get_settings().profiling.max_profiles)
+
+
+@contextmanager
+def profile_request(session: ProfileSession) -> Iterator[None]:
+    """Profile the wrapped request and store its profile once it is done"""
+    token = _active_session.set(session)
+    session.start()
+    try:
+        yield
+    finally:
+        _active_session.reset(token)
+        try:
+            get_profile_store().add(session.stop())
+        except Exception:
+            logger.exception(f'Failed to build profile {session.profile_id}')
+
+
+def run_profiled(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call `fn`, profiling the current thread if the calling request is profiled"""
+    session = _active_session.get()
+    if session is None:
+        return fn(*args, **kwargs)
+    with session.attach_thread():
+        return fn(*args, **kwargs)
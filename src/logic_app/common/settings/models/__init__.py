@@ -1,5 +1,15 @@
 from __future__ import annotations
 
+from .batch import BatchSettings
+from .deadline import DeadlineSettings
 from .draw import DrawSettings
+from .http_client import HttpClientSettings
+from .jobs import JobsSettings
+from .load_balancer import LoadBalancerSettings
+from .pipeline import PipelineSettings
+from .profiling import ProfilingSettings
+from .side_effects import SideEffectsSettings
+from .stream import StreamSettings
+from .tracing import TracingSettings
 from .writecsv import WriteCSVSettings
-__all__=['WriteCSVSettings', 'DrawSettings']
+__all__=['WriteCSVSettings', 'DrawSettings', 'HttpClientSettings', 'StreamSettings', 'TracingSettings', 'ProfilingSettings', 'DeadlineSettings', 'LoadBalancerSettings', 'BatchSettings', 'JobsSettings', 'PipelineSettings', 'SideEffectsSettings']
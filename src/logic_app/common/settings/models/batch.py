@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class BatchSettings(BaseModel):
+    concurrency: int = 8                      # số ảnh của /v1/height/batch chạy pipeline cùng lúc
+    max_images: int = 5000                    # số ảnh tối đa của 1 batch (kể cả ảnh trong file zip)
+    max_image_bytes: int = 16 * 1024 * 1024   # kích thước tối đa của 1 ảnh giải nén từ file zip
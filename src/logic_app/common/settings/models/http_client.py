@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class HttpClientSettings(BaseModel):
+    timeout: float = 30.0                 # tổng thời gian chờ cho 1 request (s)
+    connect_timeout: float = 5.0          # thời gian chờ mở kết nối (s)
+    max_connections_per_host: int = 20    # số kết nối tối đa tới mỗi host
+    max_keepalive_connections: int = 10   # số kết nối keep-alive giữ lại mỗi host
+    keepalive_expiry: float = 30.0        # thời gian giữ kết nối rảnh (s)
+    landmark_format: str = 'npy'          # định dạng landmarks gửi/nhận: npy hoặc json
+    image_transport: str = 'jpeg'         # gửi ảnh: jpeg (upload) hoặc shm (shared memory, chỉ khi chạy cùng máy)
+    max_retries: int = 3                  # số lần gửi lại khi model_deployed trả 503 (quá tải)
+    retry_backoff: float = 0.1            # thời gian chờ gốc trước lần gửi lại đầu tiên (s), nhân đôi mỗi lần
+    max_retry_backoff: float = 2.0        # thời gian chờ tối đa giữa 2 lần gửi (s)
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class JobsSettings(BaseModel):
+    enabled: bool = True                 # bật /v1/jobs và các worker chạy job
+    db_path: str = 'jobs/jobs.sqlite3'   # hàng đợi SQLite (WAL), giữ lại qua các lần khởi động lại
+    upload_dir: str = 'jobs/uploads'     # nơi lưu ảnh upload của job tới khi job chạy xong
+    input_root: str = 'resource'         # đường dẫn ảnh gửi lên phải nằm trong thư mục này
+    concurrency: int = 4                 # số ảnh của các job được đo cùng lúc
+    max_items: int = 100000              # số ảnh tối đa của 1 job
+    max_attempts: int = 3                # số lần thử tối đa của 1 ảnh trước khi đánh dấu failed
+    retry_backoff_s: float = 2.0         # chờ trước lần thử lại, nhân đôi sau mỗi lần lỗi
+    lease_s: float = 300.0               # ảnh đang chạy của worker đã chết được chạy lại sau thời gian này
+    poll_interval_s: float = 1.0         # chu kỳ worker rảnh kiểm tra lại hàng đợi
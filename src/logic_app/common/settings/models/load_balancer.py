@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class LoadBalancerSettings(BaseModel):
+    eject_after_failures: int = 3        # số lỗi liên tiếp (mất kết nối, 5xx) trước khi tạm loại 1 replica
+    eject_duration_s: float = 10.0       # thời gian loại replica, nhân đôi nếu lỗi tiếp sau khi quay lại
+    max_eject_duration_s: float = 120.0  # thời gian loại tối đa
+    hedge: bool = False                  # gửi thêm tới replica thứ 2 khi replica đầu trả lời chậm
+    hedge_quantile: float = 0.95         # trả lời chậm hơn phân vị này của độ trễ gần đây thì gửi thêm
+    hedge_min_delay_ms: float = 5.0      # độ trễ tối thiểu trước khi gửi thêm
+    hedge_min_samples: int = 20          # số mẫu độ trễ cần có trước khi bật hedge
+    latency_window: int = 256            # số mẫu độ trễ gần nhất giữ lại cho mỗi upstream
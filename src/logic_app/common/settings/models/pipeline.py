@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+from pydantic import field_validator
+
+PIPELINE_TRANSPORTS = ('http', 'inprocess')
+# serve: chỉ đo (detect -> calc -> predict), không đọc tên file, không ghi đĩa
+# collect: thêm vẽ ảnh kết quả và ghi CSV cho việc thu thập dữ liệu
+PIPELINE_PROFILES = ('serve', 'collect')
+
+
+class PipelineSettings(BaseModel):
+    # http: gọi model_deployed qua HTTP; inprocess: nạp các model của model_deployed
+    # vào chính process này (cài đặt 1 máy), cần mã nguồn, weights và thư viện của model_deployed
+    transport: str = 'http'
+    model_deployed_dir: str = '../model_deployed'   # mã nguồn model_deployed cho chế độ inprocess
+    # profile mặc định của /v1/height: serve (chỉ đo) hoặc collect (vẽ + ghi CSV, cần tên file dạng <pose>_..._<cm>.jpg)
+    profile: str = 'collect'
+
+    @field_validator('transport')
+    @classmethod
+    def check_transport(cls, value: str) -> str:
+        # sai chính tả không được âm thầm quay về http
+        if value not in PIPELINE_TRANSPORTS:
+            raise ValueError(f'Unknown pipeline transport {value}, expected one of {PIPELINE_TRANSPORTS}')
+        return value
+
+    @field_validator('profile')
+    @classmethod
+    def check_profile(cls, value: str) -> str:
+        # báo lỗi lúc khởi động thay vì ở mỗi request /v1/height
+        if value not in PIPELINE_PROFILES:
+            raise ValueError(f'Unknown pipeline profile {value}, expected one of {PIPELINE_PROFILES}')
+        return value
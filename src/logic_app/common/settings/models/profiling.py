@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class ProfilingSettings(BaseModel):
+    enabled: bool = False                # cho phép profile request (header X-Profile) và mở /debug/profiles
+    sample_rate: float = 0.0             # tỉ lệ request tự động được profile khi không có header
+    default_mode: str = 'cpu'            # cpu (sampler, speedscope JSON) hoặc cprofile (pstats)
+    sample_interval_ms: float = 5.0      # chu kỳ lấy mẫu stack của chế độ cpu
+    max_profiles: int = 32               # số profile gần nhất giữ trong bộ nhớ
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class SideEffectsSettings(BaseModel):
+    background: bool = False                 # vẽ + ghi CSV của profile collect chạy nền: /v1/height trả artifact_id thay cho out_path, client đọc /v1/artifacts/{id}
+    max_depth: int = 256                     # số ảnh tối đa chờ vẽ / ghi CSV trong bộ nhớ
+    overflow: str = 'block'                  # hàng đợi đầy: block (chờ chỗ trống), drop (bỏ qua), spill (ghi tạm ra đĩa)
+    spill_dir: str = 'side_effects/spill'    # nơi ghi tạm khi tràn, được ghi tiếp ở lần khởi động sau nếu còn
+    shutdown_timeout_s: float = 30.0         # thời gian tối đa chờ ghi hết hàng đợi khi tắt
+    max_artifacts: int = 10000               # số artifact gần nhất còn tra được qua /v1/artifacts/{id}
@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class StreamSettings(BaseModel):
+    max_frame_bytes: int = 4 * 1024 * 1024    # kích thước tối đa của 1 frame JPEG/PNG gửi qua WebSocket
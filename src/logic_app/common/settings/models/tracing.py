@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class TracingSettings(BaseModel):
+    enabled: bool = False                          # bật ghi span cho từng request
+    service_name: str = 'logic_app'                # tên process trên timeline
+    export_path: str = 'traces/logic_app.trace.json'
+    format: str = 'chrome'                         # chrome (Perfetto, chrome://tracing) hoặc jsonl
+    sample_ratio: float = 1.0                      # tỉ lệ trace mới được ghi (trace nhận từ client theo cờ sampled)
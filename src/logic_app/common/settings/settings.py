@@ -1,11 +1,27 @@
 from __future__ import annotations
 
+from typing import Annotated
+from typing import Any
+from typing import List
+
 from dotenv import find_dotenv
 from dotenv import load_dotenv
+from pydantic import field_validator
 from pydantic import HttpUrl
 from pydantic_settings import BaseSettings
+from pydantic_settings import NoDecode
 
+from .models import BatchSettings
+from .models import DeadlineSettings
 from .models import DrawSettings
+from .models import HttpClientSettings
+from .models import JobsSettings
+from .models import LoadBalancerSettings
+from .models import PipelineSettings
+from .models import ProfilingSettings
+from .models import SideEffectsSettings
+from .models import StreamSettings
+from .models import TracingSettings
 from .models import WriteCSVSettings
 
 # test in local
@@ -13,13 +29,34 @@ load_dotenv(find_dotenv('.env'), override=True)
 
 
 class Settings(BaseSettings):
-    host_box_detector: HttpUrl
-    host_pose_detector: HttpUrl
-    host_height_calculator: HttpUrl
-    host_height_predictor: HttpUrl
+    # 1 hoặc nhiều replica model_deployed, cách nhau bởi dấu phẩy
+    host_box_detector: Annotated[List[HttpUrl], NoDecode]
+    host_pose_detector: Annotated[List[HttpUrl], NoDecode]
+    host_height_calculator: Annotated[List[HttpUrl], NoDecode]
+    host_height_predictor: Annotated[List[HttpUrl], NoDecode]
 
     write_csv: WriteCSVSettings
     draw: DrawSettings
+    http_client: HttpClientSettings = HttpClientSettings()
+    stream: StreamSettings = StreamSettings()
+    tracing: TracingSettings = TracingSettings()
+    profiling: ProfilingSettings = ProfilingSettings()
+    deadline: DeadlineSettings = DeadlineSettings()
+    load_balancer: LoadBalancerSettings = LoadBalancerSettings()
+    batch: BatchSettings = BatchSettings()
+    jobs: JobsSettings = JobsSettings()
+    pipeline: PipelineSettings = PipelineSettings()
+    side_effects: SideEffectsSettings = SideEffectsSettings()
+
+    @field_validator(
+        'host_box_detector', 'host_pose_detector', 'host_height_calculator', 'host_height_predictor',
+        mode='before',
+    )
+    @classmethod
+    def split_hosts(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            return [host.strip() for host in value.split(',') if host.strip()]
+        return value
 
     class Config:
         env_nested_delimiter = '__'
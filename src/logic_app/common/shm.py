@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+# Ảnh đã decode gửi cho model_deployed chạy cùng máy: chỉ gửi handle thay vì JPEG
+SHM_NAME_HEADER = 'X-Shm-Name'
+SHM_SHAPE_HEADER = 'X-Shm-Shape'
+SHM_DTYPE_HEADER = 'X-Shm-Dtype'
+
+
+class SharedImage:
+    """Decoded image written once into a named shared-memory segment.
+
+    Used as an async context manager around the detector requests: the
+    segment is created on enter and unlinked on exit, so it only lives while
+    model_deployed may read it. `headers` carry the handle of the segment.
+
+    Args:
+        image (np.ndarray): BGR uint8 image
+    """
+
+    def __init__(self, image: np.ndarray) -> None:
+        self.image = image
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    @property
+    def headers(self) -> dict:
+        assert self._shm is not None, 'headers of a SharedImage outside its async with block'
+        return {
+            SHM_NAME_HEADER: self._shm.name,
+            SHM_SHAPE_HEADER: ','.join(str(dim) for dim in self.image.shape),
+            SHM_DTYPE_HEADER: str(self.image.dtype),
+        }
+
+    async def __aenter__(self) -> SharedImage:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, self.image.nbytes))
+        self._shm = shm
+        # copy vài chục MB ngoài event loop
+        await asyncio.to_thread(self._write, shm)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        assert self._shm is not None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def _write(self, shm: shared_memory.SharedMemory) -> None:
+        view = np.ndarray(self.image.shape, dtype=self.image.dtype, buffer=shm.buf)
+        view[...] = self.image
+        del view
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import io
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+
+import numpy as np
+
+# Định dạng nhị phân cho mảng landmarks (persons, 33, 4) float32
+NPY_MEDIA_TYPE = 'application/x-npy'
+NUM_LANDMARKS = 33
+# 11 landmark mà bộ tính chiều cao (model_deployed) thực sự dùng tới
+HEIGHT_LANDMARKS = [0, 9, 10, 11, 12, 23, 24, 25, 27, 29, 31]
+
+# Header đi kèm body npy (thay cho các trường JSON bên ngoài mảng)
+IMG_WIDTH_HEADER = 'X-Img-Width'
+IMG_HEIGHT_HEADER = 'X-Img-Height'
+LANDMARK_INDICES_HEADER = 'X-Landmark-Indices'
+
+
+def encode_npy(array: np.ndarray) -> bytes:
+    """Serialize an array to the `.npy` format"""
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def decode_npy(data: bytes) -> np.ndarray:
+    """Parse a `.npy` payload, object arrays are refused"""
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+def pack_landmark_dicts(pose_landmarks: Sequence[Sequence[dict]]) -> np.ndarray:
+    """`{'x', 'y', 'z', 'visibility'}` dicts of every person → float32 (persons, K, 4)"""
+    packed = np.array(
+        [
+            [
+                (lm['x'], lm['y'], lm['z'], lm.get('visibility') or 0.0)
+                for lm in landmarks
+            ] for landmarks in pose_landmarks
+        ],
+        dtype=np.float32,
+    )
+    if packed.size == 0:
+        return np.empty((0, NUM_LANDMARKS, 4), dtype=np.float32)
+    return packed
+
+
+def landmarks_to_dicts(landmarks: np.ndarray) -> List[List[dict]]:
+    """Inverse of `pack_landmark_dicts`"""
+    return [
+        [
+            {'x': x, 'y': y, 'z': z, 'visibility': visibility}
+            for x, y, z, visibility in person
+        ] for person in landmarks.tolist()
+    ]
+
+
+def parse_landmark_indices(value: Optional[str]) -> Optional[List[int]]:
+    """Parse a comma separated landmark-index subset such as `0,9,10`
+
+    Returns:
+        Optional[List[int]]: sorted unique indices, None when no subset is given
+
+    Raises:
+        ValueError: if an index is not an integer in [0, NUM_LANDMARKS)
+    """
+    if not value:
+        return None
+    indices = sorted({int(index) for index in value.split(',') if index.strip()})
+    if not indices or indices[0] < 0 or indices[-1] >= NUM_LANDMARKS:
+        raise ValueError(f'Invalid landmark indices: {value}')
+    return indices
+
+
+def format_landmark_indices(indices: Iterable[int]) -> str:
+    return ','.join(str(index) for index in indices)
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-from io import BytesIO
+import asyncio
+from typing import Optional
 
 import cv2
 import numpy as np
-import requests  # type: ignore
+from common.bases import AsyncBaseService
 from common.bases import BaseModel
-from common.bases import BaseService
+from common.profiling import run_profiled
 from common.settings import Settings
+from common.shm import SharedImage
+from infrastructure.http_client import get_http_client
+from infrastructure.http_client import get_replica_set
 
 
 class BoxDetectorInput(BaseModel):
     image: np.ndarray
+    # Ảnh đã ghi sẵn vào shared memory (model_deployed chạy cùng máy)
+    shared_image: Optional[SharedImage] = None
 
 
 class BoxDectorOutput(BaseModel):
@@ -20,20 +26,26 @@ class BoxDectorOutput(BaseModel):
     pixel_per_cm: float
 
 
-class BoxDetector(BaseService):
+class BoxDetector(AsyncBaseService):
     settings: Settings
 
-    def process(self, inputs: BoxDetectorInput) -> BoxDectorOutput:
-        _, buffer = cv2.imencode('.jpg', inputs.image)
-        file_bytes = BytesIO(buffer.tobytes())
-        file_bytes.name = 'image.jpg'
-        files = {'file': (file_bytes.name, file_bytes, 'image/jpeg')}
-        response = requests.post(
-            str(self.settings.host_box_detector), files=files,
-        )
-
+    async def process(self, inputs: BoxDetectorInput) -> BoxDectorOutput:
+        if inputs.shared_image is not None:
+            # chỉ gửi handle, model_deployed đọc thẳng ảnh trong shared memory
+            response = await get_http_client().post_balanced(
+                get_replica_set('box_detector'), headers=inputs.shared_image.headers,
+            )
+        else:
+            # encode JPEG ngoài event loop để không chặn các request khác
+            _, buffer = await asyncio.to_thread(run_profiled, cv2.imencode, '.jpg', inputs.image)
+            files = {'file': ('image.jpg', buffer.tobytes(), 'image/jpeg')}
+            response = await get_http_client().post_balanced(
+                get_replica_set('box_detector'), files=files,
+            )
+
+        info = response.json()['info']
         return BoxDectorOutput(
-            bboxes=response.json()['info']['bboxes'],
-            scores=response.json()['info']['scores'],
-            pixel_per_cm=response.json()['info']['pixel_per_cm'],
+            bboxes=info['bboxes'],
+            scores=info['scores'],
+            pixel_per_cm=info['pixel_per_cm'],
         )
@@ -1,22 +1,33 @@
 from __future__ import annotations
 
+from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Union
 
-import requests  # type: ignore
+import numpy as np
+from common.bases import AsyncBaseService
 from common.bases import BaseModel
-from common.bases import BaseService
 from common.logs import get_logger
 from common.settings import Settings
+from common.wire import encode_npy
+from common.wire import format_landmark_indices
+from common.wire import landmarks_to_dicts
+from common.wire import NPY_MEDIA_TYPE
+from infrastructure.http_client import get_http_client
+from infrastructure.http_client import get_replica_set
 
 # from typing import Any
 logger = get_logger(__name__)
 
 
 class HeightCalInput(BaseModel):
-    landmarks: List[List[dict]]
+    # Mảng landmarks (số người, số điểm, 4) lấy từ PoseDetectorOutput
+    landmarks: np.ndarray
     img_width: float
     img_height: float
     px_per_cm: float
+    landmark_indices: Optional[List[int]] = None
 
 
 class HeightCalOutput(BaseModel):
@@ -27,24 +38,42 @@ class HeightCalOutput(BaseModel):
     diffs: List[float]
 
 
-class HeightCal(BaseService):
+class HeightCal(AsyncBaseService):
     settings: Settings
 
-    def process(self, inputs: HeightCalInput) -> HeightCalOutput:
-        payload = {
-            'landmarks': inputs.landmarks,
-            'img_width': inputs.img_width,
-            'img_height': inputs.img_height,
-            'px_per_cm': inputs.px_per_cm,
-        }
-        response = requests.post(
-            str(self.settings.host_height_calculator), json=payload,
-        )
+    async def process(self, inputs: HeightCalInput) -> HeightCalOutput:
+        if self.settings.http_client.landmark_format == 'npy':
+            # Body là mảng nhị phân, các tham số còn lại đi qua query string
+            params: Dict[str, Union[int, float, str]] = {
+                'img_width': inputs.img_width,
+                'img_height': inputs.img_height,
+                'px_per_cm': inputs.px_per_cm,
+            }
+            if inputs.landmark_indices is not None:
+                params['landmarks'] = format_landmark_indices(inputs.landmark_indices)
+            response = await get_http_client().post_balanced(
+                get_replica_set('height_calculator'),
+                content=encode_npy(inputs.landmarks),
+                params=params,
+                headers={'Content-Type': NPY_MEDIA_TYPE},
+            )
+        else:
+            payload = {
+                'landmarks': landmarks_to_dicts(inputs.landmarks),
+                'img_width': inputs.img_width,
+                'img_height': inputs.img_height,
+                'px_per_cm': inputs.px_per_cm,
+                'landmark_indices': inputs.landmark_indices,
+            }
+            response = await get_http_client().post_balanced(
+                get_replica_set('height_calculator'), json=payload,
+            )
 
+        info = response.json()['info']
         return HeightCalOutput(
-            heights=response.json()['info']['heights'],
-            distances=response.json()['info']['distances'],
-            cm_direct=response.json()['info']['cm_direct'],
-            cm_sum=response.json()['info']['cm_sum'],
-            diffs=response.json()['info']['diffs'],
+            heights=info['heights'],
+            distances=info['distances'],
+            cm_direct=info['cm_direct'],
+            cm_sum=info['cm_sum'],
+            diffs=info['diffs'],
         )
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 from typing import List
 
-import requests  # type: ignore
+from common.bases import AsyncBaseService
 from common.bases import BaseModel
-from common.bases import BaseService
 from common.logs import get_logger
 from common.settings import Settings
+from infrastructure.http_client import get_http_client
+from infrastructure.http_client import get_replica_set
 
 # from typing import Any
 logger = get_logger(__name__)
@@ -20,15 +21,15 @@ class HeightPredOutput(BaseModel):
     pred: List[float]
 
 
-class HeightPred(BaseService):
+class HeightPred(AsyncBaseService):
     settings: Settings
 
-    def process(self, inputs: HeightPredInput) -> HeightPredOutput:
+    async def process(self, inputs: HeightPredInput) -> HeightPredOutput:
         payload = {
             'x': inputs.x,
         }
-        response = requests.post(
-            str(self.settings.host_height_predictor), json=payload,
+        response = await get_http_client().post_balanced(
+            get_replica_set('height_predictor'), json=payload,
         )
 
         return HeightPredOutput(
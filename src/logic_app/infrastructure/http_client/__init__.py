@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from .balancer import get_replica_set
+from .balancer import ReplicaSet
+from .http_client import get_http_client
+from .http_client import HttpClientPool
+
+__all__ = ['HttpClientPool', 'get_http_client', 'ReplicaSet', 'get_replica_set']
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import math
+import random
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from common.logs import get_logger
+from common.metrics import REPLICA_EJECTIONS
+from common.settings.models import LoadBalancerSettings
+from common.utils import get_settings
+
+logger = get_logger(__name__)
+
+
+class Replica:
+    """One model_deployed instance serving an upstream"""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.outstanding = 0
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+
+class ReplicaSet:
+    """Replicas of one upstream, picked by least outstanding requests.
+
+    Health is checked passively: a replica failing `eject_after_failures`
+    calls in a row (connection error, timeout, 502) is ejected for
+    `eject_duration_s`, doubled on every ejection that follows without a
+    success in between. When every replica is ejected the least recently
+    ejected ones are used anyway rather than failing the request.
+
+    The latencies of the last successful calls give the hedge delay: a
+    call slower than their `hedge_quantile` is sent to a second replica.
+
+    Args:
+        name (str): name of the upstream (box_detector, pose_detector, ...)
+        urls (Iterable[str]): endpoint of the upstream on every replica
+        settings (LoadBalancerSettings): ejection and hedging settings
+    """
+
+    def __init__(self, name: str, urls: Iterable[str], settings: LoadBalancerSettings) -> None:
+        self.name = name
+        self.replicas = [Replica(url) for url in urls]
+        if not self.replicas:
+            raise ValueError(f'No replica configured for {name}')
+        self.settings = settings
+        self._latencies: deque = deque(maxlen=max(1, settings.latency_window))
+
+    def __len__(self) -> int:
+        return len(self.replicas)
+
+    def pick(self, exclude: Iterable[Replica] = ()) -> Optional[Replica]:
+        """Replica with the fewest requests in flight, ties broken at random;
+        None if every replica is excluded"""
+        excluded = set(map(id, exclude))
+        candidates = [replica for replica in self.replicas if id(replica) not in excluded]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        healthy = [replica for replica in candidates if replica.available(now)]
+        if not healthy:
+            # tất cả đều bị loại: vẫn gửi tới replica sắp được nhận lại sớm nhất
+            soonest = min(replica.ejected_until for replica in candidates)
+            healthy = [replica for replica in candidates if replica.ejected_until == soonest]
+        fewest = min(replica.outstanding for replica in healthy)
+        return random.choice([replica for replica in healthy if replica.outstanding == fewest])
+
+    def record_success(self, replica: Replica, latency_s: float) -> None:
+        replica.failures = 0
+        replica.ejections = 0
+        self._latencies.append(latency_s)
+
+    def record_failure(self, replica: Replica) -> None:
+        replica.failures += 1
+        if replica.failures < self.settings.eject_after_failures:
+            return
+        duration = min(
+            self.settings.eject_duration_s * 2 ** replica.ejections,
+            self.settings.max_eject_duration_s,
+        )
+        replica.failures = 0
+        replica.ejections += 1
+        replica.ejected_until = time.monotonic() + duration
+        REPLICA_EJECTIONS.labels(upstream=self.name, replica=replica.url).inc()
+        logger.warning(f'Eject {replica.url} from {self.name} for {duration:.1f}s')
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait for the first replica before asking a second one,
+        None when hedging is off or there is too little history"""
+        if not self.settings.hedge or len(self.replicas) < 2:
+            return None
+        if len(self._latencies) < max(1, self.settings.hedge_min_samples):
+            return None
+        latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, math.ceil(self.settings.hedge_quantile * len(latencies)) - 1)
+        return max(latencies[max(0, index)], self.settings.hedge_min_delay_ms / 1000)
+
+    def urls(self) -> List[str]:
+        return [replica.url for replica in self.replicas]
+
+
+@lru_cache
+def get_replica_set(name: str) -> ReplicaSet:
+    """Return the shared replicas of an upstream
+
+    Args:
+        name (str): upstream configured by `host_<name>` (box_detector,
+            pose_detector, height_calculator, height_predictor)
+    """
+    settings = get_settings()
+    replicas = ReplicaSet(
+        name=name,
+        urls=[str(url) for url in getattr(settings, f'host_{name}')],
+        settings=settings.load_balancer,
+    )
+    logger.info(f'Upstream {name} served by {len(replicas)} replica(s)', extra={'urls': replicas.urls()})
+    return replicas
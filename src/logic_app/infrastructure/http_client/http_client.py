@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from functools import lru_cache
+from typing import Any
+from typing import Optional
+
+import httpx
+from asgi_correlation_id.context import correlation_id
+from common.deadline import check_deadline
+from common.deadline import deadline_headers
+from common.deadline import DeadlineExceeded
+from common.deadline import expired
+from common.deadline import get_deadline
+from common.deadline import remaining
+from common.logs import get_logger
+from common.metrics import HEDGED_REQUESTS
+from common.settings.models import HttpClientSettings
+from common.tracing import inject_headers
+from common.tracing import span
+from common.utils import get_settings
+
+from .balancer import Replica
+from .balancer import ReplicaSet
+
+logger = get_logger(__name__)
+
+
+class HttpClientPool:
+    """Long-lived pool of `httpx.AsyncClient`, one client per upstream host.
+
+    Each host gets its own connection pool so that `max_connections_per_host`
+    really bounds the number of sockets opened to one model_deployed instance,
+    and keep-alive connections are reused across requests.
+    """
+
+    def __init__(self, settings: HttpClientSettings) -> None:
+        self.settings = settings
+        self._clients: dict[tuple[str, str, int | None], httpx.AsyncClient] = {}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                self.settings.timeout,
+                connect=self.settings.connect_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=self.settings.max_connections_per_host,
+                max_keepalive_connections=self.settings.max_keepalive_connections,
+                keepalive_expiry=self.settings.keepalive_expiry,
+            ),
+        )
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """Return the shared client of the host serving `url`
+
+        Args:
+            url (str): full url of the request
+
+        Returns:
+            httpx.AsyncClient: client bound to the host of `url`
+        """
+        parsed = httpx.URL(url)
+        key = (parsed.scheme, parsed.host, parsed.port)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._build_client()
+            self._clients[key] = client
+        return client
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a POST request through the pooled client and raise on HTTP errors
+
+        The request id, the trace context and the deadline of the current
+        request are forwarded so model_deployed logs and spans join the same
+        request and it stops working on it once the deadline has passed. Each
+        attempt waits at most until the deadline; `DeadlineExceeded` is raised
+        when the budget runs out.
+        """
+        with span(f'POST {httpx.URL(url).path}', url=url) as client_span:
+            headers = deadline_headers(inject_headers(kwargs.pop('headers', None)))
+            request_id = correlation_id.get()
+            if request_id is not None:
+                headers.setdefault('X-Request-ID', request_id)
+
+            attempt = 0
+            while True:
+                check_deadline(f'POST {url}')
+                try:
+                    response = await self.get_client(url).post(
+                        url, headers=headers, timeout=self.request_timeout(), **kwargs,
+                    )
+                except httpx.TimeoutException as e:
+                    if expired():
+                        raise DeadlineExceeded(f'Deadline exceeded while waiting for {url}') from e
+                    raise
+                if response.status_code == httpx.codes.GATEWAY_TIMEOUT and get_deadline() is not None:
+                    raise DeadlineExceeded(f'{url} gave up on the request deadline')
+                if response.status_code != httpx.codes.SERVICE_UNAVAILABLE or attempt >= self.settings.max_retries:
+                    break
+                # model_deployed quá tải và đã từ chối request: chờ rồi gửi lại
+                delay = self.retry_delay(attempt, response.headers.get('Retry-After'))
+                budget = remaining()
+                if budget is not None and delay >= budget:
+                    # không kịp gửi lại trước deadline: trả luôn lỗi quá tải
+                    break
+                logger.warning(
+                    f'{url} is overloaded, retry {attempt + 1}/{self.settings.max_retries} in {delay:.3f}s',
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+            if client_span is not None:
+                client_span.set_attribute('status', response.status_code)
+                client_span.set_attribute('retries', attempt)
+            response.raise_for_status()
+            return response
+
+    async def post_balanced(self, replicas: ReplicaSet, **kwargs: Any) -> httpx.Response:
+        """Send a POST request to the least loaded replica of an upstream
+
+        The request is sent again to another replica when the first one
+        cannot be reached, or, with hedging on, when it has not answered
+        after the hedge delay; the first successful answer wins and the other
+        call is cancelled. Model calls have no side effect, so running one
+        twice only costs compute.
+        """
+        used: list[Replica] = []
+        tasks: set[asyncio.Task] = set()
+        error: Optional[BaseException] = None
+
+        def send(replica: Replica) -> None:
+            used.append(replica)
+            tasks.add(asyncio.create_task(self._post_replica(replicas, replica, kwargs)))
+
+        first = replicas.pick()
+        if first is None:
+            # ReplicaSet không bao giờ rỗng: chỉ để chặn lỗi cấu hình
+            raise RuntimeError(f'No replica to send the {replicas.name} request to')
+        send(first)
+        hedge_delay = replicas.hedge_delay()
+        try:
+            while tasks:
+                can_hedge = len(used) == 1
+                done, _ = await asyncio.wait(
+                    tasks,
+                    timeout=hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+
+                if not can_hedge:
+                    continue
+                if done and not isinstance(error, httpx.TransportError):
+                    # lỗi của chính request (4xx, 500, deadline): replica khác cũng sẽ lỗi như vậy
+                    break
+                replica = replicas.pick(exclude=used)
+                if replica is None:
+                    hedge_delay = None
+                    continue
+                if not done:
+                    HEDGED_REQUESTS.labels(upstream=replicas.name).inc()
+                    logger.info(f'{used[0].url} is slow, hedge request to {replica.url}')
+                send(replica)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if error is None:
+            raise RuntimeError(f'No replica of {replicas.name} answered the request')
+        raise error
+
+    async def _post_replica(self, replicas: ReplicaSet, replica: Replica, kwargs: dict) -> httpx.Response:
+        replica.outstanding += 1
+        start_time = time.perf_counter()
+        try:
+            response = await self.post(replica.url, **kwargs)
+        except httpx.TransportError:
+            replicas.record_failure(replica)
+            raise
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == httpx.codes.BAD_GATEWAY:
+                replicas.record_failure(replica)
+            raise
+        finally:
+            replica.outstanding -= 1
+        replicas.record_success(replica, time.perf_counter() - start_time)
+        return response
+
+    def request_timeout(self) -> httpx.Timeout:
+        """Timeout of one attempt, shortened to the remaining budget of the request"""
+        timeout, connect_timeout = self.settings.timeout, self.settings.connect_timeout
+        budget = remaining()
+        if budget is not None:
+            budget = max(budget, 0.001)
+            timeout, connect_timeout = min(timeout, budget), min(connect_timeout, budget)
+        return httpx.Timeout(timeout, connect=connect_timeout)
+
+    def retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Wait before retrying a shed request: exponential backoff, at least
+        the server's `Retry-After`, capped and jittered so that the clients shed
+        together do not come back together"""
+        delay = self.settings.retry_backoff * 2 ** attempt
+        if retry_after is not None:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0.5, 1.0) * min(delay, self.settings.max_retry_backoff)
+
+    async def aclose(self) -> None:
+        """Close every pooled client, called on application shutdown"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        logger.info('HTTP client pool closed.')
+
+
+@lru_cache
+def get_http_client() -> HttpClientPool:
+    return HttpClientPool(settings=get_settings().http_client)
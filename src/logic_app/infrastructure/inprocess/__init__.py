@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from .clients import InProcessBoxDetector
+from .clients import InProcessHeightCal
+from .clients import InProcessHeightPred
+from .clients import InProcessPoseDetector
+from .model_deployed import get_inprocess_models
+from .model_deployed import InProcessModels
+
+__all__ = [
+    'InProcessBoxDetector', 'InProcessPoseDetector', 'InProcessHeightCal', 'InProcessHeightPred',
+    'InProcessModels', 'get_inprocess_models',
+]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from infrastructure.box_detector import BoxDectorOutput
+from infrastructure.box_detector import BoxDetector
+from infrastructure.box_detector import BoxDetectorInput
+from infrastructure.height_calculator import HeightCal
+from infrastructure.height_calculator import HeightCalInput
+from infrastructure.height_calculator import HeightCalOutput
+from infrastructure.height_predictor import HeightPred
+from infrastructure.height_predictor import HeightPredInput
+from infrastructure.height_predictor import HeightPredOutput
+from infrastructure.pose_detector import PoseDetector
+from infrastructure.pose_detector import PoseDetectorInput
+from infrastructure.pose_detector import PoseDetectorOutput
+
+from .model_deployed import get_inprocess_models
+
+
+class InProcessBoxDetector(BoxDetector):
+    """`BoxDetector` calling the box detector of model_deployed in this process"""
+
+    async def process(self, inputs: BoxDetectorInput) -> BoxDectorOutput:
+        models = get_inprocess_models()
+        with models.request_deadline():
+            output = await models.container.box_detector.process(
+                inputs=models.BoxDetectorModelInput(img=inputs.image),
+            )
+        return BoxDectorOutput(
+            bboxes=output.bboxes.tolist(),
+            scores=output.scores.tolist(),
+            pixel_per_cm=output.pixel_per_cm,
+        )
+
+
+class InProcessPoseDetector(PoseDetector):
+    """`PoseDetector` calling the pose detector of model_deployed in this process"""
+
+    async def process(self, inputs: PoseDetectorInput) -> PoseDetectorOutput:
+        models = get_inprocess_models()
+        with models.request_deadline():
+            output = await models.container.pose_detector.process(
+                inputs=models.PoseDetectorModelInput(
+                    img=inputs.img_origin, landmark_indices=inputs.landmark_indices,
+                ),
+            )
+        # mảng landmarks được dùng thẳng, không đóng gói npy / JSON
+        return PoseDetectorOutput(
+            landmarks=output.landmarks,
+            img_width=output.img_width,
+            img_height=output.img_height,
+            landmark_indices=output.landmark_indices,
+        )
+
+
+class InProcessHeightCal(HeightCal):
+    """`HeightCal` calling the height calculator of model_deployed in this process"""
+
+    async def process(self, inputs: HeightCalInput) -> HeightCalOutput:
+        if len(inputs.landmarks) == 0:
+            raise ValueError('Invalid or missing landmarks.')
+        if inputs.px_per_cm <= 0:
+            raise ValueError('Pixels per centimeter must be greater than zero.')
+
+        models = get_inprocess_models()
+        landmarks = inputs.landmarks
+        if inputs.landmark_indices is not None:
+            landmarks = models.expand_landmarks(landmarks, inputs.landmark_indices)
+        with models.request_deadline():
+            output = await models.container.height_cal.process(
+                inputs=models.CalHeightInput(
+                    landmarks=landmarks,
+                    img_width=inputs.img_width,
+                    img_height=inputs.img_height,
+                    px_per_cm=inputs.px_per_cm,
+                ),
+            )
+        if not output.heights:
+            raise ValueError('Height calculation returned no results.')
+        return HeightCalOutput(
+            heights=output.heights,
+            distances=output.distances,
+            cm_direct=output.cm_direct,
+            cm_sum=output.cm_sum,
+            diffs=output.diffs,
+        )
+
+
+class InProcessHeightPred(HeightPred):
+    """`HeightPred` calling the height predictor of model_deployed in this process"""
+
+    async def process(self, inputs: HeightPredInput) -> HeightPredOutput:
+        models = get_inprocess_models()
+        with models.request_deadline():
+            output = await models.get_executor('height_predictor').run(
+                models.container.height_predictor.predict,
+                models.HeightPredictorModelInput(x=inputs.x),
+            )
+        return HeightPredOutput(pred=output.pred)
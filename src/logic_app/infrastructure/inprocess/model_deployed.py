@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+
+from common.deadline import get_deadline
+from common.logs import get_logger
+from common.utils import get_settings
+
+logger = get_logger(__name__)
+
+# gói top-level có ở cả logic_app lẫn model_deployed
+SHARED_PACKAGES = ('apis', 'app', 'common', 'infrastructure', 'service')
+LOGIC_APP_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _is_logic_app_module(name: str) -> bool:
+    path = LOGIC_APP_ROOT.joinpath(*name.split('.'))
+    return path.with_suffix('.py').exists() or (path / '__init__.py').exists()
+
+
+@contextmanager
+def model_deployed_imports(root: Path) -> Iterator[None]:
+    """Import the modules of model_deployed under their own names.
+
+    Both apps use the same top-level packages (`common`, `infrastructure`,
+    ...): the logic_app modules are set aside while model_deployed is
+    imported, then put back. model_deployed modules whose name is free in
+    logic_app stay registered, so their lazy relative imports keep working;
+    the others are only reachable through the objects already imported.
+    """
+    saved = {name: module for name, module in sys.modules.items() if name.split('.')[0] in SHARED_PACKAGES}
+    for name in saved:
+        del sys.modules[name]
+    sys.path.insert(0, str(root))
+    try:
+        yield
+    finally:
+        sys.path.remove(str(root))
+        for name in [name for name in sys.modules if name.split('.')[0] in SHARED_PACKAGES]:
+            if name in saved or _is_logic_app_module(name):
+                del sys.modules[name]
+        sys.modules.update(saved)
+
+
+class InProcessModels:
+    """The models of model_deployed, loaded in the logic_app process.
+
+    Holds the model container of model_deployed (with its inference
+    executors and micro-batcher) and the input types of its models, so the
+    in-process clients can call them with arrays instead of HTTP requests.
+    Relative model paths of the model_deployed settings are resolved from
+    `root`, as if model_deployed ran from its own folder.
+
+    Args:
+        root (Path): source folder of model_deployed
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root.resolve()
+        if not (self.root / 'app' / 'model_container.py').exists():
+            raise ValueError(f'{root} is not the model_deployed source folder')
+
+        with model_deployed_imports(self.root):
+            # các module dưới đây là của model_deployed; mypy đọc chúng theo gói cùng tên của logic_app
+            from app.model_container import ModelContainer
+            from common import deadline
+            from common.executor import get_executor
+            from common.executor import shutdown_executors
+            from common.metrics import setup_metrics  # type: ignore[attr-defined]
+            from common.tracing import shutdown_tracing
+            from common.utils import get_settings as get_model_settings
+            from infrastructure.box_detector import BoxDetectorModelInput  # type: ignore[attr-defined]
+            from infrastructure.calculate import CalHeightInput
+            from infrastructure.calculate.geometry import expand_landmarks
+            from infrastructure.height_predictor import HeightPredictorModelInput  # type: ignore[attr-defined]
+            from infrastructure.pose_detector import PoseDetectorModelInput  # type: ignore[attr-defined]
+
+            self.settings = get_model_settings()
+            self._resolve_paths()
+            # tạo model ngay lúc này: CalHeight, HeightPredictor và backend onnx import trễ module con
+            self.container = ModelContainer(settings=self.settings)
+            if self.settings.box_detector.backend == 'onnx':
+                self.container.box_detector.onnx_model
+
+        self.deadline = deadline
+        self.get_executor = get_executor
+        self.setup_metrics = setup_metrics
+        self.shutdown_executors = shutdown_executors
+        self.shutdown_tracing = shutdown_tracing
+        self.expand_landmarks = expand_landmarks
+        self.BoxDetectorModelInput = BoxDetectorModelInput
+        self.PoseDetectorModelInput = PoseDetectorModelInput
+        self.CalHeightInput = CalHeightInput
+        self.HeightPredictorModelInput = HeightPredictorModelInput
+
+    def _resolve_paths(self) -> None:
+        for section in self.settings.model_dump():
+            section_settings = getattr(self.settings, section)
+            if not hasattr(section_settings, 'model_fields'):
+                continue
+            for field in section_settings.model_fields:
+                value = getattr(section_settings, field)
+                if 'path' in field and isinstance(value, str) and value and not Path(value).is_absolute():
+                    if (self.root / value).exists():
+                        setattr(section_settings, field, str(self.root / value))
+
+    async def start(self) -> None:
+        """Load and warm up the models like model_deployed does at startup"""
+        self.setup_metrics()
+        if self.settings.startup.preload:
+            await self.container.start()
+
+    def stop(self) -> None:
+        """Close the video sessions and stop the inference threads, as model_deployed does on shutdown"""
+        self.container.pose_detector.sessions.close_all()
+        self.shutdown_executors()
+        self.shutdown_tracing()
+
+    @contextmanager
+    def request_deadline(self) -> Iterator[None]:
+        """Give the deadline of the current logic_app request to model_deployed,
+        which reads it from its own context variable"""
+        token = self.deadline.set_deadline(get_deadline())
+        try:
+            yield
+        finally:
+            self.deadline.reset_deadline(token)
+
+
+@lru_cache
+def get_inprocess_models() -> InProcessModels:
+    root = Path(get_settings().pipeline.model_deployed_dir)
+    logger.info(f'Loading the models of {root} in process')
+    return InProcessModels(root)
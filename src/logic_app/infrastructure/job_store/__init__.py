@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from .job_store import get_job_store
+from .job_store import ITEM_STATUSES
+from .job_store import JobItem
+from .job_store import JobStore
+from .job_store import JobSummary
+
+__all__ = ['JobStore', 'JobItem', 'JobSummary', 'get_job_store', 'ITEM_STATUSES']
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from uuid import uuid4
+
+from common.bases import BaseModel
+from common.logs import get_logger
+from common.utils import get_settings
+
+logger = get_logger(__name__)
+
+# pending -> running -> done | failed; running -> pending khi lỗi tạm thời hoặc worker dừng
+ITEM_STATUSES = ('pending', 'running', 'done', 'failed')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL REFERENCES jobs (job_id),
+    idx INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    leased_until REAL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status, next_attempt_at);
+'''
+
+
+class JobItem(BaseModel):
+    job_id: str
+    index: int
+    mode: str
+    source: str
+    file_name: str
+    status: str
+    attempts: int
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class JobSummary(BaseModel):
+    job_id: str
+    mode: str
+    created_at: float
+    total: int
+    pending: int = 0
+    running: int = 0
+    done: int = 0
+    failed: int = 0
+
+    @property
+    def status(self) -> str:
+        if self.pending + self.running == 0:
+            return 'completed'
+        return 'running' if self.running or self.done or self.failed else 'pending'
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**self.model_dump(), 'status': self.status}
+
+
+class JobStore:
+    """Durable queue of measurement jobs in a SQLite database (WAL mode).
+
+    A job is a list of items, one image each. Workers `claim` the oldest
+    runnable item, which leases it for `lease_s` seconds: an item whose
+    worker died is claimed again once its lease expires, so a crash never
+    loses work. Claims run in an immediate transaction, so several
+    processes can share the same database.
+
+    Args:
+        path (str): database file, created with its folder if missing
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # autocommit: các transaction được mở tường minh bằng BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def create_job(self, mode: str, items: List[Tuple[str, str]], job_id: Optional[str] = None) -> str:
+        """Queue a job of `(source path, file name)` items, return its id"""
+        job_id = job_id or uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT INTO jobs (job_id, mode, total, created_at) VALUES (?, ?, ?, ?)',
+                (job_id, mode, len(items), now),
+            )
+            conn.executemany(
+                'INSERT INTO job_items (job_id, idx, source, file_name, updated_at) VALUES (?, ?, ?, ?, ?)',
+                [(job_id, index, source, file_name, now) for index, (source, file_name) in enumerate(items)],
+            )
+        return job_id
+
+    def claim(self, lease_s: float) -> Optional[JobItem]:
+        """Lease the oldest runnable item: pending and due, or running with an expired lease"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                '''
+                SELECT rowid FROM job_items
+                WHERE (status = 'pending' AND next_attempt_at <= ?) OR (status = 'running' AND leased_until < ?)
+                ORDER BY rowid LIMIT 1
+                ''',
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                '''
+                UPDATE job_items SET status = 'running', attempts = attempts + 1, leased_until = ?, updated_at = ?
+                WHERE rowid = ?
+                ''',
+                (now + lease_s, now, row['rowid']),
+            )
+            row = conn.execute(
+                '''
+                SELECT job_items.*, jobs.mode FROM job_items JOIN jobs USING (job_id)
+                WHERE job_items.rowid = ?
+                ''',
+                (row['rowid'],),
+            ).fetchone()
+        return self._item(row)
+
+    def complete(self, job_id: str, index: int, result: dict[str, Any]) -> None:
+        self._finish(job_id, index, "status = 'done', result = ?, error = NULL", (json.dumps(result),))
+
+    def fail(self, job_id: str, index: int, error: str, retry_at: Optional[float] = None) -> None:
+        """Record a failed attempt: retried from `retry_at`, failed for good if None"""
+        if retry_at is None:
+            self._finish(job_id, index, "status = 'failed', error = ?", (error,))
+        else:
+            self._finish(job_id, index, "status = 'pending', error = ?, next_attempt_at = ?", (error, retry_at))
+
+    def release(self, job_id: str, index: int) -> None:
+        """Give a running item back to the queue without counting the attempt (worker stopping)"""
+        self._finish(job_id, index, "status = 'pending', attempts = MAX(attempts - 1, 0)", ())
+
+    def _finish(self, job_id: str, index: int, assignments: str, params: tuple) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                f'UPDATE job_items SET {assignments}, leased_until = NULL, updated_at = ? '
+                "WHERE job_id = ? AND idx = ? AND status = 'running'",
+                (*params, time.time(), job_id, index),
+            )
+
+    def get_job(self, job_id: str) -> Optional[JobSummary]:
+        with self._lock:
+            job = self._conn.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if job is None:
+                return None
+            counts = self._conn.execute(
+                'SELECT status, COUNT(*) AS count FROM job_items WHERE job_id = ? GROUP BY status',
+                (job_id,),
+            ).fetchall()
+        return JobSummary(**dict(job), **{row['status']: row['count'] for row in counts})
+
+    def results(
+        self, job_id: str, offset: int = 0, limit: int = 1000, status: Optional[str] = None,
+    ) -> List[JobItem]:
+        """Items of a job in submission order, optionally only those with `status`"""
+        query = '''
+            SELECT job_items.*, jobs.mode FROM job_items JOIN jobs USING (job_id)
+            WHERE job_id = ?
+        '''
+        params: list[Any] = [job_id]
+        if status is not None:
+            query += ' AND status = ?'
+            params.append(status)
+        query += ' ORDER BY idx LIMIT ? OFFSET ?'
+        params += [limit, offset]
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._item(row) for row in rows]
+
+    @staticmethod
+    def _item(row: sqlite3.Row) -> JobItem:
+        return JobItem(
+            job_id=row['job_id'],
+            index=row['idx'],
+            mode=row['mode'],
+            source=row['source'],
+            file_name=row['file_name'],
+            status=row['status'],
+            attempts=row['attempts'],
+            result=json.loads(row['result']) if row['result'] else None,
+            error=row['error'],
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@lru_cache
+def get_job_store() -> JobStore:
+    settings = get_settings().jobs
+    logger.info(f'Job store at {settings.db_path}')
+    return JobStore(settings.db_path)
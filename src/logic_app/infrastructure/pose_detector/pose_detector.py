@@ -1,42 +1,86 @@
 from __future__ import annotations
 
-from io import BytesIO
+import asyncio
+from typing import Optional
 
 import cv2
 import numpy as np
-import requests  # type: ignore
+from common.bases import AsyncBaseService
 from common.bases import BaseModel
-from common.bases import BaseService
+from common.profiling import run_profiled
 from common.settings import Settings
-
-# from io import BytesIO
-# import cv2
+from common.shm import SharedImage
+from common.wire import decode_npy
+from common.wire import format_landmark_indices
+from common.wire import IMG_HEIGHT_HEADER
+from common.wire import IMG_WIDTH_HEADER
+from common.wire import landmarks_to_dicts
+from common.wire import NPY_MEDIA_TYPE
+from common.wire import pack_landmark_dicts
+from infrastructure.http_client import get_http_client
+from infrastructure.http_client import get_replica_set
 
 
 class PoseDetectorInput(BaseModel):
     img_origin: np.ndarray
+    # Chỉ lấy một phần landmark (vd. HEIGHT_LANDMARKS), None = đủ 33 điểm
+    landmark_indices: Optional[list[int]] = None
+    # Ảnh đã ghi sẵn vào shared memory (model_deployed chạy cùng máy)
+    shared_image: Optional[SharedImage] = None
 
 
 class PoseDetectorOutput(BaseModel):
-    pose_landmarks: list[list[dict]]
+    # Mảng (số người, số điểm, 4) float32: x, y, z, visibility
+    landmarks: np.ndarray
     img_width: float
     img_height: float
+    landmark_indices: Optional[list[int]] = None
+
+    @property
+    def pose_landmarks(self) -> list[list[dict]]:
+        return landmarks_to_dicts(self.landmarks)
 
 
-class PoseDetector(BaseService):
+class PoseDetector(AsyncBaseService):
     settings: Settings
 
-    def process(self, inputs: PoseDetectorInput) -> PoseDetectorOutput:
-        _, buffer = cv2.imencode('.jpg', inputs.img_origin)
-        file_bytes = BytesIO(buffer.tobytes())
-        file_bytes.name = 'image.jpg'
-        files = {'file': (file_bytes.name, file_bytes, 'image/jpeg')}
-        response = requests.post(
-            str(self.settings.host_pose_detector), files=files,
+    async def process(self, inputs: PoseDetectorInput) -> PoseDetectorOutput:
+        if inputs.shared_image is not None:
+            # chỉ gửi handle, model_deployed đọc thẳng ảnh trong shared memory
+            files = None
+            headers = dict(inputs.shared_image.headers)
+        else:
+            # encode JPEG ngoài event loop để không chặn các request khác
+            _, buffer = await asyncio.to_thread(run_profiled, cv2.imencode, '.jpg', inputs.img_origin)
+            files = {'file': ('image.jpg', buffer.tobytes(), 'image/jpeg')}
+            headers = {}
+        params = {}
+        if inputs.landmark_indices is not None:
+            params['landmarks'] = format_landmark_indices(inputs.landmark_indices)
+
+        if self.settings.http_client.landmark_format == 'npy':
+            # Nhận thẳng mảng float32, không qua JSON
+            response = await get_http_client().post_balanced(
+                get_replica_set('pose_detector'),
+                files=files,
+                params=params,
+                headers={**headers, 'Accept': NPY_MEDIA_TYPE},
+            )
+            return PoseDetectorOutput(
+                landmarks=decode_npy(response.content),
+                img_width=float(response.headers[IMG_WIDTH_HEADER]),
+                img_height=float(response.headers[IMG_HEIGHT_HEADER]),
+                landmark_indices=inputs.landmark_indices,
+            )
+
+        response = await get_http_client().post_balanced(
+            get_replica_set('pose_detector'), files=files, params=params, headers=headers,
         )
 
+        info = response.json()['info']
         return PoseDetectorOutput(
-            pose_landmarks=response.json()['info']['pose_landmarks'],
-            img_width=response.json()['info']['img_width'],
-            img_height=response.json()['info']['img_height'],
+            landmarks=pack_landmark_dicts(info['pose_landmarks']),
+            img_width=info['img_width'],
+            img_height=info['img_height'],
+            landmark_indices=inputs.landmark_indices,
         )
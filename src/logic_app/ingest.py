@@ -0,0 +1,103 @@
+"""Run a whole dataset through the height pipeline.
+
+    python ingest.py resource/data/processed_data --output results/heights.csv
+    python ingest.py 'resource/data/**/*.jpg' --shard 0/4 --output results/shard0.csv
+    python ingest.py resource/data --url http://localhost:5001/v1/height --concurrency 16
+
+Images are measured in this process (model_deployed is called over HTTP as
+by the API), or posted to a running logic_app with `--url`. Every processed
+image is appended to a checkpoint, so running the same command again only
+processes the images not done yet (and those that failed, unless
+`--no-retry-failed`). `--shard i/n` keeps the images whose path hashes to
+shard `i` of `n`: the same command on n machines splits the dataset without
+overlap. The output is rebuilt from the checkpoint at the end of every run.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+
+import httpx
+from app.height_batch import BATCH_MODES
+from app.height_cal_pred import HeightService
+from app.ingest import Checkpoint
+from app.ingest import DatasetIngest
+from app.ingest import find_images
+from app.ingest import http_measure
+from app.ingest import in_shard
+from app.ingest import inprocess_measure
+from app.ingest import parse_shard
+from app.ingest import Progress
+from common.logs import setup_logging
+from common.utils import get_settings
+from infrastructure.http_client import get_http_client
+from infrastructure.inprocess import get_inprocess_models
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source', help='folder of images (searched recursively) or glob pattern')
+    parser.add_argument('--output', default='results/ingest.csv', help='CSV file, one row per image')
+    parser.add_argument('--checkpoint', help='checkpoint file (default: <output>.checkpoint.jsonl)')
+    parser.add_argument('--concurrency', type=int, default=8, help='images in flight')
+    parser.add_argument('--shard', default='0/1', help='i/n: process shard i of n (from 0)')
+    parser.add_argument('--url', help='post the images to this logic_app endpoint instead of measuring in process')
+    parser.add_argument(
+        '--mode', choices=BATCH_MODES, default='full',
+        help='in process only - full: draw and write the CSV files (collect profile), measure: only measure',
+    )
+    parser.add_argument('--no-retry-failed', action='store_true', help='skip the images that failed before')
+    parser.add_argument('--log-level', default='WARNING')
+    return parser.parse_args()
+
+
+async def ingest(args: argparse.Namespace) -> int:
+    shard, shards = parse_shard(args.shard)
+    checkpoint = Checkpoint(args.checkpoint or f'{args.output}.checkpoint.jsonl')
+    finished = checkpoint.finished(retry_failed=not args.no_retry_failed)
+    images = [
+        image for image in find_images(args.source)
+        if in_shard(image.key, shard, shards) and image.key not in finished
+    ]
+    print(
+        f'{len(images)} image(s) to process in shard {shard}/{shards}, '
+        f'{len(finished)} already done', file=sys.stderr,
+    )
+
+    progress = Progress(total=len(images))
+    try:
+        if args.url:
+            async with httpx.AsyncClient(timeout=None) as client:
+                measure = http_measure(client, args.url)
+                await DatasetIngest(measure, checkpoint, args.concurrency).run(images, progress)
+        else:
+            settings = get_settings()
+            if settings.pipeline.transport == 'inprocess':
+                await get_inprocess_models().start()
+            measure = inprocess_measure(HeightService(settings=settings), args.mode)
+            try:
+                await DatasetIngest(measure, checkpoint, args.concurrency).run(images, progress)
+            finally:
+                await get_http_client().aclose()
+                if settings.pipeline.transport == 'inprocess':
+                    get_inprocess_models().stop()
+    finally:
+        progress.report(final=True)
+        checkpoint.close()
+        checkpoint.write_table(args.output)
+    return 1 if progress.failed else 0
+
+
+def main() -> int:
+    args = parse_args()
+    setup_logging(json_logs=False, log_level=args.log_level)
+    try:
+        return asyncio.run(ingest(args))
+    except KeyboardInterrupt:
+        # checkpoint đã được ghi: chạy lại cùng lệnh để tiếp tục
+        return 130
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,22 +1,74 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
+
+from api.helper import DeadlineMiddleware
 from api.helper import LoggingMiddleware
+from api.helper import MetricsMiddleware
+from api.helper import ProfilingMiddleware
+from api.helper import TracingMiddleware
+from api.routers.artifacts import artifacts
+from api.routers.debug import debug
+from api.routers.height_batch import height_batch
 from api.routers.height_cal_pred import height_api
+from api.routers.height_stream import height_stream
+from api.routers.jobs import jobs
+from api.routers.metrics import metrics
+from app.height_jobs import get_job_runner
+from app.side_effects import get_side_effect_queue
 from asgi_correlation_id import CorrelationIdMiddleware
 from common.logs import get_logger
 from common.logs import setup_logging
+from common.tracing import shutdown_tracing
+from common.utils import get_settings
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from infrastructure.http_client import get_http_client
+from infrastructure.inprocess import get_inprocess_models
+from infrastructure.job_store import get_job_store
 # from api.routers.sign_up import sign_up_endpoint
 
 setup_logging(json_logs=False)
 logger = get_logger('api')
 
-app = FastAPI(title='OCR API - AI OCR', version='2.0.0')
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    inprocess = get_settings().pipeline.transport == 'inprocess'
+    if inprocess:
+        # nạp model_deployed trước khi nhận request: việc import không được chạy song song
+        await get_inprocess_models().start()
+    background_side_effects = get_settings().side_effects.background
+    if background_side_effects:
+        # vẽ + ghi CSV của profile collect chạy nền, tiếp tục các ảnh ghi tạm từ lần chạy trước
+        get_side_effect_queue().start()
+    jobs_enabled = get_settings().jobs.enabled
+    if jobs_enabled:
+        # tiếp tục các job còn dở từ lần chạy trước
+        get_job_runner().start()
+    yield
+    if jobs_enabled:
+        await get_job_runner().stop()
+        get_job_store().close()
+    if background_side_effects:
+        # ghi nốt các ảnh còn trong hàng đợi trước khi tắt
+        await get_side_effect_queue().stop()
+    # đóng các kết nối keep-alive tới model_deployed
+    await get_http_client().aclose()
+    if inprocess:
+        get_inprocess_models().stop()
+    shutdown_tracing()
+
+
+app = FastAPI(title='OCR API - AI OCR', version='2.0.0', lifespan=lifespan)
 
 
 # add middleware to generate correlation id
+app.add_middleware(DeadlineMiddleware, settings=get_settings().deadline)
 app.add_middleware(LoggingMiddleware, logger=logger)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(ProfilingMiddleware, settings=get_settings().profiling)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(CorrelationIdMiddleware)
 
 app.add_middleware(
@@ -31,6 +83,30 @@ app.include_router(
     height_api,
 )
 
+app.include_router(
+    height_stream,
+)
+
+app.include_router(
+    height_batch,
+)
+
+app.include_router(
+    jobs,
+)
+
+app.include_router(
+    artifacts,
+)
+
+app.include_router(
+    metrics,
+)
+
+app.include_router(
+    debug,
+)
+
 if __name__ == '__main__':
     import uvicorn
     uvicorn.run('main:app', host='127.0.0.1', port=5001, reload=True)
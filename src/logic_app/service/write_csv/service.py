@@ -45,6 +45,10 @@ class CSVWriterService(BaseService):
 
     async def process(self, inputs: CSVWriterInput) -> CSVWriterOutput:
         """Process input data and write to CSV files."""
+        return self.write(inputs)
+
+    def write(self, inputs: CSVWriterInput) -> CSVWriterOutput:
+        """Write to CSV files, blocking: run it in a thread off the event loop."""
         try:
             landmarks_written = False
             distances_written = False
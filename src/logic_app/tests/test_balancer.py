@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+import httpx
+from common.settings.models import HttpClientSettings
+from common.settings.models import LoadBalancerSettings
+from infrastructure.http_client import HttpClientPool
+from infrastructure.http_client import ReplicaSet
+
+URLS = ['http://node1/v1/box_detector', 'http://node2/v1/box_detector']
+
+
+class TestReplicaSet(unittest.TestCase):
+    def test_picks_least_outstanding(self):
+        replicas = ReplicaSet('box_detector', URLS, LoadBalancerSettings())
+        replicas.replicas[0].outstanding = 2
+        self.assertEqual(replicas.pick().url, URLS[1])
+        self.assertEqual(replicas.pick(exclude=replicas.replicas[1:]).url, URLS[0])
+        self.assertIsNone(replicas.pick(exclude=replicas.replicas))
+
+    def test_ejects_failing_replica(self):
+        replicas = ReplicaSet('box_detector', URLS, LoadBalancerSettings(eject_after_failures=2))
+        failing = replicas.replicas[0]
+        replicas.record_failure(failing)
+        self.assertEqual(failing.ejected_until, 0.0)
+        replicas.record_failure(failing)
+        self.assertTrue(all(replicas.pick().url == URLS[1] for _ in range(10)))
+
+        # tất cả đều bị loại: vẫn chọn 1 replica thay vì làm hỏng request
+        replicas.record_failure(replicas.replicas[1])
+        replicas.record_failure(replicas.replicas[1])
+        self.assertIsNotNone(replicas.pick())
+
+    def test_hedge_delay_from_latency_quantile(self):
+        settings = LoadBalancerSettings(hedge=True, hedge_min_samples=10, hedge_quantile=0.9, hedge_min_delay_ms=1)
+        replicas = ReplicaSet('box_detector', URLS, settings)
+        for latency in range(1, 10):
+            replicas.record_success(replicas.replicas[0], latency / 100)
+        self.assertIsNone(replicas.hedge_delay())
+        replicas.record_success(replicas.replicas[0], 0.1)
+        self.assertAlmostEqual(replicas.hedge_delay(), 0.09)
+
+
+class TestPostBalanced(unittest.TestCase):
+    def setUp(self) -> None:
+        self.pool = HttpClientPool(HttpClientSettings(max_retries=0))
+        # mỗi replica giả có 1 hành vi: ok, slow hoặc down
+        self.behavior = {'node1': 'ok', 'node2': 'ok'}
+        self.calls = []
+        self.pool._build_client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.calls.append(host)
+        if self.behavior[host] == 'down':
+            raise httpx.ConnectError('connection refused', request=request)
+        if self.behavior[host] == 'slow':
+            await asyncio.sleep(1)
+        return httpx.Response(200, json={'info': host})
+
+    def post(self, replicas: ReplicaSet) -> str:
+        async def run():
+            try:
+                response = await self.pool.post_balanced(replicas, json={})
+                return response.json()['info']
+            finally:
+                await self.pool.aclose()
+
+        return asyncio.run(run())
+
+    def test_fails_over_unreachable_replica(self):
+        replicas = ReplicaSet('box_detector', URLS, LoadBalancerSettings(eject_after_failures=1))
+        replicas.replicas[1].outstanding = 1
+        self.behavior['node1'] = 'down'
+        self.assertEqual(self.post(replicas), 'node2')
+        self.assertEqual(self.calls, ['node1', 'node2'])
+        self.assertGreater(replicas.replicas[0].ejected_until, 0)
+
+    def test_hedges_slow_replica(self):
+        settings = LoadBalancerSettings(hedge=True, hedge_min_samples=1, hedge_min_delay_ms=1)
+        replicas = ReplicaSet('box_detector', URLS, settings)
+        replicas.record_success(replicas.replicas[0], 0.01)
+        replicas.replicas[1].outstanding = 1
+        self.behavior['node1'] = 'slow'
+        self.assertEqual(self.post(replicas), 'node2')
+        self.assertEqual(self.calls, ['node1', 'node2'])
+        self.assertEqual([replica.outstanding for replica in replicas.replicas], [0, 1])
+
+    def test_request_errors_are_not_sent_twice(self):
+        replicas = ReplicaSet('box_detector', URLS, LoadBalancerSettings())
+        self.pool._build_client = lambda: httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(400, json={})),
+        )
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.post(replicas)
+
+
+if __name__ == '__main__':
+    unittest.main()
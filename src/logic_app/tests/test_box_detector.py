@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import unittest
 
 import cv2
@@ -23,7 +24,7 @@ class TestBoxDetector(unittest.TestCase):
         )
 
         inputs = BoxDetectorInput(image=test_image)
-        result = self.box_detector.process(inputs=inputs)
+        result = asyncio.run(self.box_detector.process(inputs=inputs))
         print(jsonable_encoder(result))
 
         # Kiểm tra kết quả trả về (có thể là bboxes và scores)
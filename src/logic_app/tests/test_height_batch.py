@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import unittest
+import zipfile
+
+import cv2
+import numpy as np
+from app.height_batch import archive_images
+from app.height_batch import BatchImage
+from app.height_batch import HeightBatch
+from app.height_cal_pred import HeightMeasureOutput
+
+IMAGE = cv2.imencode('.jpg', np.zeros((8, 8, 3), dtype=np.uint8))[1].tobytes()
+
+
+def encode(index: int) -> bytes:
+    # chiều cao ảnh = 8 + index: HeightService giả biết đang đo ảnh nào
+    return cv2.imencode('.jpg', np.zeros((8 + index, 8, 3), dtype=np.uint8))[1].tobytes()
+
+
+class SlowFirstMeasureService:
+    """HeightService giả: đếm số ảnh đang đo, ảnh 0 chậm hơn hẳn các ảnh khác"""
+
+    def __init__(self, slow_first: bool = True) -> None:
+        self.slow_first = slow_first
+        self.running = 0
+        self.max_running = 0
+
+    async def measure(self, image: np.ndarray) -> HeightMeasureOutput:
+        index = image.shape[0] - 8
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(0.2 if index == 0 and self.slow_first else 0.01)
+        finally:
+            self.running -= 1
+        return HeightMeasureOutput(results=[170.0], pixel_per_cm=2.0, bboxes=[], scores=[])
+
+
+def batch_image(index: int, data: bytes = None) -> BatchImage:
+    async def load() -> bytes:
+        return data or encode(index)
+    return BatchImage(index=index, file_name=f'{index}.jpg', load=load)
+
+
+class TestHeightBatch(unittest.TestCase):
+
+    def run_batch(self, images, concurrency, slow_first=True):
+        async def run():
+            service = SlowFirstMeasureService(slow_first)
+            batch = HeightBatch(service=service, concurrency=concurrency, mode='measure')
+            return [result async for result in batch.run(images)], service
+
+        return asyncio.run(run())
+
+    def test_results_stream_in_completion_order(self):
+        results, service = self.run_batch([batch_image(i) for i in range(5)], concurrency=2)
+        self.assertEqual(sorted(result['index'] for result in results), list(range(5)))
+        # ảnh 0 chậm nhất không chặn kết quả của các ảnh sau
+        self.assertEqual(results[-1]['index'], 0)
+        self.assertEqual(service.max_running, 2)
+        self.assertEqual(results[0]['results'], [170.0])
+
+    def test_failed_image_does_not_fail_the_batch(self):
+        results, _ = self.run_batch([batch_image(0, b'not an image'), batch_image(1)], concurrency=1, slow_first=False)
+        results = {result['index']: result for result in results}
+        self.assertIn('error', results[0])
+        self.assertEqual(results[1]['results'], [170.0])
+
+    def test_archive_images(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('data/1_DungThang_Base_1_170.jpg', IMAGE)
+            archive.writestr('data/readme.txt', b'')
+            archive.writestr('data/.hidden.png', IMAGE)
+        images = archive_images(buffer, start_index=3, max_image_bytes=1 << 20)
+        self.assertEqual([(image.index, image.file_name) for image in images], [(3, '1_DungThang_Base_1_170.jpg')])
+        self.assertEqual(asyncio.run(images[0].load()), IMAGE)
+
+        with self.assertRaises(ValueError):
+            archive_images(buffer, start_index=0, max_image_bytes=8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+from app.height_cal_pred import HeightMeasureOutput
+from app.height_jobs import expand_paths
+from app.height_jobs import JobRunner
+from common.settings.models import JobsSettings
+from infrastructure.job_store import JobStore
+
+IMAGE = cv2.imencode('.jpg', np.zeros((8, 8, 3), dtype=np.uint8))[1].tobytes()
+
+
+class FlakyMeasureService:
+    """HeightService giả: lỗi `failures` lần đầu rồi đo thành công"""
+
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    async def measure(self, image: np.ndarray) -> HeightMeasureOutput:
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError('model_deployed unavailable')
+        return HeightMeasureOutput(results=[170.0], pixel_per_cm=2.0, bboxes=[], scores=[])
+
+
+class JobTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.store = JobStore(str(self.root / 'jobs.sqlite3'))
+
+    def tearDown(self) -> None:
+        self.store.close()
+        self.tmp.cleanup()
+
+    def image(self, name: str, data: bytes = IMAGE) -> str:
+        path = self.root / name
+        path.write_bytes(data)
+        return str(path)
+
+
+class TestJobStore(JobTestCase):
+    def test_items_are_claimed_once_in_order(self):
+        job_id = self.store.create_job('measure', [('a.jpg', 'a.jpg'), ('b.jpg', 'b.jpg')])
+        first, second = self.store.claim(lease_s=60), self.store.claim(lease_s=60)
+        self.assertEqual((first.index, second.index), (0, 1))
+        self.assertIsNone(self.store.claim(lease_s=60))
+
+        self.store.complete(job_id, 0, {'results': [170.0]})
+        summary = self.store.get_job(job_id)
+        self.assertEqual((summary.done, summary.running, summary.status), (1, 1, 'running'))
+        self.assertEqual(self.store.results(job_id, status='done')[0].result, {'results': [170.0]})
+
+    def test_failed_item_is_retried_when_due(self):
+        job_id = self.store.create_job('measure', [('a.jpg', 'a.jpg')])
+        item = self.store.claim(lease_s=60)
+        self.store.fail(job_id, item.index, 'timeout', retry_at=1e12)
+        self.assertIsNone(self.store.claim(lease_s=60))
+
+        self.store.fail(job_id, item.index, 'timeout', retry_at=0)  # không còn running: bỏ qua
+        self.assertIsNone(self.store.claim(lease_s=60))
+
+    def test_expired_lease_is_claimed_again_after_restart(self):
+        job_id = self.store.create_job('measure', [('a.jpg', 'a.jpg')])
+        self.assertEqual(self.store.claim(lease_s=-1).attempts, 1)
+        # worker chết giữa chừng: mở lại database như 1 process mới
+        self.store.close()
+        self.store = JobStore(str(self.root / 'jobs.sqlite3'))
+        item = self.store.claim(lease_s=60)
+        self.assertEqual((item.job_id, item.attempts), (job_id, 2))
+
+    def test_released_item_keeps_its_attempts(self):
+        job_id = self.store.create_job('measure', [('a.jpg', 'a.jpg')])
+        self.store.claim(lease_s=60)
+        self.store.release(job_id, 0)
+        self.assertEqual(self.store.claim(lease_s=60).attempts, 1)
+
+
+class TestJobRunner(JobTestCase):
+    def run_job(self, items, service, **settings) -> str:
+        job_id = self.store.create_job('measure', items)
+        settings = JobsSettings(retry_backoff_s=0, poll_interval_s=0.01, upload_dir=str(self.root), **settings)
+
+        async def run():
+            runner = JobRunner(self.store, service, settings)
+            runner.start()
+            while self.store.get_job(job_id).status != 'completed':
+                await asyncio.sleep(0.01)
+            await runner.stop()
+
+        asyncio.run(asyncio.wait_for(run(), timeout=10))
+        return job_id
+
+    def test_transient_error_is_retried(self):
+        service = FlakyMeasureService(failures=1)
+        job_id = self.run_job([(self.image('a.jpg'), 'a.jpg')], service, concurrency=1)
+        item = self.store.results(job_id)[0]
+        self.assertEqual((item.status, item.attempts, item.error), ('done', 2, None))
+        self.assertEqual(item.result['results'], [170.0])
+        self.assertIn('latency_ms', item.result)
+
+    def test_gives_up_after_max_attempts(self):
+        service = FlakyMeasureService(failures=10)
+        job_id = self.run_job([(self.image('a.jpg'), 'a.jpg')], service, max_attempts=2)
+        item = self.store.results(job_id)[0]
+        self.assertEqual((item.status, item.attempts, service.calls), ('failed', 2, 2))
+
+    def test_bad_image_is_not_retried(self):
+        service = FlakyMeasureService()
+        job_id = self.run_job(
+            [(self.image('a.jpg', b'not an image'), 'a.jpg'), (str(self.root / 'missing.jpg'), 'missing.jpg')],
+            service,
+        )
+        items = self.store.results(job_id)
+        self.assertEqual([(item.status, item.attempts) for item in items], [('failed', 1), ('failed', 1)])
+        self.assertEqual(service.calls, 0)
+
+
+class TestExpandPaths(unittest.TestCase):
+    def test_folders_are_expanded_inside_root(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / 'images').mkdir()
+            for name in ('b.jpg', 'a.png', 'notes.txt'):
+                (root / 'images' / name).write_bytes(IMAGE)
+            self.assertEqual([path.name for path in expand_paths(['images'], tmp)], ['a.png', 'b.jpg'])
+            with self.assertRaises(ValueError):
+                expand_paths(['../etc/passwd'], tmp)
+            with self.assertRaises(ValueError):
+                expand_paths(['images/notes.txt'], tmp)
+
+
+if __name__ == '__main__':
+    unittest.main()
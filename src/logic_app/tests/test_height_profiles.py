@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+from app.height_cal_pred import HeightInput
+from app.height_cal_pred import HeightService
+from common.settings.models import PipelineSettings
+from common.utils import get_settings
+from common.wire import HEIGHT_LANDMARKS
+
+IMAGE = np.zeros((8, 8, 3), dtype=np.uint8)
+
+
+class FakeModelsHeightService(HeightService):
+    """HeightService với các model giả: ghi lại các bước đã chạy"""
+    steps: list = []
+    landmark_indices: Optional[list] = None
+
+    async def _detect(self, image, landmark_indices=None):
+        self.steps.append('detect')
+        self.landmark_indices = landmark_indices
+        box = SimpleNamespace(bboxes=[[0.0, 0.0, 4.0, 8.0]], scores=[0.9], pixel_per_cm=2.0)
+        return box, SimpleNamespace(pose_landmarks=[[{'x': 0.5, 'y': 0.5, 'z': 0.0}]])
+
+    async def _calculate_height(self, box_det_out, pose_det_out):
+        self.steps.append('calculate')
+        return SimpleNamespace(heights=[169.0], distances=[[1.0] * 6])
+
+    async def _predict_height(self, height_cal_out):
+        self.steps.append('predict')
+        return SimpleNamespace(pred=[170.0])
+
+    @property
+    def _get_draw(self):
+        def draw(inputs):
+            self.steps.append('draw')
+            return SimpleNamespace(output_path=f'output/{inputs.name_image}.jpg')
+        return SimpleNamespace(process=draw)
+
+    @property
+    def _get_write_csv(self):
+        async def write_csv(inputs):
+            self.steps.append('write_csv')
+            return SimpleNamespace(landmarks_csv_written=True, distances_csv_written=True)
+        return SimpleNamespace(process=write_csv)
+
+
+class TestHeightProfiles(unittest.TestCase):
+    def service(self, profile: str) -> FakeModelsHeightService:
+        settings = get_settings()
+        settings = settings.model_copy(
+            update={'pipeline': settings.pipeline.model_copy(update={'profile': profile})},
+        )
+        return FakeModelsHeightService(settings=settings)
+
+    def test_serve_profile_skips_side_effects(self):
+        service = self.service('serve')
+        # tên file không có chiều cao thật: profile serve không đọc tên file
+        output = asyncio.run(service.process(inputs=HeightInput(image=IMAGE, img_name='kiosk.jpg')))
+        self.assertEqual(output.results, [170.0])
+        self.assertIsNone(output.out_path)
+        self.assertEqual(service.steps, ['detect', 'calculate', 'predict'])
+        # chỉ các landmark của bộ tính chiều cao được gửi về
+        self.assertEqual(service.landmark_indices, HEIGHT_LANDMARKS)
+
+    def test_collect_profile_draws_and_writes_csv(self):
+        service = self.service('collect')
+        output = asyncio.run(service.process(inputs=HeightInput(image=IMAGE, img_name='1_Base_1_170.jpg')))
+        self.assertEqual(output.out_path, 'output/1_Base_1_170.jpg')
+        self.assertEqual(service.steps, ['detect', 'calculate', 'draw', 'write_csv', 'predict'])
+        self.assertIsNone(service.landmark_indices)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(service.process(inputs=HeightInput(image=IMAGE, img_name='kiosk.jpg')))
+
+    def test_request_profile_overrides_deployment(self):
+        service = self.service('collect')
+        output = asyncio.run(
+            service.process(inputs=HeightInput(image=IMAGE, img_name='kiosk.jpg'), profile='serve'),
+        )
+        self.assertEqual(output.results, [170.0])
+        self.assertNotIn('draw', service.steps)
+
+        with self.assertRaises(ValueError):
+            asyncio.run(service.process(inputs=HeightInput(image=IMAGE, img_name='kiosk.jpg'), profile='debug'))
+
+    def test_unknown_deployment_profile_is_rejected(self):
+        self.assertEqual(PipelineSettings(profile='serve').profile, 'serve')
+        with self.assertRaises(ValueError):
+            PipelineSettings(profile='debug')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+import cv2
+import numpy as np
+from app.height_cal_pred import HeightMeasureOutput
+from app.height_stream import HeightStream
+from app.height_stream import LatestFrameSlot
+from app.height_stream import StreamFrame
+
+
+class SlowMeasureService:
+    """HeightService giả: mỗi lần đo chờ tới khi test cho phép"""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+
+    async def measure(self, image: np.ndarray) -> HeightMeasureOutput:
+        await self.release.wait()
+        self.release.clear()
+        return HeightMeasureOutput(
+            results=[170.0], pixel_per_cm=2.0, bboxes=[[0, 0, 1, 1]], scores=[0.9],
+        )
+
+
+class TestLatestFrameSlot(unittest.TestCase):
+
+    def test_latest_frame_wins(self):
+        async def run():
+            slot = LatestFrameSlot()
+            for frame_id in range(3):
+                slot.put(StreamFrame(frame_id=frame_id, data=b'', received_at=0.0))
+            frame = await slot.get()
+            slot.close()
+            return frame.frame_id, slot.dropped, await slot.get()
+
+        self.assertEqual(asyncio.run(run()), (2, 2, None))
+
+
+class TestHeightStream(unittest.TestCase):
+
+    def test_frames_are_dropped_while_inference_is_behind(self):
+        frame = cv2.imencode('.jpg', np.zeros((8, 8, 3), dtype=np.uint8))[1].tobytes()
+
+        async def run():
+            service = SlowMeasureService()
+            sent = []
+
+            async def send(result: dict) -> None:
+                sent.append(result)
+
+            stream = HeightStream(service=service, send=send)
+            worker = asyncio.create_task(stream.run())
+
+            stream.push(frame)                  # frame 0: đang đo
+            await asyncio.sleep(0.05)
+            for _ in range(3):                  # frame 1, 2 bị bỏ, giữ frame 3
+                stream.push(frame)
+            service.release.set()
+            await asyncio.sleep(0.05)
+            service.release.set()
+            await asyncio.sleep(0.05)
+
+            stream.close()
+            await worker
+            return sent
+
+        sent = asyncio.run(run())
+
+        self.assertEqual([result['frame_id'] for result in sent], [0, 3])
+        self.assertEqual([result['dropped'] for result in sent], [0, 2])
+        self.assertEqual(sent[1]['results'], [170.0])
+
+    def test_invalid_frame_reports_error(self):
+        async def run():
+            sent = []
+
+            async def send(result: dict) -> None:
+                sent.append(result)
+
+            stream = HeightStream(service=SlowMeasureService(), send=send)
+            stream.push(b'not an image')
+            stream.close()
+            await stream.run()
+            return sent
+
+        sent = asyncio.run(run())
+
+        self.assertEqual(sent[0]['frame_id'], 0)
+        self.assertIn('error', sent[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
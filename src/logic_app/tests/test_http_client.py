@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+from typing import Optional
+
+import httpx
+from common.deadline import DEADLINE
+from common.deadline import DeadlineExceeded
+from common.deadline import reset_deadline
+from common.deadline import set_deadline
+from common.settings.models import HttpClientSettings
+from infrastructure.http_client.http_client import HttpClientPool
+
+
+class TestHttpClientRetry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.calls = 0
+        self.pool = HttpClientPool(
+            HttpClientSettings(max_retries=2, retry_backoff=0.001, max_retry_backoff=0.002),
+        )
+        # model_deployed giả: transport của httpx trả lần lượt các status cho trước
+        self.pool._build_client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        self.statuses = []
+        self.headers = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        self.headers.append(request.headers)
+        return httpx.Response(self.statuses.pop(0), headers={'Retry-After': '0'}, json={})
+
+    def post(self, deadline: Optional[float] = None) -> httpx.Response:
+        async def run():
+            token = set_deadline(deadline)
+            try:
+                return await self.pool.post('http://model/v1/box_detector', content=b'image')
+            finally:
+                reset_deadline(token)
+                await self.pool.aclose()
+
+        return asyncio.run(run())
+
+    def test_retries_shed_requests(self):
+        self.statuses = [503, 503, 200]
+        self.assertEqual(self.post().status_code, 200)
+        self.assertEqual(self.calls, 3)
+
+    def test_gives_up_after_max_retries(self):
+        self.statuses = [503, 503, 503, 200]
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.post()
+        self.assertEqual(self.calls, 3)
+
+    def test_other_errors_are_not_retried(self):
+        self.statuses = [500, 200]
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.post()
+        self.assertEqual(self.calls, 1)
+
+    def test_forwards_deadline(self):
+        self.statuses = [200]
+        deadline = time.time() + 10
+        self.post(deadline)
+        self.assertAlmostEqual(float(self.headers[0][DEADLINE]), deadline, places=3)
+
+    def test_expired_deadline_is_not_sent(self):
+        with self.assertRaises(DeadlineExceeded):
+            self.post(time.time() - 1)
+        self.assertEqual(self.calls, 0)
+
+    def test_upstream_deadline_exceeded(self):
+        self.statuses = [504]
+        with self.assertRaises(DeadlineExceeded):
+            self.post(time.time() + 10)
+
+    def test_no_retry_past_deadline(self):
+        self.pool.settings.retry_backoff = self.pool.settings.max_retry_backoff = 5.0
+        self.statuses = [503, 200]
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.post(time.time() + 1)
+        self.assertEqual(self.calls, 1)
+
+    def test_retry_delay_honors_retry_after_and_cap(self):
+        pool = HttpClientPool(HttpClientSettings(retry_backoff=0.1, max_retry_backoff=2.0))
+        self.assertTrue(0.05 <= pool.retry_delay(0) <= 0.1)
+        self.assertTrue(0.5 <= pool.retry_delay(0, '1') <= 1.0)
+        self.assertTrue(1.0 <= pool.retry_delay(10, 'junk') <= 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from app.ingest import Checkpoint
+from app.ingest import DatasetIngest
+from app.ingest import find_images
+from app.ingest import in_shard
+from app.ingest import parse_shard
+from app.ingest import Progress
+
+
+class TestIngest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        (self.root / 'data' / 'sub').mkdir(parents=True)
+        for index in range(6):
+            folder = self.root / 'data' / ('sub' if index % 2 else '')
+            (folder / f'{index}_170.jpg').write_bytes(b'jpeg')
+        (self.root / 'data' / 'notes.txt').write_text('not an image')
+        self.calls = []
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    async def measure(self, path: Path) -> dict:
+        self.calls.append(path.name)
+        if path.name.startswith('3_'):
+            raise RuntimeError('model_deployed unavailable')
+        return {'results': [170.0], 'out_path': f'output/{path.name}'}
+
+    def ingest(self, checkpoint_path: str) -> Checkpoint:
+        checkpoint = Checkpoint(checkpoint_path)
+        finished = checkpoint.finished()
+        images = [image for image in find_images(str(self.root / 'data')) if image.key not in finished]
+        progress = Progress(total=len(images), stream=io.StringIO())
+        asyncio.run(DatasetIngest(self.measure, checkpoint, concurrency=2).run(images, progress))
+        checkpoint.close()
+        return checkpoint
+
+    def test_find_images_from_folder_or_pattern(self):
+        keys = [image.key for image in find_images(str(self.root / 'data'))]
+        self.assertEqual(keys, ['0_170.jpg', '2_170.jpg', '4_170.jpg', 'sub/1_170.jpg', 'sub/3_170.jpg', 'sub/5_170.jpg'])
+        pattern = str(self.root / 'data' / 'sub' / '*.jpg')
+        self.assertEqual(len(find_images(pattern)), 3)
+
+    def test_shards_split_dataset_without_overlap(self):
+        self.assertEqual(parse_shard('1/4'), (1, 4))
+        for value in ('4/4', '1', 'a/b'):
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+
+        keys = [f'img_{index}.jpg' for index in range(100)]
+        shards = [[key for key in keys if in_shard(key, shard, 4)] for shard in range(4)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(keys))
+        self.assertTrue(all(shards))
+
+    def test_rerun_only_processes_unfinished_images(self):
+        checkpoint_path = str(self.root / 'out' / 'results.checkpoint.jsonl')
+        checkpoint = self.ingest(checkpoint_path)
+        self.assertEqual(len(self.calls), 6)
+        self.assertEqual(checkpoint.records['sub/3_170.jpg']['status'], 'error')
+
+        # lần chạy trước bị dừng giữa lúc ghi 1 dòng
+        with open(checkpoint_path, 'a') as file:
+            file.write('{"path": "4_17')
+        self.calls.clear()
+        checkpoint = self.ingest(checkpoint_path)
+        self.assertEqual(self.calls, ['3_170.jpg'])
+
+        output = self.root / 'out' / 'results.csv'
+        checkpoint.write_table(str(output))
+        with output.open() as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['results'], '[170.0]')
+        self.assertEqual(rows[-2]['error'], 'model_deployed unavailable')
+
+
+if __name__ == '__main__':
+    unittest.main()
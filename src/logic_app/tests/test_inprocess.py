@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import importlib
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import common
+from common.settings.models import PipelineSettings
+from infrastructure.inprocess.model_deployed import model_deployed_imports
+
+
+class TestModelDeployedImports(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        # cây gói giả của model_deployed, trùng tên gói `common` với logic_app
+        (self.root / 'common').mkdir()
+        (self.root / 'common' / '__init__.py').write_text("NAME = 'model_deployed'\n")
+        (self.root / 'common' / 'only_model_deployed.py').write_text('VALUE = 1\n')
+
+    def tearDown(self) -> None:
+        sys.modules.pop('common.only_model_deployed', None)
+        self.tmp.cleanup()
+
+    def test_logic_app_modules_are_restored(self):
+        with model_deployed_imports(self.root):
+            imported = importlib.import_module('common')
+            lazy = importlib.import_module('common.only_model_deployed')
+        self.assertEqual(imported.NAME, 'model_deployed')
+        self.assertIs(sys.modules['common'], common)
+        self.assertNotIn(str(self.root), sys.path)
+        # module không trùng tên với logic_app vẫn còn đăng ký cho các import trễ
+        self.assertIs(sys.modules['common.only_model_deployed'], lazy)
+
+    def test_restored_when_import_fails(self):
+        with self.assertRaises(ImportError):
+            with model_deployed_imports(self.root):
+                importlib.import_module('common.missing')
+        self.assertIs(sys.modules['common'], common)
+
+    def test_unknown_transport_is_rejected(self):
+        self.assertEqual(PipelineSettings(transport='inprocess').transport, 'inprocess')
+        with self.assertRaises(ValueError):
+            PipelineSettings(transport='in-process')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import unittest
 
@@ -21,7 +22,7 @@ class TestPoseDetector(unittest.TestCase):
         print('Image shape:', test_image.shape, 'dtype:', test_image.dtype)
 
         inputs = PoseDetectorInput(img_origin=test_image)
-        result = self.pose_detector.process(inputs=inputs)
+        result = asyncio.run(self.pose_detector.process(inputs=inputs))
 
         # Chuyển đổi result thành JSON hợp lệ
         json_result = jsonable_encoder(result)
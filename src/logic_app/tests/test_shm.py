@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from multiprocessing import shared_memory
+
+import numpy as np
+from common.shm import SHM_DTYPE_HEADER
+from common.shm import SHM_NAME_HEADER
+from common.shm import SHM_SHAPE_HEADER
+from common.shm import SharedImage
+
+
+class TestSharedImage(unittest.TestCase):
+
+    def test_segment_lives_only_inside_the_context(self):
+        image = np.arange(4 * 5 * 3, dtype=np.uint8).reshape(4, 5, 3)
+
+        async def run():
+            async with SharedImage(image) as shared_image:
+                headers = shared_image.headers
+                # đọc lại như model_deployed: mở segment theo tên
+                shm = shared_memory.SharedMemory(name=headers[SHM_NAME_HEADER])
+                copy = np.ndarray(image.shape, dtype=np.uint8, buffer=shm.buf).copy()
+                shm.close()
+            return headers, copy
+
+        headers, copy = asyncio.run(run())
+
+        np.testing.assert_array_equal(copy, image)
+        self.assertEqual(headers[SHM_SHAPE_HEADER], '4,5,3')
+        self.assertEqual(headers[SHM_DTYPE_HEADER], 'uint8')
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=headers[SHM_NAME_HEADER])
+
+
+if __name__ == '__main__':
+    unittest.main()
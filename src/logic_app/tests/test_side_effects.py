@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from app.side_effects import SideEffect
+from app.side_effects import SideEffectQueue
+from common.settings.models import SideEffectsSettings
+from common.utils import get_settings
+from service.draw import VisualizationInput
+from service.write_csv import CSVWriterInput
+
+
+class RecordingQueue(SideEffectQueue):
+    """SideEffectQueue không vẽ / ghi CSV thật: ghi lại thứ tự các ảnh"""
+
+    def __init__(self, settings, delay_s: float = 0.01) -> None:
+        super().__init__(settings)
+        self.delay_s = delay_s
+        self.written = []
+
+    async def execute(self, job: SideEffect) -> str:
+        await asyncio.sleep(self.delay_s)
+        self.written.append(job.write_csv.pose_num)
+        return f'output/{job.write_csv.pose_num}.jpg'
+
+
+def inputs(index: int):
+    draw = VisualizationInput(
+        image=np.zeros((8, 8, 3), dtype=np.uint8), name_image=f'{index}_170', pose_landmarks_list=[],
+        height_cm=[170.0], bboxes=np.zeros((0, 4)), confidences=np.zeros(0),
+    )
+    write_csv = CSVWriterInput(pose_num=index, height_truth=170.0, height_pre=[170.0], px_per_cm=2.0)
+    return draw, write_csv
+
+
+class TestSideEffectQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.spill_dir = Path(self.tmp.name) / 'spill'
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def queue(self, overflow: str, delay_s: float = 0.01, shutdown_timeout_s: float = 5.0) -> RecordingQueue:
+        settings = get_settings().model_copy(update={'side_effects': SideEffectsSettings(
+            max_depth=2, overflow=overflow, spill_dir=str(self.spill_dir), shutdown_timeout_s=shutdown_timeout_s,
+        )})
+        return RecordingQueue(settings, delay_s)
+
+    def run_queue(self, queue: RecordingQueue, count: int, first: int = 0) -> list:
+        async def run():
+            queue.start()
+            artifact_ids = [await queue.submit(*inputs(index)) for index in range(first, first + count)]
+            await queue.stop()
+            return artifact_ids
+
+        return asyncio.run(run())
+
+    def test_block_writes_everything_in_order_before_shutdown(self):
+        queue = self.queue('block')
+        artifact_ids = self.run_queue(queue, 6)
+        self.assertEqual(queue.written, list(range(6)))
+        artifact = queue.get_artifact(artifact_ids[3])
+        self.assertEqual((artifact.status, artifact.out_path), ('done', 'output/3.jpg'))
+
+    def test_drop_skips_images_of_a_full_queue(self):
+        queue = self.queue('drop', delay_s=0.05)
+        artifact_ids = self.run_queue(queue, 6)
+        statuses = [queue.get_artifact(artifact_id).status for artifact_id in artifact_ids]
+        self.assertIn('dropped', statuses)
+        self.assertEqual(queue.written, [index for index, status in enumerate(statuses) if status == 'done'])
+
+    def test_spill_keeps_order(self):
+        queue = self.queue('spill')
+        artifact_ids = self.run_queue(queue, 8)
+        self.assertEqual(queue.written, list(range(8)))
+        self.assertTrue(all(queue.get_artifact(artifact_id).status == 'done' for artifact_id in artifact_ids))
+        self.assertEqual(list(self.spill_dir.glob('*')), [])
+
+    def test_spilled_job_is_read_back_without_pickle(self):
+        queue = self.queue('spill')
+        draw, write_csv = inputs(3)
+        job = SideEffect(artifact_id='a1', created_ns=1, draw=draw, write_csv=write_csv)
+        path = queue._spill(job)
+        self.assertEqual(sorted(file.suffix for file in self.spill_dir.iterdir()), ['.json', '.npz'])
+
+        loaded = queue._load(path)
+        np.testing.assert_array_equal(loaded.draw.image, draw.image)
+        self.assertEqual(loaded.draw.image.dtype, np.uint8)
+        self.assertEqual(loaded.draw.name_image, '3_170')
+        self.assertEqual(loaded.write_csv, write_csv)
+
+    def test_spilled_images_are_written_after_restart(self):
+        # tắt trước khi ghi xong: phần còn lại được ghi tạm ra đĩa
+        queue = self.queue('spill', delay_s=0.05, shutdown_timeout_s=0.01)
+        self.run_queue(queue, 6)
+        self.assertLess(len(queue.written), 6)
+        self.assertTrue(list(self.spill_dir.glob('*.json')))
+
+        restarted = self.queue('spill')
+        self.run_queue(restarted, 0)
+        # ảnh đang ghi lúc tắt được ghi xong, không ghi lại lần 2
+        self.assertEqual(queue.written + restarted.written, list(range(6)))
+
+    def test_spilled_images_are_written_before_new_ones_after_restart(self):
+        queue = self.queue('spill', delay_s=0.05, shutdown_timeout_s=0.01)
+        self.run_queue(queue, 6)
+        left = [index for index in range(6) if index not in queue.written]
+        self.assertTrue(left)
+
+        # khởi động lại với block: các ảnh mới vào hàng đợi, sau các ảnh ghi tạm
+        restarted = self.queue('block')
+        self.run_queue(restarted, 3, first=10)
+        self.assertEqual(restarted.written, left + [10, 11, 12])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
 from .exception_handler import ExceptionHandler
+from .middlewares import DeadlineMiddleware
+from .middlewares import AdmissionMiddleware
 from .middlewares import LoggingMiddleware
+from .middlewares import MetricsMiddleware
+from .middlewares import ProfilingMiddleware
+from .middlewares import TracingMiddleware
 
-__all__ = ['ExceptionHandler', 'LoggingMiddleware']
+__all__ = ['AdmissionMiddleware', 'DeadlineMiddleware', 'ExceptionHandler', 'LoggingMiddleware', 'MetricsMiddleware', 'ProfilingMiddleware', 'TracingMiddleware']
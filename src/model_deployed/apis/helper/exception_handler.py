@@ -15,6 +15,8 @@ class ResponseMessage(str, Enum):
     NOT_FOUND = 'Resource not found !!!'
     BAD_REQUEST = 'Invalid request !!!'
     UNPROCESSABLE_ENTITY = 'Input is not allowed !!!'
+    SERVICE_UNAVAILABLE = 'Service is not ready, please retry later !!!'
+    GATEWAY_TIMEOUT = 'Request deadline exceeded, please retry later !!!'
 
 
 class ExceptionHandler(BaseModel):
@@ -110,3 +112,37 @@ class ExceptionHandler(BaseModel):
             ResponseMessage.UNPROCESSABLE_ENTITY.value,
             code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         )
+
+    def handle_service_unavailable(self, err_msg: str, extra: dict, payload: Optional[dict] = None) -> JSONResponse:
+        """Handle a request the service cannot serve yet (starting up, overloaded, ...)
+
+        Args:
+            err_msg (str): message
+            extra (dict): extra information
+            payload (Optional[dict], optional): data to be returned. Defaults to None.
+
+        Returns:
+            Response: response object
+        """
+        self.logger.warning(err_msg, extra=extra)
+        return self._build_response(
+            ResponseMessage.SERVICE_UNAVAILABLE.value,
+            payload=payload,
+            code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    def handle_deadline_exceeded(self, err_msg: str, extra: dict) -> JSONResponse:
+        """Handle a request whose deadline passed before its work was done
+
+        Args:
+            err_msg (str): message
+            extra (dict): extra information
+
+        Returns:
+            Response: response object
+        """
+        self.logger.warning(err_msg, extra=extra)
+        return self._build_response(
+            ResponseMessage.GATEWAY_TIMEOUT.value,
+            code=status.HTTP_504_GATEWAY_TIMEOUT,
+        )
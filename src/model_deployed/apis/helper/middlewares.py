@@ -1,9 +1,38 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import random
 import time
+from typing import Optional
+from uuid import uuid4
 
 import structlog
 from asgi_correlation_id.context import correlation_id
+from common.admission import admission_routes
+from common.admission import AdmissionLimiter
+from common.admission import get_admission_limiter
+from common.logs import get_logger
+from common.deadline import DEADLINE
+from common.deadline import parse_deadline
+from common.deadline import reset_deadline
+from common.deadline import set_deadline
+from common.metrics import ADMISSION_REJECTED
+from common.metrics import REQUEST_LATENCY
+from common.metrics import REQUESTS
+from common.metrics import REQUESTS_IN_FLIGHT
+from common.profiling import PROFILE
+from common.profiling import PROFILE_ID
+from common.profiling import PROFILE_MODES
+from common.profiling import profile_request
+from common.profiling import ProfileSession
+from common.settings.models import AdmissionSettings
+from common.settings.models import DeadlineSettings
+from common.settings.models import ProfilingSettings
+from common.tracing import start_trace
+from common.tracing import TRACE_ID
+from common.tracing import TRACEPARENT
+from starlette.datastructures import Headers
 from starlette.datastructures import MutableHeaders
 from starlette.types import ASGIApp
 from starlette.types import Message
@@ -13,6 +42,10 @@ from starlette.types import Send
 from structlog.stdlib import BoundLogger
 from uvicorn.protocols.utils import get_path_with_query_string
 
+from .exception_handler import ExceptionHandler
+
+logger = get_logger(__name__)
+
 
 def truncate_body(content: bytes) -> bytes:
     """Truncate body when logging to avoid stressing path operations
@@ -70,8 +103,9 @@ class LoggingMiddleware:
         async def receive_log():
             nonlocal req_body
             req_msg = await receive()
-            assert req_msg['type'] == 'http.request'
-            req_body = truncate_body(req_msg['body'])
+            # sau body có thể là http.disconnect (client ngắt giữa chừng)
+            if req_msg['type'] == 'http.request':
+                req_body = truncate_body(req_msg['body'])
             return req_msg
 
         async def send_log(res_msg: Message) -> None:
@@ -108,3 +142,265 @@ class LoggingMiddleware:
                 },
                 duration=duration,
             )
+
+
+class MetricsMiddleware:
+    """Counts requests and observes their latency per route template for `/metrics`"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        res_status = 500
+
+        async def send_status(res_msg: Message) -> None:
+            nonlocal res_status
+            if res_msg['type'] == 'http.response.start':
+                res_status = res_msg['status']
+            await send(res_msg)
+
+        start_time = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # path template (/v1/pose_detector/session/{session_id}/frame) thay vì URL thật
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            REQUESTS.labels(method=scope['method'], route=route, status=str(res_status)).inc()
+            REQUEST_LATENCY.labels(method=scope['method'], route=route).observe(
+                time.perf_counter() - start_time,
+            )
+
+
+class TracingMiddleware:
+    """Opens the root span of every HTTP request, continuing the caller's
+    trace when a `traceparent` header is sent, and returns its trace id"""
+
+    # health check và scrape Prometheus không cần trace
+    untraced_paths = ('/health', '/metrics')
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['path'].startswith(self.untraced_paths):
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = Headers(scope=scope).get(TRACEPARENT)
+        with start_trace(
+            f"{scope['method']} {scope['path']}", traceparent=traceparent, request_id=correlation_id.get(),
+        ) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_trace_id(res_msg: Message) -> None:
+                if res_msg['type'] == 'http.response.start':
+                    root.set_attribute('status', res_msg['status'])
+                    MutableHeaders(scope=res_msg).append(TRACE_ID, root.trace_id)
+                await send(res_msg)
+
+            try:
+                await self.app(scope, receive, send_trace_id)
+            finally:
+                route = getattr(scope.get('route'), 'path', None)
+                if route is not None:
+                    root.name = f"{scope['method']} {route}"
+
+
+class ProfilingMiddleware:
+    """Profiles the requests sent with an `X-Profile: cpu|cprofile` header,
+    or a random `profiling.sample_rate` share of the requests, and returns
+    the id of the stored profile in `X-Profile-Id`"""
+
+    unprofiled_paths = ('/debug', '/health', '/metrics')
+
+    def __init__(self, app: ASGIApp, settings: ProfilingSettings) -> None:
+        self.app = app
+        self.settings = settings
+
+    def _mode(self, scope: Scope) -> Optional[str]:
+        mode = Headers(scope=scope).get(PROFILE)
+        if mode is None and random.random() < self.settings.sample_rate:
+            mode = self.settings.default_mode
+        if mode is None:
+            return None
+        mode = mode.strip().lower()
+        return mode if mode in PROFILE_MODES else self.settings.default_mode
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope['type'] != 'http'
+            or not self.settings.enabled
+            or scope['path'].startswith(self.unprofiled_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = correlation_id.get() or uuid4().hex
+        session = ProfileSession(
+            profile_id=profile_id,
+            mode=mode,
+            name=f"{scope['method']} {scope['path']}",
+            interval_s=self.settings.sample_interval_ms / 1000,
+        )
+
+        async def send_profile_id(res_msg: Message) -> None:
+            if res_msg['type'] == 'http.response.start':
+                MutableHeaders(scope=res_msg).append(PROFILE_ID, profile_id)
+            await send(res_msg)
+
+        with profile_request(session):
+            await self.app(scope, receive, send_profile_id)
+
+
+class AdmissionMiddleware:
+    """Sheds the requests of a model endpoint beyond its admission limits.
+
+    Runs before the route reads the upload, so a rejected request costs
+    neither the buffered image nor a place behind the models. Rejected
+    requests get a 503 with `Retry-After`.
+    """
+
+    def __init__(self, app: ASGIApp, settings: AdmissionSettings) -> None:
+        self.app = app
+        self.settings = settings
+        self.routes = admission_routes()
+
+    def _limiter(self, scope: Scope) -> Optional[AdmissionLimiter]:
+        if scope['type'] != 'http' or scope['method'] != 'POST' or not self.settings.enabled:
+            return None
+        for prefix, name in self.routes.items():
+            if scope['path'].startswith(prefix):
+                return get_admission_limiter(name)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = self._limiter(scope)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            ADMISSION_REJECTED.labels(model=limiter.name).inc()
+            exception_handler = ExceptionHandler(
+                logger=logger.bind(), service_name=__name__,
+            )
+            response = exception_handler.handle_service_unavailable(
+                err_msg=f'{limiter.name} is overloaded, request shed',
+                extra={'path': scope['path'], 'active': limiter.active, 'waiting': limiter.waiting},
+            )
+            response.headers['Retry-After'] = str(self.settings.retry_after_s)
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+class DeadlineMiddleware:
+    """Gives every request a deadline and stops working for it once it is
+    useless: answered 504 when the deadline passes before the response
+    starts, cancelled when the client disconnects.
+
+    The deadline comes from the `X-Request-Deadline` header (unix time in
+    seconds), `deadline.default_timeout_s` from now otherwise.
+    """
+
+    untimed_paths = ('/debug', '/health', '/metrics')
+
+    def __init__(self, app: ASGIApp, settings: DeadlineSettings) -> None:
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope['type'] != 'http'
+            or not self.settings.enabled
+            or scope['path'].startswith(self.untimed_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        deadline = parse_deadline(Headers(scope=scope).get(DEADLINE))
+        if deadline is None:
+            deadline = time.time() + self.settings.default_timeout_s
+        token = set_deadline(deadline)
+        try:
+            await self._run(scope, receive, send, deadline)
+        finally:
+            reset_deadline(token)
+
+    async def _run(self, scope: Scope, receive: Receive, send: Send, deadline: float) -> None:
+        response_started = False
+        body_received = asyncio.Event()
+        disconnected = asyncio.Event()
+
+        async def receive_body() -> Message:
+            if body_received.is_set():
+                # body đã đọc hết: lần receive tiếp theo chỉ có thể là disconnect
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                disconnected.set()
+            elif not message.get('more_body', False):
+                body_received.set()
+            return message
+
+        async def watch_disconnect() -> None:
+            await body_received.wait()
+            if (await receive())['type'] == 'http.disconnect':
+                disconnected.set()
+
+        async def send_response(res_msg: Message) -> None:
+            nonlocal response_started
+            if res_msg['type'] == 'http.response.start':
+                response_started = True
+            await send(res_msg)
+
+        # ASGIApp chỉ hứa trả về Awaitable, create_task cần coroutine
+        app_task = asyncio.ensure_future(self.app(scope, receive_body, send_response))
+        watcher = asyncio.create_task(watch_disconnect())
+        disconnect_wait = asyncio.create_task(disconnected.wait())
+        try:
+            await asyncio.wait(
+                {app_task, disconnect_wait},
+                timeout=max(0.0, deadline - time.time()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not app_task.done() and (disconnected.is_set() or not response_started):
+                # client đã ngắt hoặc hết hạn trước khi trả lời: huỷ mọi việc còn chờ của request
+                app_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await app_task
+        finally:
+            watcher.cancel()
+            disconnect_wait.cancel()
+            if not app_task.done():
+                app_task.cancel()
+
+        if app_task.cancelled() and not disconnected.is_set() and not response_started:
+            exception_handler = ExceptionHandler(
+                logger=logger.bind(), service_name=__name__,
+            )
+            response = exception_handler.handle_deadline_exceeded(
+                err_msg='Request deadline exceeded, work cancelled',
+                extra={'path': scope['path'], 'overdue_s': time.time() - deadline},
+            )
+            await response(scope, receive, send)
+        elif disconnected.is_set() and app_task.cancelled():
+            logger.info('Client disconnected, request cancelled', extra={'path': scope['path']})
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from typing import List
+from typing import Optional
 
 from common.bases import BaseModel
 
@@ -11,6 +12,8 @@ class APIInput(BaseModel):
     img_width: float
     img_height: float
     px_per_cm: float
+    # Chỉ số của các điểm trong `landmarks` khi chỉ gửi một phần
+    landmark_indices: Optional[List[int]] = None
 
 
 class APIOutput(BaseModel):
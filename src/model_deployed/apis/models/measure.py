@@ -0,0 +1,12 @@
+"""Measure API format output """
+from __future__ import annotations
+
+from typing import List
+
+from common.bases import BaseModel
+
+
+class APIOutput(BaseModel):
+    heights: List[float]
+    distances: List[List[float]]
+    px_per_cm: float
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from typing import List
+from typing import Optional
 
 from common.bases import BaseModel
 
@@ -10,3 +11,4 @@ class APIOutput(BaseModel):
     pose_landmarks: List[List[dict]]
     img_width: float
     img_height: float
+    landmark_indices: Optional[List[int]] = None
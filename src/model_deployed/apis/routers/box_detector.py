@@ -1,19 +1,30 @@
 from __future__ import annotations
 
+import asyncio
+from typing import Optional
+
 import cv2
 import numpy as np
 from apis.helper.exception_handler import ExceptionHandler
 from apis.helper.exception_handler import ResponseMessage
 from apis.models.box_detector import APIOutput
+from app.model_container import get_model_container
+from common.deadline import DeadlineExceeded
 from common.logs import get_logger
+from common.metrics import stage_timer
+from common.result_cache import get_result_cache
+from common.result_cache import MISS
+from common.shm import read_shared_image
+from common.shm import SharedImage
 from common.utils import get_settings
 from fastapi import APIRouter
+from fastapi import Depends
 from fastapi import File
 from fastapi import status
 from fastapi import UploadFile
 from fastapi.encoders import jsonable_encoder
-from infrastructure.box_detector import BoxDetectorModel
 from infrastructure.box_detector import BoxDetectorModelInput
+from infrastructure.box_detector import BoxDetectorModelOutput
 
 box_detector = APIRouter(prefix='/v1')
 logger = get_logger(__name__)
@@ -22,7 +33,8 @@ settings = get_settings()
 
 try:
     logger.info('Load mode Box detector !!!')
-    box_detector_model = BoxDetectorModel(settings=settings)
+    box_detector_model = get_model_container().box_detector
+    box_detector_cache = get_result_cache('box_detector', BoxDetectorModelOutput)
 except Exception as e:
     logger.error(f'Failed to initialize Box embedding model: {e}')
     raise e  # stop and display full error message
@@ -90,12 +102,17 @@ except Exception as e:
         },
     },
 )
-async def box_detect(file: UploadFile = File(...)):
+async def box_detect(
+    file: Optional[UploadFile] = File(None),
+    shared_image: Optional[SharedImage] = Depends(read_shared_image),
+):
     """
     Detects Boxs in the provided input data.
 
     Args:
-        inputs (BoxDetectorInput): The input data for Box detection, which includes image information.
+        file (Optional[UploadFile]): The input image file (e.g., JPEG, PNG).
+        shared_image (Optional[SharedImage]): Decoded image in a shared-memory segment,
+            given by the `X-Shm-Name`, `X-Shm-Shape` and `X-Shm-Dtype` headers instead of `file`.
     Returns:
         BoxDetectorOutput: The output data containing detected Boxs and related extra.
     Raises:
@@ -105,27 +122,69 @@ async def box_detect(file: UploadFile = File(...)):
     exception_handler = ExceptionHandler(
         logger=logger.bind(), service_name=__name__,
     )
+    if shared_image is not None and not settings.transport.allow_shm:
+        return exception_handler.handle_bad_request(
+            err_msg='Shared memory transport is disabled',
+            extra={'shm_name': shared_image.name},
+        )
+    if shared_image is not None:
+        file_name: Optional[str] = shared_image.name
+    elif file is not None:
+        file_name = file.filename
+    else:
+        return exception_handler.handle_bad_request(
+            err_msg='An image file or a shared memory handle is required', extra={},
+        )
+
     try:
-        contents = await file.read()
+        if shared_image is not None:
+            # Ảnh đã decode sẵn trong shared memory: đọc thẳng, không copy, không decode
+            img_array = shared_image.open()
+            # băm ảnh thô (vài MB) ngoài event loop
+            cache_key = await asyncio.to_thread(box_detector_cache.key, img_array.data, img_array.shape)
+        else:
+            assert file is not None
+            contents = await file.read()
+            cache_key = box_detector_cache.key(contents)
 
-        # Chuyển dữ liệu ảnh thành mảng numpy
-        nparr = np.frombuffer(contents, np.uint8)
+        # Ảnh đã gửi trước đó -> trả luôn kết quả trong cache, không decode lại
+        response = await box_detector_cache.get(cache_key)
+        if response is MISS and shared_image is None:
+            # Chuyển dữ liệu ảnh thành mảng numpy
+            nparr = np.frombuffer(contents, np.uint8)
 
-        # Giải mã ảnh thành định dạng OpenCV (BGR)
-        img_array = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            # Giải mã ảnh thành định dạng OpenCV (BGR)
+            with stage_timer('decode'):
+                decoded = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+            if decoded is None:
+                return exception_handler.handle_bad_request(
+                    err_msg='Invalid image format',
+                    extra={'file_name': file_name},
+                )
+            img_array = decoded
+    except ValueError as e:
+        return exception_handler.handle_bad_request(
+            err_msg=str(e), extra={'file_name': file_name},
+        )
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'file_name': file_name},
+        )
     except Exception as e:
         return exception_handler.handle_exception(
             err_msg=f'Error while reading file: {e}',
-            extra={'file_name': file.filename},
+            extra={'file_name': file_name},
         )
 
     try:
-        # Process image
-        response = await box_detector_model.process(
-            inputs=BoxDetectorModelInput(
-                img=img_array,
-            ),
-        )
+        if response is MISS:
+            # Process image
+            response = await box_detector_model.process(
+                inputs=BoxDetectorModelInput(
+                    img=img_array,
+                ),
+            )
+            await box_detector_cache.set(cache_key, response)
         # handle response
         api_output = APIOutput(
             bboxes=response.bboxes.tolist(),  # đảm bảo trả về dạng list[list]
@@ -133,8 +192,12 @@ async def box_detect(file: UploadFile = File(...)):
             pixel_per_cm=response.pixel_per_cm,
         )
         return exception_handler.handle_success(jsonable_encoder(api_output))
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'input': file_name},
+        )
     except Exception as e:
         return exception_handler.handle_exception(
             err_msg=f'Error during Box detection: {e}',
-            extra={'input': file.filename},
+            extra={'input': file_name},
         )
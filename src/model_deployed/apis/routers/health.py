@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from apis.helper.exception_handler import ExceptionHandler
+from apis.helper.exception_handler import ResponseMessage
+from app.model_container import get_model_container
+from common.logs import get_logger
+from common.result_cache import get_result_cache
+from fastapi import APIRouter
+from fastapi import status
+
+health = APIRouter(prefix='/health')
+logger = get_logger(__name__)
+
+
+@health.get('/live')
+async def live():
+    """Liveness probe: the process is up and serving HTTP."""
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    return exception_handler.handle_success({'status': 'alive'})
+
+
+@health.get(
+    '/ready',
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': {
+                            'ready': True,
+                            'startup_time_s': 4.2,
+                            'models': {
+                                'box_detector': {
+                                    'loaded': True,
+                                    'load_time_s': 1.9,
+                                    'warmup_time_s': 1.1,
+                                    'error': None,
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            'description': 'Models are still loading or failed to load',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SERVICE_UNAVAILABLE,
+                        'info': {'ready': False},
+                    },
+                },
+            },
+        },
+    },
+)
+async def ready():
+    """Readiness probe: every model is loaded and warmed up.
+
+    Returns the load and warmup timings of each model.
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    container = get_model_container()
+    report = container.report()
+    if not container.ready:
+        return exception_handler.handle_service_unavailable(
+            err_msg='Models are not ready', extra={}, payload={'info': report},
+        )
+    return exception_handler.handle_success(report)
+
+
+@health.get('/cache')
+async def cache():
+    """Hit, miss and eviction counters of the box and pose result caches."""
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    return exception_handler.handle_success({
+        name: get_result_cache(name).stats()
+        for name in ('box_detector', 'pose_detector')
+    })
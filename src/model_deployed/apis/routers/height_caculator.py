@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+from typing import Optional
+
 from apis.helper.exception_handler import ExceptionHandler
 from apis.helper.exception_handler import ResponseMessage
 from apis.models.height_calculator import APIInput
 from apis.models.height_calculator import APIOutput
+from app.model_container import get_model_container
+from common.deadline import DeadlineExceeded
 from common.logs import get_logger
 from common.utils import get_settings
+from common.wire import decode_npy
+from common.wire import is_npy
+from common.wire import NPY_MEDIA_TYPE
+from common.wire import parse_landmark_indices
 from fastapi import APIRouter
-from fastapi import Body
+from fastapi import Query
+from fastapi import Request
 from fastapi import status
 from fastapi.encoders import jsonable_encoder
-from infrastructure.calculate import CalHeight
 from infrastructure.calculate import CalHeightInput
+from infrastructure.calculate.geometry import expand_landmarks
+from infrastructure.calculate.geometry import NUM_LANDMARKS
+from infrastructure.calculate.geometry import to_landmark_array
+from pydantic import ValidationError
 
 # import cv2
 
@@ -22,7 +34,7 @@ settings = get_settings()
 
 try:
     logger.info('Load mode Height Calculator!!!')
-    height_cal_model = CalHeight.get_service(settings=settings)
+    height_cal_model = get_model_container().height_cal
 except Exception as e:
     logger.error(f'Failed to initialize embedding model: {e}')
     raise e  # stop and display full error message
@@ -31,6 +43,24 @@ except Exception as e:
 @height_cal.post(
     '/height_cal',
     response_model=APIOutput,
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {
+                'application/json': {'schema': APIInput.model_json_schema()},
+                NPY_MEDIA_TYPE: {
+                    'schema': {
+                        'type': 'string',
+                        'format': 'binary',
+                        'description': (
+                            'float32 array (persons, landmarks, >=3) from /v1/pose_detector, '
+                            'image size and px_per_cm in the query string'
+                        ),
+                    },
+                },
+            },
+        },
+    },
     responses={
         status.HTTP_200_OK: {
             'content': {
@@ -90,12 +120,24 @@ except Exception as e:
         },
     },
 )
-async def cal_height(inputs: APIInput = Body(...)):
+async def cal_height(
+    request: Request,
+    img_width: Optional[float] = Query(None, description='Required with an npy body'),
+    img_height: Optional[float] = Query(None, description='Required with an npy body'),
+    px_per_cm: Optional[float] = Query(None, description='Required with an npy body'),
+    landmarks: Optional[str] = Query(
+        None, description='Comma separated indices of the landmarks in an npy body',
+    ),
+):
     """
     Performs Cal Height on the provided landmarks and image parameters.
 
+    The landmarks are sent either as an `APIInput` JSON body or, with
+    `Content-Type: application/x-npy`, as the packed array returned by
+    /v1/pose_detector together with the image parameters in the query string.
+
     Args:
-        inputs (APIInput): Contains landmarks, image width/height, and px_per_cm.
+        request (Request): Contains landmarks, image width/height, and px_per_cm.
 
     Returns:
         dict: Cal Height results with height and related measurements.
@@ -109,9 +151,29 @@ async def cal_height(inputs: APIInput = Body(...)):
 
     logger.info('Starting Cal Height processing...')
 
+    # --- Decode body theo Content-Type ---
+    try:
+        if is_npy(request.headers.get('content-type')):
+            if img_width is None or img_height is None or px_per_cm is None:
+                raise ValueError('img_width, img_height and px_per_cm are required.')
+            inputs = APIInput.model_construct(
+                landmarks=decode_npy(await request.body()),
+                img_width=img_width,
+                img_height=img_height,
+                px_per_cm=px_per_cm,
+                landmark_indices=parse_landmark_indices(landmarks),
+            )
+        else:
+            inputs = APIInput.model_validate_json(await request.body())
+    except ValidationError as e:
+        return exception_handler.handle_unprocessable_entity(str(e), {})
+    except Exception as e:
+        logger.error(f'Input decoding error: {e}')
+        return exception_handler.handle_bad_request(str(e), {})
+
     # --- Combined Input Validation ---
     try:
-        if not inputs.landmarks or not isinstance(inputs.landmarks, list):
+        if inputs.landmarks is None or len(inputs.landmarks) == 0:
             raise ValueError('Invalid or missing landmarks.')
         if inputs.img_width <= 0 or inputs.img_height <= 0:
             raise ValueError('Image dimensions must be greater than zero.')
@@ -119,15 +181,28 @@ async def cal_height(inputs: APIInput = Body(...)):
             raise ValueError(
                 'Pixels per centimeter must be greater than zero.',
             )
+        # Gom landmarks thành mảng (N, 33, 3), bù các điểm không được gửi
+        landmark_array = to_landmark_array(inputs.landmarks)
+        if inputs.landmark_indices is not None:
+            landmark_array = expand_landmarks(landmark_array, inputs.landmark_indices)
+        if landmark_array.shape[1] != NUM_LANDMARKS:
+            raise ValueError('Landmark subset sent without landmark indices.')
     except Exception as e:
         logger.error(f'Input validation error: {e}')
-        return exception_handler.handle_bad_request(str(e), jsonable_encoder(inputs))
+        return exception_handler.handle_bad_request(
+            str(e),
+            {
+                'img_width': inputs.img_width,
+                'img_height': inputs.img_height,
+                'px_per_cm': inputs.px_per_cm,
+            },
+        )
 
     # --- Main Processing ---
     try:
         response = await height_cal_model.process(
             inputs=CalHeightInput(
-                landmarks=inputs.landmarks,
+                landmarks=landmark_array,
                 img_width=inputs.img_width,
                 img_height=inputs.img_height,
                 px_per_cm=inputs.px_per_cm,
@@ -148,6 +223,10 @@ async def cal_height(inputs: APIInput = Body(...)):
         # logger.info('Cal Height processing completed successfully.')
         return exception_handler.handle_success(jsonable_encoder(api_output))
 
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={},
+        )
     except Exception as e:
         logger.exception(f'Error during Cal Height processing: {e}')
         return exception_handler.handle_exception(
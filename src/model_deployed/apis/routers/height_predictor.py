@@ -4,13 +4,15 @@ from apis.helper.exception_handler import ExceptionHandler
 from apis.helper.exception_handler import ResponseMessage
 from apis.models.height_predictor import APIInput
 from apis.models.height_predictor import APIOutput
+from app.model_container import get_model_container
+from common.deadline import DeadlineExceeded
+from common.executor import get_executor
 from common.logs import get_logger
 from common.utils import get_settings
 from fastapi import APIRouter
 from fastapi import Body
 from fastapi import status
 from fastapi.encoders import jsonable_encoder
-from infrastructure.height_predictor import HeightPredictorModel
 from infrastructure.height_predictor import HeightPredictorModelInput
 
 height_predictor = APIRouter(prefix='/v1')
@@ -20,7 +22,7 @@ settings = get_settings()
 # --- Load Model ---
 try:
     logger.info('Load model Height Predictor!!!')
-    height_pre_model = HeightPredictorModel.get_service(settings=settings)
+    height_pre_model = get_model_container().height_predictor
 except Exception as e:
     logger.error(f'Failed to initialize height predictor model: {e}')
     raise e
@@ -107,13 +109,18 @@ async def height_pre(inputs: APIInput = Body(...)):
 
     # --- Predict ---
     try:
-        response = height_pre_model.process(
-            inputs=HeightPredictorModelInput(x=inputs.x),
+        response = await get_executor('height_predictor').run(
+            height_pre_model.predict,
+            HeightPredictorModelInput(x=inputs.x),
         )
         api_output = APIOutput(pred=response.pred)
         logger.info('Height prediction completed.')
         return exception_handler.handle_success(jsonable_encoder(api_output))
 
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={},
+        )
     except Exception as e:
         logger.exception(f'Prediction error: {e}')
         return exception_handler.handle_exception(
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+from apis.helper.exception_handler import ExceptionHandler
+from apis.helper.exception_handler import ResponseMessage
+from apis.models.measure import APIOutput
+from apis.routers.box_detector import box_detector_model
+from apis.routers.height_caculator import height_cal_model
+from apis.routers.height_predictor import height_pre_model
+from apis.routers.pose_detector import pose_detector_model
+from app.measure import MeasureInput
+from app.measure import MeasureService
+from common.deadline import DeadlineExceeded
+from common.logs import get_logger
+from common.metrics import stage_timer
+from fastapi import APIRouter
+from fastapi import File
+from fastapi import status
+from fastapi import UploadFile
+from fastapi.encoders import jsonable_encoder
+
+measure = APIRouter(prefix='/v1')
+logger = get_logger(__name__)
+
+# Dùng lại các model đã load ở các router khác, không load thêm bản sao nào
+measure_service = MeasureService(
+    box_detector=box_detector_model,
+    pose_detector=pose_detector_model,
+    height_cal=height_cal_model,
+    height_predictor=height_pre_model,
+)
+
+
+@measure.post(
+    '/measure',
+    response_model=APIOutput,
+    responses={
+        status.HTTP_200_OK: {
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.SUCCESS,
+                        'info': {
+                            'heights': [170.2],
+                            'distances': [[5.0, 40.2, 45.1, 50.3, 20.4, 4.1, 13.3]],
+                            'px_per_cm': 3.83,
+                        },
+                    },
+                },
+            },
+        },
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Bad Request - Invalid image or nothing detected',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.BAD_REQUEST,
+                    },
+                },
+            },
+        },
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {
+            'description': 'Internal Server Error',
+            'content': {
+                'application/json': {
+                    'example': {
+                        'message': ResponseMessage.INTERNAL_SERVER_ERROR,
+                    },
+                },
+            },
+        },
+    },
+)
+async def measure_height(file: UploadFile = File(...)):
+    """
+    Runs the whole measurement pipeline (box -> pose -> calculate -> predict) in one request.
+
+    Args:
+        file (UploadFile): The input image file (e.g., JPEG, PNG).
+    Returns:
+        APIOutput: Predicted heights, body segment distances and px_per_cm.
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    try:
+        contents = await file.read()
+
+        # Decode ảnh đúng 1 lần, dùng chung cho cả box và pose
+        nparr = np.frombuffer(contents, np.uint8)
+        with stage_timer('decode'):
+            img_array = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if img_array is None:
+            return exception_handler.handle_bad_request(
+                err_msg='Invalid image format',
+                extra={'file_name': file.filename},
+            )
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'file_name': file.filename},
+        )
+    except Exception as e:
+        return exception_handler.handle_exception(
+            err_msg=f'Error while reading file: {e}',
+            extra={'file_name': file.filename},
+        )
+
+    try:
+        response = await measure_service.process(
+            inputs=MeasureInput(img=img_array),
+        )
+        api_output = APIOutput(
+            heights=response.heights,
+            distances=response.distances,
+            px_per_cm=response.px_per_cm,
+        )
+        return exception_handler.handle_success(jsonable_encoder(api_output))
+    except ValueError as e:
+        return exception_handler.handle_bad_request(
+            err_msg=f'Measure rejected: {e}',
+            extra={'input': file.filename},
+        )
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'input': file.filename},
+        )
+    except Exception as e:
+        return exception_handler.handle_exception(
+            err_msg=f'Error during Measure: {e}',
+            extra={'input': file.filename},
+        )
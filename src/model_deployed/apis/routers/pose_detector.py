@@ -1,19 +1,45 @@
 from __future__ import annotations
 
+import asyncio
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Union
+
 import cv2
 import numpy as np
 from apis.helper.exception_handler import ExceptionHandler
 from apis.helper.exception_handler import ResponseMessage
 from apis.models.pose_detector import APIOutput
+from app.model_container import get_model_container
+from common.deadline import DeadlineExceeded
 from common.logs import get_logger
+from common.metrics import stage_timer
+from common.result_cache import get_result_cache
+from common.result_cache import MISS
+from common.shm import read_shared_image
+from common.shm import SharedImage
 from common.utils import get_settings
+from common.wire import accepts_npy
+from common.wire import encode_npy
+from common.wire import format_landmark_indices
+from common.wire import IMG_HEIGHT_HEADER
+from common.wire import IMG_WIDTH_HEADER
+from common.wire import LANDMARK_INDICES_HEADER
+from common.wire import NPY_MEDIA_TYPE
+from common.wire import parse_landmark_indices
 from fastapi import APIRouter
+from fastapi import Depends
 from fastapi import File
+from fastapi import Header
+from fastapi import Path
+from fastapi import Query
+from fastapi import Response
 from fastapi import status
 from fastapi import UploadFile
 from fastapi.encoders import jsonable_encoder
-from infrastructure.pose_detector import PoseDetectorModel
 from infrastructure.pose_detector import PoseDetectorModelInput
+from infrastructure.pose_detector import PoseDetectorModelOutput
 
 pose_detector = APIRouter(prefix='/v1')
 logger = get_logger(__name__)
@@ -21,93 +47,159 @@ settings = get_settings()
 
 try:
     logger.info('Load mode Pose detector !!!')
-    pose_detector_model = PoseDetectorModel(settings=settings)
+    pose_detector_model = get_model_container().pose_detector
+    pose_detector_cache = get_result_cache('pose_detector', PoseDetectorModelOutput)
 except Exception as e:
     logger.error(f'Failed to initialize Pose embedding model: {e}')
     raise e  # stop and display full error message
 
 
-@pose_detector.post(
-    '/pose_detector',
-    response_model=APIOutput,
-    responses={
-        status.HTTP_200_OK: {
-            'content': {
-                'application/json': {
-                    'example': {
-                        'message': ResponseMessage.SUCCESS,
-                        'info': {
-                            'pose_landmarks': [
-                                [
-                                    {
-                                        'x': 0.5, 'y': 0.3, 'z': 0.1,
-                                        'visibility': 0.9,
-                                    },
-                                    {
-                                        'x': 0.6, 'y': 0.4, 'z': 0.2,
-                                        'visibility': 0.8,
-                                    },
-                                ],
+def make_response(
+    response: PoseDetectorModelOutput,
+    accept: Optional[str],
+    exception_handler: ExceptionHandler,
+) -> Response:
+    """npy response when the client accepts it, JSON envelope otherwise"""
+    if accepts_npy(accept):
+        # Trả mảng nhị phân, kích thước ảnh đi kèm trong header
+        headers = {
+            IMG_WIDTH_HEADER: str(response.img_width),
+            IMG_HEIGHT_HEADER: str(response.img_height),
+        }
+        if response.landmark_indices is not None:
+            headers[LANDMARK_INDICES_HEADER] = format_landmark_indices(response.landmark_indices)
+        return Response(
+            content=encode_npy(response.landmarks),
+            media_type=NPY_MEDIA_TYPE,
+            headers=headers,
+        )
+
+    # Tạo kết quả APIOutput và bao bọc trong 'info'
+    api_output = APIOutput(
+        pose_landmarks=response.pose_landmarks,
+        img_width=response.img_width,
+        img_height=response.img_height,
+        landmark_indices=response.landmark_indices,
+    )
+    return exception_handler.handle_success(jsonable_encoder(api_output))
+
+
+def decode_image(contents: bytes) -> Optional[np.ndarray]:
+    # Chuyển dữ liệu ảnh thành mảng numpy
+    nparr = np.frombuffer(contents, np.uint8)
+
+    # Giải mã ảnh thành định dạng OpenCV (BGR), None nếu không đọc được
+    with stage_timer('decode'):
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+
+# Dùng chung cho ảnh đơn lẻ và frame của session video
+POSE_RESPONSES: Dict[Union[int, str], Dict[str, Any]] = {
+    status.HTTP_200_OK: {
+        'content': {
+            'application/json': {
+                'example': {
+                    'message': ResponseMessage.SUCCESS,
+                    'info': {
+                        'pose_landmarks': [
+                            [
+                                {
+                                    'x': 0.5, 'y': 0.3, 'z': 0.1,
+                                    'visibility': 0.9,
+                                },
+                                {
+                                    'x': 0.6, 'y': 0.4, 'z': 0.2,
+                                    'visibility': 0.8,
+                                },
                             ],
-                            'img_width': 640,
-                            'img_height': 480,
-                        },
+                        ],
+                        'img_width': 640,
+                        'img_height': 480,
                     },
                 },
             },
+            NPY_MEDIA_TYPE: {
+                'schema': {
+                    'type': 'string',
+                    'format': 'binary',
+                    'description': (
+                        'float32 array (persons, landmarks, 4) holding x, y, z, '
+                        f'visibility; image size in {IMG_WIDTH_HEADER} / '
+                        f'{IMG_HEIGHT_HEADER}, subset in {LANDMARK_INDICES_HEADER}'
+                    ),
+                },
+            },
         },
-        status.HTTP_400_BAD_REQUEST: {
-            'description': 'Bad Request - Invalid image data',
-            'content': {
-                'application/json': {
-                    'example': {
-                        'message': ResponseMessage.BAD_REQUEST,
-                        'error': 'Invalid image format',
-                    },
+    },
+    status.HTTP_400_BAD_REQUEST: {
+        'description': 'Bad Request - Invalid image data',
+        'content': {
+            'application/json': {
+                'example': {
+                    'message': ResponseMessage.BAD_REQUEST,
+                    'error': 'Invalid image format',
                 },
             },
         },
-        status.HTTP_500_INTERNAL_SERVER_ERROR: {
-            'description': 'Internal Server Error',
-            'content': {
-                'application/json': {
-                    'example': {
-                        'message': ResponseMessage.INTERNAL_SERVER_ERROR,
-                        'error': 'Failed to process Pose detection',
-                    },
+    },
+    status.HTTP_500_INTERNAL_SERVER_ERROR: {
+        'description': 'Internal Server Error',
+        'content': {
+            'application/json': {
+                'example': {
+                    'message': ResponseMessage.INTERNAL_SERVER_ERROR,
+                    'error': 'Failed to process Pose detection',
                 },
             },
         },
-        status.HTTP_422_UNPROCESSABLE_ENTITY: {
-            'description': 'Unprocessable Entity - Format is not supported',
-            'content': {
-                'application/json': {
-                    'example': {
-                        'message': ResponseMessage.UNPROCESSABLE_ENTITY,
-                        'error': 'Unsupported image format',
-                    },
+    },
+    status.HTTP_422_UNPROCESSABLE_ENTITY: {
+        'description': 'Unprocessable Entity - Format is not supported',
+        'content': {
+            'application/json': {
+                'example': {
+                    'message': ResponseMessage.UNPROCESSABLE_ENTITY,
+                    'error': 'Unsupported image format',
                 },
             },
         },
-        status.HTTP_404_NOT_FOUND: {
-            'description': 'Destination Not Found',
-            'content': {
-                'application/json': {
-                    'example': {
-                        'message': ResponseMessage.NOT_FOUND,
-                        'error': 'Resource not found',
-                    },
+    },
+    status.HTTP_404_NOT_FOUND: {
+        'description': 'Destination Not Found',
+        'content': {
+            'application/json': {
+                'example': {
+                    'message': ResponseMessage.NOT_FOUND,
+                    'error': 'Resource not found',
                 },
             },
         },
     },
+}
+
+
+@pose_detector.post(
+    '/pose_detector',
+    response_model=APIOutput,
+    responses=POSE_RESPONSES,
 )
-async def pose_detect(file: UploadFile = File(...)):
+async def pose_detect(
+    file: Optional[UploadFile] = File(None),
+    landmarks: Optional[str] = Query(
+        None, description='Comma separated landmark indices to return, e.g. 0,9,10',
+    ),
+    accept: Optional[str] = Header(None),
+    shared_image: Optional[SharedImage] = Depends(read_shared_image),
+):
     """
     Detects Poses in the provided image file.
 
     Args:
-        file (UploadFile): The input image file for pose detection (e.g., JPEG, PNG).
+        file (Optional[UploadFile]): The input image file for pose detection (e.g., JPEG, PNG).
+        landmarks (Optional[str]): Subset of landmark indices to return, all 33 if omitted.
+        accept (Optional[str]): `application/x-npy` to receive the packed binary array.
+        shared_image (Optional[SharedImage]): Decoded image in a shared-memory segment,
+            given by the `X-Shm-Name`, `X-Shm-Shape` and `X-Shm-Dtype` headers instead of `file`.
     Returns:
         APIOutput: The output data containing detected pose landmarks and image dimensions.
     Raises:
@@ -117,42 +209,188 @@ async def pose_detect(file: UploadFile = File(...)):
         logger=logger.bind(), service_name=__name__,
     )
     try:
-        contents = await file.read()
+        landmark_indices = parse_landmark_indices(landmarks)
+    except ValueError as e:
+        return exception_handler.handle_bad_request(
+            err_msg=str(e), extra={'landmarks': landmarks},
+        )
 
-        # Chuyển dữ liệu ảnh thành mảng numpy
-        nparr = np.frombuffer(contents, np.uint8)
+    if shared_image is not None and not settings.transport.allow_shm:
+        return exception_handler.handle_bad_request(
+            err_msg='Shared memory transport is disabled',
+            extra={'shm_name': shared_image.name},
+        )
+    if shared_image is not None:
+        file_name: Optional[str] = shared_image.name
+    elif file is not None:
+        file_name = file.filename
+    else:
+        return exception_handler.handle_bad_request(
+            err_msg='An image file or a shared memory handle is required', extra={},
+        )
+
+    try:
+        if shared_image is not None:
+            # Ảnh đã decode sẵn trong shared memory: đọc thẳng, không copy, không decode
+            img_array = shared_image.open()
+            # băm ảnh thô (vài MB) ngoài event loop
+            cache_key = await asyncio.to_thread(
+                pose_detector_cache.key, img_array.data, img_array.shape, landmark_indices,
+            )
+        else:
+            assert file is not None
+            contents = await file.read()
+            cache_key = pose_detector_cache.key(contents, landmark_indices)
+
+        # Ảnh đã gửi trước đó -> trả luôn kết quả trong cache, không decode lại
+        response = await pose_detector_cache.get(cache_key)
+        if response is MISS and shared_image is None:
+            decoded = decode_image(contents)
+            if decoded is None:
+                return exception_handler.handle_bad_request(
+                    err_msg='Invalid image format',
+                    extra={'file_name': file_name},
+                )
+            img_array = decoded
+    except ValueError as e:
+        return exception_handler.handle_bad_request(
+            err_msg=str(e), extra={'file_name': file_name},
+        )
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'file_name': file_name},
+        )
+    except Exception as e:
+        return exception_handler.handle_exception(
+            err_msg=f'Error while reading file: {e}',
+            extra={'file_name': file_name},
+        )
+
+    try:
+        if response is MISS:
+            # Process image
+            response = await pose_detector_model.process(
+                inputs=PoseDetectorModelInput(
+                    img=img_array,
+                    landmark_indices=landmark_indices,
+                ),
+            )
+            await pose_detector_cache.set(cache_key, response)
 
-        # Giải mã ảnh thành định dạng OpenCV (BGR)
-        img_array = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        return make_response(response, accept, exception_handler)
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'input': file_name},
+        )
+    except Exception as e:
+        return exception_handler.handle_exception(
+            err_msg=f'Error during Pose detection: {e}',
+            extra={'input': file_name},
+        )
+
+
+@pose_detector.post(
+    '/pose_detector/session/{session_id}/frame',
+    response_model=APIOutput,
+    responses=POSE_RESPONSES,
+)
+async def pose_detect_frame(
+    session_id: str = Path(..., max_length=64, pattern=r'^[\w-]+$'),
+    file: UploadFile = File(...),
+    timestamp_ms: Optional[int] = Query(
+        None, ge=0, description='Frame timestamp, defaults to the time since the first frame',
+    ),
+    landmarks: Optional[str] = Query(
+        None, description='Comma separated landmark indices to return, e.g. 0,9,10',
+    ),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Detects Poses on the next frame of a video session.
+
+    The session is opened on its first frame and keeps a VIDEO mode landmarker
+    that tracks the person between frames, so person detection only reruns
+    when tracking is lost. Idle sessions are closed automatically.
+
+    Args:
+        session_id (str): Id of the camera feed.
+        file (UploadFile): The frame image (e.g., JPEG, PNG).
+        timestamp_ms (Optional[int]): Frame timestamp in milliseconds, must increase within a session.
+        landmarks (Optional[str]): Subset of landmark indices to return, all 33 if omitted.
+        accept (Optional[str]): `application/x-npy` to receive the packed binary array.
+    Returns:
+        APIOutput: The output data containing detected pose landmarks and image dimensions.
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    try:
+        landmark_indices = parse_landmark_indices(landmarks)
+    except ValueError as e:
+        return exception_handler.handle_bad_request(
+            err_msg=str(e), extra={'landmarks': landmarks},
+        )
+
+    try:
+        img_array = decode_image(await file.read())
         if img_array is None:
             return exception_handler.handle_bad_request(
                 err_msg='Invalid image format',
-                extra={'file_name': file.filename},
+                extra={'file_name': file.filename, 'session_id': session_id},
             )
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'session_id': session_id},
+        )
     except Exception as e:
         return exception_handler.handle_exception(
             err_msg=f'Error while reading file: {e}',
-            extra={'file_name': file.filename},
+            extra={'file_name': file.filename, 'session_id': session_id},
         )
 
     try:
-        # Process image
-        response = await pose_detector_model.process(
+        response = await pose_detector_model.process_frame(
+            session_id=session_id,
             inputs=PoseDetectorModelInput(
                 img=img_array,
+                landmark_indices=landmark_indices,
             ),
+            timestamp_ms=timestamp_ms,
         )
-
-        # Tạo kết quả APIOutput và bao bọc trong 'info'
-        api_output = APIOutput(
-            pose_landmarks=response.pose_landmarks,
-            img_width=response.img_width,
-            img_height=response.img_height,
+        return make_response(response, accept, exception_handler)
+    except DeadlineExceeded as e:
+        return exception_handler.handle_deadline_exceeded(
+            err_msg=str(e), extra={'session_id': session_id},
         )
-
-        return exception_handler.handle_success(jsonable_encoder(api_output))
     except Exception as e:
         return exception_handler.handle_exception(
             err_msg=f'Error during Pose detection: {e}',
-            extra={'input': file.filename},
+            extra={'session_id': session_id},
+        )
+
+
+@pose_detector.delete('/pose_detector/session/{session_id}')
+async def close_pose_session(session_id: str):
+    """
+    Closes a video session and releases its landmarker.
+
+    Args:
+        session_id (str): Id of the camera feed.
+    """
+    exception_handler = ExceptionHandler(
+        logger=logger.bind(), service_name=__name__,
+    )
+    try:
+        closed = await pose_detector_model.close_session(session_id)
+    except Exception as e:
+        return exception_handler.handle_exception(
+            err_msg=f'Error while closing pose session: {e}',
+            extra={'session_id': session_id},
+        )
+
+    if not closed:
+        return exception_handler.handle_not_found_error(
+            err_msg=f'Pose session {session_id} not found',
+            extra={'session_id': session_id},
         )
+    return exception_handler.handle_success({'session_id': session_id})
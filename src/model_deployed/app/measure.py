@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List
+
+import numpy as np
+from common.bases import AsyncBaseService
+from common.bases import BaseModel
+from common.executor import get_executor
+from common.logs.logs import get_logger
+from infrastructure.box_detector import BoxDetectorModel
+from infrastructure.box_detector import BoxDetectorModelInput
+from infrastructure.calculate import CalHeight
+from infrastructure.calculate import CalHeightInput
+from infrastructure.height_predictor import HeightPredictorModel
+from infrastructure.height_predictor import HeightPredictorModelInput
+from infrastructure.pose_detector import PoseDetectorModel
+
+logger = get_logger(__name__)
+
+# Mô hình dự đoán được huấn luyện trên 6 đoạn đầu (bỏ đoạn mũi → đỉnh đầu)
+NUM_PRED_FEATURES = 6
+
+
+class MeasureInput(BaseModel):
+    img: np.ndarray  # Ảnh BGR đã decode 1 lần duy nhất
+
+
+class MeasureOutput(BaseModel):
+    heights: List[float]            # Chiều cao dự đoán (cm) cho từng người
+    distances: List[List[float]]    # 7 đoạn cơ thể (cm) cho từng người
+    px_per_cm: float
+
+
+class MeasureService(AsyncBaseService):
+    """Run box detection, pose detection, height calculation and prediction in-process.
+
+    Every stage receives the objects produced by the previous one directly, so the
+    image is decoded once and no landmark or distance is serialized in between.
+    """
+    box_detector: BoxDetectorModel
+    pose_detector: PoseDetectorModel
+    height_cal: CalHeight
+    height_predictor: HeightPredictorModel
+
+    async def process(self, inputs: MeasureInput) -> MeasureOutput:
+        # Box và pose độc lập nhau -> chạy song song trên 2 pool riêng
+        box_out, pose_landmarks = await asyncio.gather(
+            self.box_detector.process(
+                inputs=BoxDetectorModelInput(img=inputs.img),
+            ),
+            get_executor('pose_detector').run(
+                self.pose_detector.forward, inputs.img,
+            ),
+        )
+        px_per_cm = float(box_out.pixel_per_cm)
+        if px_per_cm <= 0:
+            raise ValueError('No reference box detected.')
+        if not pose_landmarks:
+            raise ValueError('No pose landmarks detected.')
+
+        img_h, img_w = inputs.img.shape[:2]
+        cal_out = await self.height_cal.process(
+            inputs=CalHeightInput(
+                landmarks=self.pose_detector.pack_landmarks(pose_landmarks),
+                img_width=float(img_w),
+                img_height=float(img_h),
+                px_per_cm=px_per_cm,
+            ),
+        )
+
+        pred_out = await get_executor('height_predictor').run(
+            self.height_predictor.predict,
+            HeightPredictorModelInput(
+                x=[d[:NUM_PRED_FEATURES] for d in cal_out.distances],
+            ),
+        )
+        logger.info('Measure pipeline completed.', extra={'px_per_cm': px_per_cm})
+
+        return MeasureOutput(
+            heights=pred_out.pred,
+            distances=cal_out.distances,
+            px_per_cm=px_per_cm,
+        )
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from functools import lru_cache
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from common.bases import BaseModel
+from common.executor import get_executor
+from common.logs.logs import get_logger
+from common.metrics import MODEL_LOAD_SECONDS
+from common.metrics import MODEL_WARMUP_SECONDS
+from common.settings import Settings
+from common.utils import get_settings
+from infrastructure.box_detector import BoxDetectorModel
+from infrastructure.calculate import CalHeight
+from infrastructure.calculate import CalHeightInput
+from infrastructure.height_predictor import HeightPredictorModel
+from infrastructure.height_predictor import HeightPredictorModelInput
+from infrastructure.pose_detector import PoseDetectorModel
+
+logger = get_logger(__name__)
+
+# Tên model trùng với tên section settings / executor của model đó
+MODEL_NAMES = ('box_detector', 'pose_detector', 'height_calculator', 'height_predictor')
+
+
+class ModelStatus(BaseModel):
+    loaded: bool = False
+    load_time_s: Optional[float] = None     # lâu nhất trong các luồng inference
+    warmup_time_s: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ModelContainer:
+    """Owns the model services of model_deployed and prepares them at startup.
+
+    `start` loads every model concurrently, each on all worker threads of its
+    own inference executor (thread-local YOLO / MediaPipe instances included),
+    then runs `startup.warmup_runs` inferences on a synthetic frame so that
+    the first real request does not pay initialization and first-call costs.
+
+    Args:
+        settings (Settings): application settings
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.box_detector = BoxDetectorModel(settings=settings)
+        self.pose_detector = PoseDetectorModel(settings=settings)
+        self.height_cal = CalHeight.get_service(settings=settings)
+        self.height_predictor = HeightPredictorModel.get_service(settings=settings)
+        self.status: Dict[str, ModelStatus] = {name: ModelStatus() for name in MODEL_NAMES}
+        self.started = False
+        self.startup_time_s: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        if not self.settings.startup.preload:
+            # model load lười ở request đầu tiên như trước
+            return True
+        return self.started and all(
+            status.loaded and status.error is None for status in self.status.values()
+        )
+
+    def report(self) -> dict:
+        return {
+            'ready': self.ready,
+            'startup_time_s': self.startup_time_s,
+            'models': {name: status.model_dump() for name, status in self.status.items()},
+        }
+
+    async def start(self) -> None:
+        """Load and warm up every model, concurrently"""
+        start_time = time.perf_counter()
+        await asyncio.gather(*(self._prepare(name) for name in MODEL_NAMES))
+        self.startup_time_s = time.perf_counter() - start_time
+        self.started = True
+        logger.info('Model container started.', extra=self.report())
+
+    async def _prepare(self, name: str) -> None:
+        load_fn, warmup_fn = self._steps(name)
+        status = self.status[name]
+        try:
+            timings = await get_executor(name).run_on_all_workers(
+                self._timed, load_fn, warmup_fn, self.settings.startup.warmup_runs,
+            )
+        except Exception as e:
+            status.error = str(e)
+            logger.exception(f'Failed to load model {name}: {e}')
+            return
+
+        load_time_s = max(load for load, _ in timings)
+        warmup_time_s = max(warmup for _, warmup in timings)
+        status.loaded = True
+        status.load_time_s = load_time_s
+        status.warmup_time_s = warmup_time_s
+        MODEL_LOAD_SECONDS.labels(model=name).set(load_time_s)
+        MODEL_WARMUP_SECONDS.labels(model=name).set(warmup_time_s)
+
+    @staticmethod
+    def _timed(load_fn: Callable[[], object], warmup_fn: Callable[[], object], runs: int) -> Tuple[float, float]:
+        start_time = time.perf_counter()
+        load_fn()
+        loaded_time = time.perf_counter()
+        for _ in range(runs):
+            warmup_fn()
+        return loaded_time - start_time, time.perf_counter() - loaded_time
+
+    def _steps(self, name: str) -> Tuple[Callable[[], object], Callable[[], object]]:
+        startup = self.settings.startup
+        frame = np.full((startup.warmup_height, startup.warmup_width, 3), 114, dtype=np.uint8)
+        # 1 người đứng giữa khung hình, đủ để mọi đoạn cơ thể có độ dài khác 0
+        landmarks = np.random.default_rng(0).uniform(0.2, 0.8, size=(1, 33, 3)).astype(np.float32)
+
+        if name == 'box_detector':
+            return (
+                lambda: self.box_detector.model_loaded,
+                lambda: self.box_detector.forward(frame, self.settings.box_detector.conf),
+            )
+        if name == 'pose_detector':
+            return (
+                lambda: self.pose_detector.model_loaded,
+                lambda: self.pose_detector.forward(frame),
+            )
+        if name == 'height_calculator':
+            return (
+                lambda: None,
+                lambda: self.height_cal.compute(
+                    CalHeightInput(
+                        landmarks=landmarks,
+                        img_width=float(startup.warmup_width),
+                        img_height=float(startup.warmup_height),
+                        px_per_cm=1.0,
+                    ),
+                ),
+            )
+        if name == 'height_predictor':
+            return (
+                lambda: self.height_predictor.model_loaded,
+                lambda: self.height_predictor.process(
+                    HeightPredictorModelInput(x=[[10.0, 40.0, 45.0, 50.0, 20.0, 5.0]]),
+                ),
+            )
+        raise ValueError(f'Unknown model: {name}')
+
+
+@lru_cache
+def get_model_container() -> ModelContainer:
+    return ModelContainer(settings=get_settings())
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+from functools import lru_cache
+from typing import Dict
+from typing import List
+
+from common.logs import get_logger
+from common.utils import get_settings
+
+logger = get_logger(__name__)
+
+
+class AdmissionLimiter:
+    """Bounds the requests of one model endpoint before their upload is read.
+
+    At most `max_concurrent` requests are admitted at the same time and at
+    most `max_waiting` more wait, for up to `max_wait_s` seconds, for one of
+    them to finish. Any other request is rejected at once, so a burst is
+    answered with 503 instead of buffering every image behind the models.
+
+    Args:
+        name (str): settings section of the model
+        max_concurrent (int): number of requests processed at the same time
+        max_waiting (int): number of requests allowed to wait for admission
+        max_wait_s (float): how long a waiting request may wait
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_waiting: int, max_wait_s: float) -> None:
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_waiting = max(0, max_waiting)
+        self.max_wait_s = max(0.0, max_wait_s)
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.active = 0
+        self.waiting = 0
+
+    async def acquire(self) -> bool:
+        """Admit the request, False if it must be shed"""
+        if not self._slots.locked():
+            # còn slot: acquire trả về ngay, không nhường event loop
+            await self._slots.acquire()
+        elif self.waiting >= self.max_waiting:
+            return False
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.max_wait_s)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._slots.release()
+
+
+@lru_cache(maxsize=None)
+def get_admission_limiter(name: str) -> AdmissionLimiter:
+    """Admission limiter of the model `name`, sized from `<name>.max_concurrent`
+    and `<name>.max_waiting`"""
+    settings = get_settings()
+    model_settings = getattr(settings, name)
+    return AdmissionLimiter(
+        name=name,
+        max_concurrent=model_settings.max_concurrent,
+        max_waiting=model_settings.max_waiting,
+        max_wait_s=settings.admission.max_wait_s,
+    )
+
+
+def list_admission_limiters() -> List[AdmissionLimiter]:
+    return [get_admission_limiter(name) for name in admission_routes().values()]
+
+
+def admission_routes() -> Dict[str, str]:
+    """Path prefix of the model endpoints -> settings section of their limiter"""
+    return {
+        '/v1/box_detector': 'box_detector',
+        '/v1/pose_detector': 'pose_detector',
+        '/v1/height_cal': 'height_calculator',
+        '/v1/height_pred': 'height_predictor',
+        # /v1/measure chạy cả pipeline, bắt đầu bằng YOLO: tính chung giới hạn của box_detector
+        '/v1/measure': 'box_detector',
+    }
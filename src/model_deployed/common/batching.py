@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from common.deadline import DeadlineExceeded
+from common.deadline import expired
+from common.deadline import set_deadline
+from common.logs import get_logger
+from common.tracing import current_span
+from common.tracing import span
+
+logger = get_logger(__name__)
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-item requests into one batched call.
+
+    Every `submit` puts its item on a queue and awaits a future. A background
+    task takes the first waiting item, keeps collecting until `max_batch_size`
+    items are gathered or `max_wait_ms` has elapsed, runs `batch_fn` once on
+    the whole batch and routes each result back to its caller.
+
+    Args:
+        batch_fn: coroutine function mapping a list of items to a list of
+            results of the same length and order.
+        max_batch_size (int): maximum number of items per batched call.
+        max_wait_ms (float): how long the first item of a batch may wait for
+            others to join.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int,
+        max_wait_ms: float,
+    ) -> None:
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # worker không kế thừa context (request id, trace) của request đầu tiên
+            self._worker = loop.create_task(self._run(), context=contextvars.Context())
+        assert self._queue is not None
+        return self._queue
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result from the next batch"""
+        queue = self._ensure_worker()
+        with span('batch_wait'):
+            future = asyncio.get_running_loop().create_future()
+            await queue.put((item, future, contextvars.copy_context()))
+            return await future
+
+    async def _collect(self, queue: asyncio.Queue) -> List[Tuple[Any, asyncio.Future, contextvars.Context]]:
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # bỏ các request mà client đã huỷ trong lúc chờ gom batch và các request đã hết deadline
+        live = []
+        for item, fut, ctx in batch:
+            if fut.done():
+                continue
+            if ctx.run(expired):
+                fut.set_exception(DeadlineExceeded('Deadline exceeded while waiting for a batch'))
+                continue
+            live.append((item, fut, ctx))
+        return live
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            batch = await self._collect(queue)
+            if not batch:
+                continue
+
+            items = [item for item, _, _ in batch]
+            # chạy batch trong context của request mở batch: span forward gắn vào trace của nó,
+            # nhưng không theo deadline của nó: batch còn phục vụ các request khác
+            ctx = batch[0][2].copy()
+            ctx.run(set_deadline, None)
+            try:
+                results = await asyncio.get_running_loop().create_task(
+                    self._call_batch(items), context=ctx,
+                )
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f'Batch function returned {len(results)} results for {len(items)} items',
+                    )
+            except Exception as e:
+                logger.exception(f'Batched call failed: {e}')
+                for _, fut, _ in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            for (_, fut, _), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+    async def _call_batch(self, items: List[Any]) -> List[Any]:
+        batch_span = current_span()
+        if batch_span is not None:
+            batch_span.set_attribute('batch_size', len(items))
+        return await self.batch_fn(items)
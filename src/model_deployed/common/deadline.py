@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+from contextvars import Token
+from typing import Dict
+from typing import Optional
+
+# Thời điểm hết hạn của request: unix timestamp (giây), logic_app và model_deployed chạy cùng đồng hồ
+DEADLINE = 'X-Request-Deadline'
+
+_deadline: ContextVar[Optional[float]] = ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time budget, its remaining work is skipped"""
+
+
+def parse_deadline(value: Optional[str]) -> Optional[float]:
+    """Deadline carried by a `X-Request-Deadline` header, None if missing or invalid"""
+    if value is None:
+        return None
+    try:
+        deadline = float(value)
+    except ValueError:
+        return None
+    return deadline if deadline > 0 else None
+
+
+def set_deadline(deadline: Optional[float]) -> Token:
+    return _deadline.set(deadline)
+
+
+def reset_deadline(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def get_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline of the current request, None without deadline"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.time()
+
+
+def expired() -> bool:
+    budget = remaining()
+    return budget is not None and budget <= 0
+
+
+def check_deadline(stage: str = '') -> None:
+    """Raise `DeadlineExceeded` instead of starting `stage` once the budget is spent"""
+    budget = remaining()
+    if budget is not None and budget <= 0:
+        raise DeadlineExceeded(f'Deadline exceeded by {-budget:.3f}s before {stage or "next stage"}')
+
+
+def deadline_headers(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Copy of `headers` carrying the deadline of the current request"""
+    headers = dict(headers or {})
+    deadline = _deadline.get()
+    if deadline is not None:
+        headers[DEADLINE] = f'{deadline:.6f}'
+    return headers
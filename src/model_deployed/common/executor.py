@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Optional
+
+from common.deadline import check_deadline
+from common.logs import get_logger
+from common.profiling import run_profiled
+from common.utils import get_settings
+
+logger = get_logger(__name__)
+
+
+class InferenceExecutor:
+    """Bounded worker pool running blocking model calls off the asyncio event loop.
+
+    At most `max_workers` calls run at the same time and at most `max_queue`
+    more wait for a free worker. Callers beyond that suspend in `run` until a
+    slot frees up, so a burst of requests is held back instead of piling up
+    unbounded work behind the pool.
+
+    Args:
+        name (str): name of the model served by the pool, used for thread names
+        max_workers (int): number of worker threads
+        max_queue (int): number of calls allowed to wait for a worker
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int) -> None:
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f'infer-{name}',
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls running or waiting for a worker"""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls waiting for a worker"""
+        return max(0, self._in_flight - self.max_workers)
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.capacity)
+        return self._slots
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run `fn(*args, **kwargs)` on the pool and await its result
+
+        The call keeps the caller's context variables (request id bound to
+        the logger, trace, profile session of the request, ...). It raises
+        `DeadlineExceeded` instead of running once the deadline of the
+        request has passed, also after waiting for a worker.
+        """
+        check_deadline(self.name)
+        async with self._get_slots():
+            self._in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                ctx = contextvars.copy_context()
+                call = functools.partial(ctx.run, self._call, fn, *args, **kwargs)
+                return await loop.run_in_executor(self._pool, call)
+            finally:
+                self._in_flight -= 1
+
+    def _call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        # kiểm tra lại trong worker: call có thể đã chờ lâu trong hàng đợi của pool
+        check_deadline(self.name)
+        return run_profiled(fn, *args, **kwargs)
+
+    async def run_on_all_workers(self, fn: Callable[..., Any], *args: Any, timeout: float = 600.0) -> List[Any]:
+        """Run `fn(*args)` once on every worker thread of the pool
+
+        Used to load and warm up thread-local models before the first request.
+        Every call waits for the others before returning its worker, so no
+        worker runs `fn` twice while another one is skipped.
+
+        Returns:
+            List[Any]: results of the `max_workers` calls
+        """
+        barrier = threading.Barrier(self.max_workers)
+
+        def call() -> Any:
+            try:
+                result = fn(*args)
+            except BaseException:
+                barrier.abort()
+                raise
+            barrier.wait(timeout=timeout)
+            return result
+
+        results = await asyncio.gather(
+            *(self.run(call) for _ in range(self.max_workers)), return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            # ưu tiên lỗi gốc thay vì BrokenBarrierError của các luồng đang chờ
+            raise next(
+                (e for e in errors if not isinstance(e, threading.BrokenBarrierError)), errors[0],
+            )
+        return results
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executors: dict[str, InferenceExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str) -> InferenceExecutor:
+    """Return the shared executor of a model
+
+    Args:
+        name (str): settings section of the model (box_detector, pose_detector,
+            height_calculator, height_predictor)
+
+    Returns:
+        InferenceExecutor: executor sized from `<name>.workers` and `<name>.max_queue`
+    """
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            model_settings = getattr(get_settings(), name)
+            logger.info(
+                f'Create inference executor {name}',
+                extra={'workers': model_settings.workers, 'max_queue': model_settings.max_queue},
+            )
+            executor = InferenceExecutor(
+                name=name,
+                max_workers=model_settings.workers,
+                max_queue=model_settings.max_queue,
+            )
+            _executors[name] = executor
+        return executor
+
+
+def list_executors() -> List[InferenceExecutor]:
+    """Executors created so far, read by the metrics collector"""
+    with _executors_lock:
+        return list(_executors.values())
+
+
+def shutdown_executors() -> None:
+    """Stop every executor created through `get_executor`, called on shutdown"""
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
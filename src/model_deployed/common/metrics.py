@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from common.admission import list_admission_limiters
+from common.deadline import check_deadline
+from common.executor import list_executors
+from common.tracing import span
+from common.utils import get_settings
+from prometheus_client import Counter
+from prometheus_client import Gauge
+from prometheus_client import Histogram
+from prometheus_client import REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+# Bucket (s) đủ rộng cho cả bước vài ms (NMS, CalHeight) lẫn YOLO trên CPU
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _shared(metric_type, name: str, *args, **kwargs):
+    """Create a metric, or reuse the one of the same name already registered:
+    logic_app declares the same HTTP and stage metrics when it runs the models
+    in its own process (pipeline.transport=inprocess)"""
+    existing = REGISTRY._names_to_collectors.get(name)
+    if isinstance(existing, metric_type):
+        return existing
+    return metric_type(name, *args, **kwargs)
+
+
+REQUESTS = _shared(
+    Counter, 'http_requests_total', 'HTTP requests handled', ['method', 'route', 'status'],
+)
+REQUEST_LATENCY = _shared(
+    Histogram, 'http_request_duration_seconds', 'HTTP request latency', ['method', 'route'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = _shared(
+    Gauge, 'http_requests_in_flight', 'HTTP requests being handled',
+)
+STAGE_LATENCY = _shared(
+    Histogram, 'stage_duration_seconds', 'Latency of one processing stage', ['stage', 'mode'],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    'admission_rejected_total', 'Requests shed with 503 by admission control', ['model'],
+)
+MODEL_LOAD_SECONDS = Gauge(
+    'model_load_seconds', 'Time to load a model on every inference thread', ['model'],
+)
+MODEL_WARMUP_SECONDS = Gauge(
+    'model_warmup_seconds', 'Time of the warmup inferences of a model', ['model'],
+)
+MODEL_MODE = Gauge(
+    'model_mode_info', 'Configured model modes',
+    ['height_calculator_mode', 'height_predictor_mode', 'box_detector_backend'],
+)
+
+
+@contextmanager
+def stage_timer(stage: str, mode: str = '') -> Iterator[None]:
+    """Observe the duration of the wrapped block in `stage_duration_seconds`
+    and record it as a span of the current trace. The stage is not started
+    once the deadline of the request has passed"""
+    check_deadline(stage)
+    start_time = time.perf_counter()
+    try:
+        with span(stage, mode=mode):
+            yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage, mode=mode).observe(time.perf_counter() - start_time)
+
+
+class ExecutorCollector(Collector):
+    """Reads the in-flight calls and queue depth of the inference executors at scrape time"""
+
+    def collect(self):
+        in_flight = GaugeMetricFamily(
+            'inference_executor_in_flight', 'Calls running or waiting on an inference executor',
+            labels=['executor'],
+        )
+        queue_depth = GaugeMetricFamily(
+            'inference_executor_queue_depth', 'Calls waiting for a free inference thread',
+            labels=['executor'],
+        )
+        capacity = GaugeMetricFamily(
+            'inference_executor_capacity', 'Workers plus queue slots of an inference executor',
+            labels=['executor'],
+        )
+        for executor in list_executors():
+            in_flight.add_metric([executor.name], executor.in_flight)
+            queue_depth.add_metric([executor.name], executor.queue_depth)
+            capacity.add_metric([executor.name], executor.capacity)
+        yield in_flight
+        yield queue_depth
+        yield capacity
+
+
+class AdmissionCollector(Collector):
+    """Reads the admitted and waiting requests of every model endpoint at scrape time"""
+
+    def collect(self):
+        active = GaugeMetricFamily(
+            'admission_active', 'Requests admitted on a model endpoint', labels=['model'],
+        )
+        waiting = GaugeMetricFamily(
+            'admission_waiting', 'Requests waiting for admission on a model endpoint', labels=['model'],
+        )
+        for limiter in {limiter.name: limiter for limiter in list_admission_limiters()}.values():
+            active.add_metric([limiter.name], limiter.active)
+            waiting.add_metric([limiter.name], limiter.waiting)
+        yield active
+        yield waiting
+
+
+_collectors_registered = False
+
+
+def setup_metrics() -> None:
+    """Register the collectors that read the app state, called once at startup"""
+    global _collectors_registered
+    settings = get_settings()
+    MODEL_MODE.labels(
+        height_calculator_mode=settings.height_calculator.mode,
+        height_predictor_mode=settings.height_predictor.mode,
+        box_detector_backend=settings.box_detector.backend,
+    ).set(1)
+    if not _collectors_registered:
+        REGISTRY.register(ExecutorCollector())
+        REGISTRY.register(AdmissionCollector())
+        _collectors_registered = True
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from typing import Type
+
+import numpy as np
+from common.logs import get_logger
+from common.utils import get_settings
+from pydantic import BaseModel
+
+logger = get_logger(__name__)
+
+# Giá trị trả về khi không có kết quả trong cache (None có thể là kết quả hợp lệ)
+MISS = object()
+# dọn tầng đĩa (file hết hạn, vượt quá số file tối đa) sau mỗi chừng này lần ghi
+DISK_SWEEP_EVERY = 64
+
+
+class ResultCache:
+    """Cache of model results keyed by a hash of the uploaded bytes.
+
+    Entries live in a bounded in-memory LRU and expire after `ttl_s` seconds.
+    When `disk_dir` is set, results are also written to disk as JSON so they
+    survive eviction and restarts; the disk tier is read and written off the
+    event loop. It keeps at most `max_disk_entries` files: every
+    `DISK_SWEEP_EVERY` writes, expired files and the oldest ones over the
+    limit are deleted. Hit, miss and eviction counters are kept for
+    monitoring. A disabled cache misses every lookup and stores nothing.
+
+    Args:
+        name (str): name of the cached model, used for the disk sub-directory
+        version (str): model and settings version, part of every key
+        max_entries (int): maximum number of results kept in memory
+        ttl_s (float): time to live of a result in seconds, 0 to never expire
+        disk_dir (Optional[str]): directory of the on-disk tier, None to disable it
+        enabled (bool): whether results are cached at all
+        max_disk_entries (int): maximum number of results kept on disk
+        model_type (Optional[Type[BaseModel]]): type of the cached results,
+            to read them back from disk; None for plain JSON values
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        max_entries: int,
+        ttl_s: float,
+        disk_dir: Optional[str] = None,
+        enabled: bool = True,
+        max_disk_entries: int = 10000,
+        model_type: Optional[Type[BaseModel]] = None,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self.version = version
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.max_disk_entries = max(1, max_disk_entries)
+        self.model_type = model_type
+        self.disk_dir = Path(disk_dir) / name if disk_dir and enabled else None
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        self._disk_writes = 0
+
+    def key(self, data: bytes, *params: Any) -> str:
+        """Key of a result: blake2b of the input bytes, the cache version and the request params"""
+        digest = hashlib.blake2b(data, digest_size=16)
+        digest.update(self.version.encode())
+        digest.update(repr(params).encode())
+        return digest.hexdigest()
+
+    async def get(self, key: str) -> Any:
+        """Cached result for `key`, or `MISS`"""
+        if not self.enabled:
+            return MISS
+
+        value = self._get_memory(key)
+        if value is MISS and self.disk_dir is not None:
+            value = await asyncio.to_thread(self._get_disk, key)
+            if value is not MISS:
+                self._set_memory(key, value)
+                self.disk_hits += 1
+
+        if value is MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        self._set_memory(key, value)
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._set_disk, key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'disk_evictions': self.disk_evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_s > 0 and time.monotonic() - stored_at > self.ttl_s
+
+    def _get_memory(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            stored_at, value = entry
+            if self._expired(stored_at):
+                del self._entries[key]
+                return MISS
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_memory(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / f'{key}.json'
+
+    def _disk_expired(self, mtime: float) -> bool:
+        # TTL của tầng đĩa tính theo thời điểm ghi file
+        return self.ttl_s > 0 and time.time() - mtime > self.ttl_s
+
+    def _encode(self, value: Any) -> Dict[str, Any]:
+        if not isinstance(value, BaseModel):
+            return {'value': value}
+        # mảng numpy lưu kèm dtype và shape để đọc lại đúng kiểu
+        fields: Dict[str, Any] = {}
+        arrays: Dict[str, Any] = {}
+        for name in type(value).model_fields:
+            field = getattr(value, name)
+            if isinstance(field, np.ndarray):
+                arrays[name] = {'dtype': field.dtype.str, 'shape': field.shape, 'data': field.ravel().tolist()}
+            else:
+                fields[name] = field
+        return {'fields': fields, 'arrays': arrays}
+
+    def _decode(self, data: Dict[str, Any]) -> Any:
+        if 'value' in data:
+            return data['value']
+        if self.model_type is None:
+            raise ValueError('no result type to read the cached model output')
+        fields = dict(data['fields'])
+        for name, array in data['arrays'].items():
+            fields[name] = np.array(array['data'], dtype=np.dtype(array['dtype'])).reshape(array['shape'])
+        return self.model_type.model_validate(fields)
+
+    def _get_disk(self, key: str) -> Any:
+        path = self._disk_path(key)
+        try:
+            if self._disk_expired(path.stat().st_mtime):
+                path.unlink(missing_ok=True)
+                return MISS
+            with open(path, encoding='utf-8') as file:
+                return self._decode(json.load(file))
+        except FileNotFoundError:
+            return MISS
+        except Exception as e:
+            logger.warning(f'Failed to read cached result {path}: {e}')
+            return MISS
+
+    def _set_disk(self, key: str, value: Any) -> None:
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self._encode(value), file)
+            # ghi file tạm rồi đổi tên để request khác không đọc phải file ghi dở
+            tmp_path.replace(path)
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            logger.warning(f'Failed to write cached result {path}: {e}')
+
+        with self._lock:
+            self._disk_writes += 1
+            sweep = self._disk_writes % DISK_SWEEP_EVERY == 1
+        if sweep:
+            self._sweep_disk()
+
+    def _sweep_disk(self) -> None:
+        """Delete the expired files, the files of older formats and the
+        oldest files over `max_disk_entries`"""
+        assert self.disk_dir is not None
+        entries = []
+        for path in self.disk_dir.iterdir():
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if path.suffix == '.json' and not self._disk_expired(mtime):
+                entries.append((mtime, path))
+            elif path.suffix != '.tmp' or time.time() - mtime > 60:
+                # file .pkl cũ, file hết hạn, file tạm bị bỏ dở
+                path.unlink(missing_ok=True)
+                self.disk_evictions += 1
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_disk_entries)]:
+            path.unlink(missing_ok=True)
+            self.disk_evictions += 1
+
+
+def settings_version(name: str) -> str:
+    """Version of the cached results of a model: hash of its settings section
+    and of the size and modification time of its weights file
+
+    Changing the weights, thresholds or any other setting of the model
+    therefore invalidates its cached results, in memory and on disk.
+    """
+    section = getattr(get_settings(), name)
+    digest = hashlib.blake2b(f'{name}:{section.model_dump_json()}'.encode(), digest_size=8)
+    model_path = getattr(section, 'model_path', None)
+    if model_path and os.path.exists(model_path):
+        stat = os.stat(model_path)
+        digest.update(f'{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()
+
+
+_caches: Dict[str, ResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(name: str, model_type: Optional[Type[BaseModel]] = None) -> ResultCache:
+    """Result cache of the model `name`, created on first use
+
+    `model_type` is the output type of the model, needed to read its results
+    back from the disk tier; callers only reading stats can omit it.
+    """
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            settings = get_settings().result_cache
+            cache = _caches[name] = ResultCache(
+                name=name,
+                version=settings_version(name),
+                max_entries=settings.max_entries,
+                ttl_s=settings.ttl_s,
+                disk_dir=settings.disk_dir,
+                enabled=settings.enabled,
+                max_disk_entries=settings.max_disk_entries,
+            )
+        if model_type is not None:
+            cache.model_type = model_type
+        return cache
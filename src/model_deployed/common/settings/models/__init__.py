@@ -1,8 +1,15 @@
 from __future__ import annotations
 
+from .admission import AdmissionSettings
 from .box_detector import BoxDetectorSettings
+from .deadline import DeadlineSettings
 from .height_calculator import HeightCalculatorSettings
 from .height_predictor import HeightPredictorSettings
 from .pose_detector import PoseDetectorSettings
+from .profiling import ProfilingSettings
+from .result_cache import ResultCacheSettings
+from .startup import StartupSettings
+from .tracing import TracingSettings
+from .transport import TransportSettings
 
-__all__ = ['BoxDetectorSettings', 'HeightPredictorSettings', 'PoseDetectorSettings', 'HeightCalculatorSettings']
+__all__ = ['BoxDetectorSettings', 'HeightPredictorSettings', 'PoseDetectorSettings', 'HeightCalculatorSettings', 'StartupSettings', 'ResultCacheSettings', 'TransportSettings', 'TracingSettings', 'ProfilingSettings', 'AdmissionSettings', 'DeadlineSettings']
@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class AdmissionSettings(BaseModel):
+    enabled: bool = True            # giới hạn số request của mỗi model trước khi đọc ảnh upload
+    max_wait_s: float = 2.0         # thời gian tối đa 1 request chờ được nhận, quá hạn trả 503
+    retry_after_s: int = 1          # giá trị header Retry-After của response 503
@@ -1,9 +1,35 @@
 from __future__ import annotations
 
+from typing import Optional
+
 from common.bases import BaseModel
+from pydantic import field_validator
+
+BOX_DETECTOR_BACKENDS = ('torch', 'onnx')
 
 
 class BoxDetectorSettings(BaseModel):
     model_path: str
     conf: float
+    iou_threshold: float = 0.5      # ngưỡng IoU của NMS
+    max_det: int = 300              # số box tối đa giữ lại mỗi ảnh
     base_h: float = 30.5
+    max_batch_size: int = 8         # số ảnh tối đa gom vào 1 lần gọi YOLO (<= 1: tắt gom batch)
+    batch_window_ms: float = 5.0    # thời gian tối đa chờ gom batch (ms)
+    workers: int = 1                # số luồng chạy YOLO (mỗi luồng giữ 1 bản model)
+    max_queue: int = 32             # số lần gọi được phép chờ luồng rảnh
+    max_concurrent: int = 16        # số request được nhận xử lý cùng lúc (kể cả /v1/measure)
+    max_waiting: int = 16           # số request được chờ nhận, vượt quá trả 503 ngay
+    backend: str = 'torch'          # torch (ultralytics) hoặc onnx (onnxruntime, không cần torch)
+    onnx_path: Optional[str] = None  # mặc định: model_path đổi đuôi .onnx, tự export nếu chưa có
+    imgsz: int = 640                # kích thước ảnh vào của graph ONNX
+    intra_op_threads: int = 0       # số luồng trong 1 phép toán ONNX (0: onnxruntime tự chọn)
+    inter_op_threads: int = 1       # số luồng chạy song song các nhánh của graph ONNX
+
+    @field_validator('backend')
+    @classmethod
+    def check_backend(cls, value: str) -> str:
+        # sai chính tả (ONNX, onxx, ...) không được âm thầm chạy torch
+        if value not in BOX_DETECTOR_BACKENDS:
+            raise ValueError(f'Unknown box detector backend {value}, expected one of {BOX_DETECTOR_BACKENDS}')
+        return value
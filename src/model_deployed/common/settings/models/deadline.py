@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class DeadlineSettings(BaseModel):
+    enabled: bool = True                 # áp deadline cho mọi request (header X-Request-Deadline hoặc mặc định)
+    default_timeout_s: float = 30.0      # ngân sách thời gian khi client không gửi deadline
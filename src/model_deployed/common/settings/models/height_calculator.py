@@ -5,3 +5,7 @@ from common.bases import BaseModel
 
 class HeightCalculatorSettings(BaseModel):
     mode: str
+    workers: int = 2
+    max_queue: int = 64
+    max_concurrent: int = 32        # số request được nhận xử lý cùng lúc
+    max_waiting: int = 64           # số request được chờ nhận, vượt quá trả 503 ngay
@@ -9,3 +9,7 @@ class HeightPredictorSettings(BaseModel):
     model_path_linear_torch: str
     model_path_height_net: str
     mode: str
+    workers: int = 1
+    max_queue: int = 64
+    max_concurrent: int = 32        # số request được nhận xử lý cùng lúc
+    max_waiting: int = 64           # số request được chờ nhận, vượt quá trả 503 ngay
@@ -7,3 +7,9 @@ class PoseDetectorSettings(BaseModel):
     model_path: str
     output_segmentation_masks: bool = False
     num_poses: int = 1
+    workers: int = 2                # số luồng chạy MediaPipe (mỗi luồng giữ 1 PoseLandmarker)
+    max_queue: int = 32             # số lần gọi được phép chờ luồng rảnh
+    max_concurrent: int = 8         # số request được nhận xử lý cùng lúc
+    max_waiting: int = 16           # số request được chờ nhận, vượt quá trả 503 ngay
+    session_idle_s: float = 60.0    # đóng session video sau bấy nhiêu giây không có frame
+    max_sessions: int = 16          # số session video mở cùng lúc (mỗi session giữ 1 PoseLandmarker)
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from common.bases import BaseModel
+
+
+class ResultCacheSettings(BaseModel):
+    enabled: bool = True
+    max_entries: int = 256          # số kết quả giữ trong bộ nhớ cho mỗi model (LRU)
+    ttl_s: float = 600.0            # thời gian sống của một kết quả (giây, 0: không hết hạn)
+    disk_dir: Optional[str] = None  # thư mục lưu thêm kết quả xuống đĩa (None: chỉ dùng RAM)
+    max_disk_entries: int = 10000   # số kết quả tối đa trên đĩa cho mỗi model, file cũ nhất bị xoá trước
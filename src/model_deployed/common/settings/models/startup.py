@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class StartupSettings(BaseModel):
+    preload: bool = True            # load toàn bộ model lúc khởi động thay vì ở request đầu tiên
+    warmup_runs: int = 1            # số lần chạy thử trên ảnh giả sau khi load (0: bỏ qua)
+    warmup_width: int = 640         # kích thước ảnh giả dùng để warmup
+    warmup_height: int = 480
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class TracingSettings(BaseModel):
+    enabled: bool = False                          # bật ghi span cho từng request
+    service_name: str = 'model_deployed'           # tên process trên timeline
+    export_path: str = 'traces/model_deployed.trace.json'
+    format: str = 'chrome'                         # chrome (Perfetto, chrome://tracing) hoặc jsonl
+    sample_ratio: float = 1.0                      # tỉ lệ trace mới được ghi (trace từ logic_app theo cờ sampled)
@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+from common.bases import BaseModel
+
+
+class TransportSettings(BaseModel):
+    # Cho phép logic_app chạy cùng máy gửi ảnh qua shared memory thay vì upload JPEG
+    allow_shm: bool = False
@@ -4,10 +4,17 @@ from dotenv import find_dotenv
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
+from .models import AdmissionSettings
 from .models import BoxDetectorSettings
+from .models import DeadlineSettings
 from .models import HeightCalculatorSettings
 from .models import HeightPredictorSettings
 from .models import PoseDetectorSettings
+from .models import ProfilingSettings
+from .models import ResultCacheSettings
+from .models import StartupSettings
+from .models import TracingSettings
+from .models import TransportSettings
 # test in local
 load_dotenv(find_dotenv('.env'), override=True)
 
@@ -17,6 +24,13 @@ class Settings(BaseSettings):
     height_predictor: HeightPredictorSettings
     height_calculator: HeightCalculatorSettings
     pose_detector: PoseDetectorSettings
+    startup: StartupSettings = StartupSettings()
+    result_cache: ResultCacheSettings = ResultCacheSettings()
+    transport: TransportSettings = TransportSettings()
+    tracing: TracingSettings = TracingSettings()
+    profiling: ProfilingSettings = ProfilingSettings()
+    admission: AdmissionSettings = AdmissionSettings()
+    deadline: DeadlineSettings = DeadlineSettings()
 
     class Config:
         env_nested_delimiter = '__'
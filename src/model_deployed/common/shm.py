@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+from fastapi import Header
+
+# Ảnh đã decode sẵn trong shared memory của logic_app (chạy cùng máy): chỉ gửi handle
+SHM_NAME_HEADER = 'X-Shm-Name'
+SHM_SHAPE_HEADER = 'X-Shm-Shape'
+SHM_DTYPE_HEADER = 'X-Shm-Dtype'
+
+
+def parse_shape(shape: Optional[str]) -> Tuple[int, int, int]:
+    """`'480,640,3'` → (480, 640, 3), only BGR images are accepted"""
+    try:
+        dims = tuple(int(dim) for dim in (shape or '').split(','))
+    except ValueError:
+        raise ValueError(f'Invalid {SHM_SHAPE_HEADER}: {shape}')
+    if len(dims) != 3 or dims[2] != 3 or min(dims) <= 0:
+        raise ValueError(f'{SHM_SHAPE_HEADER} must be height,width,3, got {shape}')
+    return dims
+
+
+class SharedImage:
+    """Image read zero-copy from a shared-memory segment owned by the caller.
+
+    The segment is created and unlinked by logic_app; this process only maps
+    it for the duration of the request. Arrays returned by `open` are views
+    on the mapping and must not be used after `close`.
+
+    Args:
+        name (str): name of the shared-memory segment
+        shape (Optional[str]): `height,width,3` of the image
+        dtype (Optional[str]): dtype of the image, only uint8 is accepted
+    """
+
+    def __init__(self, name: str, shape: Optional[str], dtype: Optional[str]) -> None:
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    def open(self) -> np.ndarray:
+        shape = parse_shape(self.shape)
+        if np.dtype(self.dtype or 'uint8') != np.uint8:
+            raise ValueError(f'{SHM_DTYPE_HEADER} must be uint8, got {self.dtype}')
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+        except FileNotFoundError:
+            raise ValueError(f'Shared memory segment {self.name} not found')
+        self._shm = shm
+        # Segment thuộc logic_app: không để resource_tracker của process này unlink nó khi thoát
+        # (`_name` là tên đã đăng ký với resource_tracker, có dấu / ở đầu trên posix)
+        resource_tracker.unregister(shm._name, 'shared_memory')  # type: ignore[attr-defined]
+
+        if shm.size < int(np.prod(shape)):
+            raise ValueError(f'Shared memory segment {self.name} is smaller than {shape}')
+        return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        try:
+            self._shm.close()
+        except BufferError:
+            # còn view trỏ vào vùng nhớ -> mapping được giải phóng cùng view cuối cùng
+            pass
+        self._shm = None
+
+
+def read_shared_image(
+    x_shm_name: Optional[str] = Header(None),
+    x_shm_shape: Optional[str] = Header(None),
+    x_shm_dtype: Optional[str] = Header(None),
+) -> Iterator[Optional[SharedImage]]:
+    """FastAPI dependency: the shared image of the request, unmapped after the response"""
+    if x_shm_name is None:
+        yield None
+        return
+
+    shared_image = SharedImage(x_shm_name, x_shm_shape, x_shm_dtype)
+    try:
+        yield shared_image
+    finally:
+        shared_image.close()
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import json
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from common.logs import get_logger
+from common.utils import get_settings
+
+logger = get_logger(__name__)
+
+# Header W3C Trace Context: 00-<trace_id 32 hex>-<span_id 16 hex>-<flags>
+TRACEPARENT = 'traceparent'
+TRACE_ID = 'X-Trace-Id'
+_TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+class Span:
+    """One timed operation of a trace.
+
+    Spans of the same request share `trace_id`; `parent_id` links a span to
+    the span that opened it, possibly in the other service. Children of the
+    local root are laid out on one timeline row each (`lane`) so concurrent
+    calls of the same request do not overlap in the Chrome trace viewer.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str],
+        sampled: bool,
+        parent: Optional[Span] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = dict(attributes or {})
+        if parent is None:
+            self.root = self
+            self.lane = 'request'
+            self.lanes: Set[str] = {self.lane}
+        else:
+            # con trực tiếp của root mở 1 hàng riêng, các span sâu hơn nằm trên hàng của cha
+            self.root = parent.root
+            self.lane = name if parent is self.root else parent.lane
+            self.root.lanes.add(self.lane)
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter_ns()
+        self.duration_ns = 0
+        self.ended = False
+
+    @property
+    def traceparent(self) -> str:
+        return f'00-{self.trace_id}-{self.span_id}-{"01" if self.sampled else "00"}'
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.duration_ns = time.perf_counter_ns() - self._start
+        self.ended = True
+
+    def to_dict(self, service: str) -> Dict[str, Any]:
+        return {
+            'service': service,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_us': self.start_ns // 1000,
+            'duration_us': self.duration_ns // 1000,
+            'attributes': self.attributes,
+        }
+
+
+class SpanExporter:
+    """Appends finished spans to a local file from a background thread.
+
+    `jsonl` writes one span per line. `chrome` writes the Chrome trace-event
+    array format (the closing bracket is optional), which Perfetto and
+    chrome://tracing open as a timeline; traces of both services can be
+    concatenated since timestamps are wall-clock microseconds.
+
+    Args:
+        service (str): name of the service, the process row of the timeline
+        path (str): file the spans are appended to
+        export_format (str): `chrome` or `jsonl`
+    """
+
+    def __init__(self, service: str, path: str, export_format: str) -> None:
+        if export_format not in ('chrome', 'jsonl'):
+            raise ValueError(f'Unknown trace export format {export_format}')
+        self.service = service
+        self.path = Path(path)
+        self.format = export_format
+        # pid cố định theo tên service: 2 container đều có pid 1
+        self.pid = zlib.crc32(service.encode()) & 0x7FFFFFFF
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+                self._thread.start()
+        self._queue.put(spans)
+
+    def close(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            file = open(self.path, 'a', encoding='utf-8')
+        except OSError as e:
+            logger.error(f'Cannot open trace file {self.path}, spans are dropped: {e}')
+            return
+        with file:
+            if self.format == 'chrome':
+                if file.tell() == 0:
+                    file.write('[\n')
+                self._write(file, {'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': self.service}})
+            while True:
+                spans = self._queue.get()
+                if spans is None:
+                    return
+                try:
+                    for event in self._events(spans):
+                        self._write(file, event)
+                    file.flush()
+                except Exception as e:
+                    logger.warning(f'Failed to export spans to {self.path}: {e}')
+
+    def _write(self, file: Any, event: Dict[str, Any]) -> None:
+        separator = ',\n' if self.format == 'chrome' else '\n'
+        file.write(json.dumps(event, default=str) + separator)
+
+    def _events(self, spans: List[Span]) -> Iterator[Dict[str, Any]]:
+        if self.format == 'jsonl':
+            for span in spans:
+                yield span.to_dict(self.service)
+            return
+
+        root = spans[-1].root
+        for lane in sorted(root.lanes):
+            yield {
+                'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': self._tid(root.trace_id, lane),
+                'args': {'name': f'{root.trace_id[:8]} {lane}'},
+            }
+        for span in spans:
+            yield {
+                'name': span.name,
+                'cat': self.service,
+                'ph': 'X',
+                'ts': span.start_ns // 1000,
+                'dur': span.duration_ns // 1000,
+                'pid': self.pid,
+                'tid': self._tid(span.trace_id, span.lane),
+                'args': {
+                    'trace_id': span.trace_id,
+                    'span_id': span.span_id,
+                    'parent_id': span.parent_id,
+                    **span.attributes,
+                },
+            }
+
+    @staticmethod
+    def _tid(trace_id: str, lane: str) -> int:
+        return zlib.crc32(f'{trace_id}:{lane}'.encode()) & 0x7FFFFFFF
+
+
+class Tracer:
+    """Creates the spans of the sampled requests and exports them per trace.
+
+    Finished spans are kept on their local root and handed to the exporter
+    in one batch when the root ends, so a disabled or unsampled request
+    costs one context variable lookup per stage.
+
+    Args:
+        service (str): name of the service
+        enabled (bool): whether spans are recorded at all
+        sample_ratio (float): share of new traces that are recorded
+        exporter (Optional[SpanExporter]): where finished traces are written
+    """
+
+    def __init__(
+        self,
+        service: str,
+        enabled: bool,
+        sample_ratio: float,
+        exporter: Optional[SpanExporter] = None,
+    ) -> None:
+        self.service = service
+        self.enabled = enabled and exporter is not None
+        self.sample_ratio = sample_ratio
+        self.exporter = exporter
+        self._finished: Dict[str, List[Span]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def start_trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Open the local root span of a request, continuing the caller's trace
+        when `traceparent` is a valid W3C header"""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = secrets.token_hex(16), None
+            sampled = random.random() < self.sample_ratio
+
+        root = Span(name, trace_id, parent_id, sampled, attributes=attributes)
+        try:
+            with self._activate(root):
+                yield root
+        finally:
+            with self._lock:
+                spans = self._finished.pop(root.span_id, [])
+            if sampled and self.exporter is not None:
+                spans.append(root)
+                self.exporter.export(spans)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Open a child of the current span, nothing outside of a sampled trace"""
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            yield None
+            return
+
+        span = Span(name, parent.trace_id, parent.span_id, True, parent=parent, attributes=attributes)
+        try:
+            with self._activate(span):
+                yield span
+        finally:
+            with self._lock:
+                # span kết thúc sau root (request đã trả về) không còn được export
+                if not span.root.ended:
+                    self._finished.setdefault(span.root.span_id, []).append(span)
+
+    @staticmethod
+    @contextmanager
+    def _activate(span: Span) -> Iterator[None]:
+        token = _current_span.set(span)
+        try:
+            yield
+        except BaseException as e:
+            span.set_attribute('error', repr(e))
+            raise
+        finally:
+            span.end()
+            _current_span.reset(token)
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Trace id, parent span id and sampled flag of a `traceparent` header"""
+    match = _TRACEPARENT_RE.match(value.strip().lower()) if value else None
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == '0' * 32 or parent_id == '0' * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def inject_headers(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Copy of `headers` carrying the trace context of the current span"""
+    headers = dict(headers or {})
+    span = _current_span.get()
+    if span is not None:
+        headers[TRACEPARENT] = span.traceparent
+    return headers
+
+
+@lru_cache
+def get_tracer() -> Tracer:
+    settings = get_settings().tracing
+    exporter = None
+    if settings.enabled:
+        exporter = SpanExporter(settings.service_name, settings.export_path, settings.format)
+        logger.info(f'Tracing enabled, spans exported to {settings.export_path} ({settings.format})')
+    return Tracer(
+        service=settings.service_name,
+        enabled=settings.enabled,
+        sample_ratio=settings.sample_ratio,
+        exporter=exporter,
+    )
+
+
+def start_trace(name: str, traceparent: Optional[str] = None, **attributes: Any):
+    return get_tracer().start_trace(name, traceparent, **attributes)
+
+
+def span(name: str, **attributes: Any):
+    return get_tracer().span(name, **attributes)
+
+
+def shutdown_tracing() -> None:
+    """Flush the pending spans, called on shutdown"""
+    get_tracer().close()
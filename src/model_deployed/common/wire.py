@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import io
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+import numpy as np
+
+# Định dạng nhị phân cho mảng landmarks (persons, 33, 4) float32
+NPY_MEDIA_TYPE = 'application/x-npy'
+NUM_LANDMARKS = 33
+
+# Header đi kèm body npy (thay cho các trường JSON bên ngoài mảng)
+IMG_WIDTH_HEADER = 'X-Img-Width'
+IMG_HEIGHT_HEADER = 'X-Img-Height'
+LANDMARK_INDICES_HEADER = 'X-Landmark-Indices'
+
+
+def encode_npy(array: np.ndarray) -> bytes:
+    """Serialize an array to the `.npy` format"""
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def decode_npy(data: bytes) -> np.ndarray:
+    """Parse a `.npy` payload, object arrays are refused"""
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+def accepts_npy(accept: Optional[str]) -> bool:
+    """Whether an `Accept` header asks for the npy format"""
+    return accept is not None and NPY_MEDIA_TYPE in accept
+
+
+def is_npy(content_type: Optional[str]) -> bool:
+    """Whether a `Content-Type` header announces an npy body"""
+    return content_type is not None and content_type.split(';')[0].strip() == NPY_MEDIA_TYPE
+
+
+def parse_landmark_indices(value: Optional[str]) -> Optional[List[int]]:
+    """Parse a comma separated landmark-index subset such as `0,9,10`
+
+    Returns:
+        Optional[List[int]]: sorted unique indices, None when no subset is given
+
+    Raises:
+        ValueError: if an index is not an integer in [0, NUM_LANDMARKS)
+    """
+    if not value:
+        return None
+    indices = sorted({int(index) for index in value.split(',') if index.strip()})
+    if not indices or indices[0] < 0 or indices[-1] >= NUM_LANDMARKS:
+        raise ValueError(f'Invalid landmark indices: {value}')
+    return indices
+
+
+def format_landmark_indices(indices: Iterable[int]) -> str:
+    return ','.join(str(index) for index in indices)
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
+import threading
 from functools import cached_property
+from typing import List
 from typing import Tuple
+from typing import TYPE_CHECKING
+from typing import Union
 
+import cv2
 import numpy as np
 from common.bases import BaseModel
 from common.bases import BaseService
+from common.batching import MicroBatcher
+from common.executor import get_executor
 from common.logs.logs import get_logger
+from common.metrics import stage_timer
 from common.settings import Settings
-from ultralytics import YOLO
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
+
+    from .onnx_detector import OnnxBoxDetector
 
 logger = get_logger(__name__)
 
@@ -27,15 +39,57 @@ class BoxDetectorModel(BaseService):
     settings: Settings
 
     @cached_property
-    def model_loaded(self) -> YOLO:
-        return YOLO(self.settings.box_detector.model_path)
+    def thread_local(self) -> threading.local:
+        return threading.local()
+
+    @property
+    def model_loaded(self) -> Union[YOLO, OnnxBoxDetector]:
+        if self.settings.box_detector.backend == 'onnx':
+            # onnxruntime session thread-safe -> dùng chung cho mọi luồng
+            return self.onnx_model
+        return self.yolo_model
+
+    @property
+    def yolo_model(self) -> YOLO:
+        # YOLO predictor không thread-safe -> mỗi luồng inference giữ 1 bản model
+        model = getattr(self.thread_local, 'model', None)
+        if model is None:
+            # import trễ để backend onnx không phải nạp torch
+            from ultralytics import YOLO
+
+            model = YOLO(self.settings.box_detector.model_path)
+            self.thread_local.model = model
+        return model
 
-    async def process(self, inputs: BoxDetectorModelInput) -> BoxDetectorModelOutput:
-        scores, bboxes, pixel_per_cm = self.forward(
-            inputs.img, self.settings.box_detector.conf,
+    @cached_property
+    def onnx_model(self) -> OnnxBoxDetector:
+        from .onnx_detector import OnnxBoxDetector
+
+        return OnnxBoxDetector(settings=self.settings.box_detector)
+
+    @cached_property
+    def batcher(self) -> MicroBatcher:
+        return MicroBatcher(
+            batch_fn=self._forward_batch,
+            max_batch_size=self.settings.box_detector.max_batch_size,
+            max_wait_ms=self.settings.box_detector.batch_window_ms,
         )
+
+    async def process(self, inputs: BoxDetectorModelInput) -> BoxDetectorModelOutput:
+        if self.settings.box_detector.max_batch_size > 1:
+            # gom các request đồng thời thành 1 lần gọi YOLO
+            scores, bboxes, pixel_per_cm = await self.batcher.submit(inputs.img)
+        else:
+            scores, bboxes, pixel_per_cm = await get_executor('box_detector').run(
+                self.forward, inputs.img, self.settings.box_detector.conf,
+            )
         return BoxDetectorModelOutput(bboxes=bboxes, scores=scores, pixel_per_cm=pixel_per_cm)
 
+    async def _forward_batch(self, imgs: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray, float]]:
+        return await get_executor('box_detector').run(
+            self.forward_batch, imgs, self.settings.box_detector.conf,
+        )
+
     def forward(self, img: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray, float]:
         """
         Performs a forward pass on the Box detection model to extract all bounding boxes and confidence scores,
@@ -46,78 +100,78 @@ class BoxDetectorModel(BaseService):
             bboxes_xyxy: np.ndarray of shape (N, 4)
             pixel_per_cm: float - calculated using the height of the best bounding box
         """
-        model = self.model_loaded
-        results = model(img)[0]
-
-        det_list = []
-        h_list = []
-
-        for box in results.boxes:
-            score = box.conf[0].item()
-            if score < threshold:
-                continue
-            bbox_xyxy = box.xyxy[0].cpu().numpy()  # [x1, y1, x2, y2]
-            bbox_xywh = box.xywh[0].cpu().numpy()  # [x, y, w, h]
-            det_list.append(np.append(bbox_xyxy, score))
-            h_list.append(bbox_xywh[3])  # h = bbox_xywh[3]
-
-        if not det_list:
+        return self.forward_batch([img], threshold)[0]
+
+    def forward_batch(self, imgs: List[np.ndarray], threshold: float) -> List[Tuple[np.ndarray, np.ndarray, float]]:
+        """
+        Runs the detector once on a list of images and post-processes every result like `forward`.
+
+        Returns:
+            List of (scores, bboxes_xyxy, pixel_per_cm), one per input image, in input order
+        """
+        backend = self.settings.box_detector.backend
+        with stage_timer('yolo_forward', backend):
+            if backend == 'onnx':
+                detections = self.onnx_model(imgs, conf=threshold)
+            else:
+                results = self.yolo_model(
+                    imgs,
+                    conf=threshold,
+                    iou=self.settings.box_detector.iou_threshold,
+                    max_det=self.settings.box_detector.max_det,
+                )
+                # 1 lần chuyển cả tensor (K, 6) sang numpy cho mỗi ảnh
+                detections = [result.boxes.data.cpu().numpy() for result in results]
+        with stage_timer('nms', backend):
+            return [self.postprocess(det, threshold) for det in detections]
+
+    def postprocess(self, detections: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray, float]:
+        """
+        Filters by confidence, applies NMS and sorts boxes in descending order of score.
+
+        Args:
+            detections: np.ndarray of shape (K, 6) - x1, y1, x2, y2, confidence, class
+            threshold: minimum confidence of a kept box
+        """
+        detections = detections[detections[:, 4] >= threshold]
+        if len(detections) == 0:
             return (
                 np.empty((0,), dtype=np.float32),
                 np.empty((0, 4), dtype=np.float32),
                 0.0,
             )
 
-        det_array = np.array(det_list, dtype=np.float32).reshape(-1, 5)
-        h_array = np.array(h_list, dtype=np.float32)
-
-        # Apply NMS
-        keep_indices = self.nms(det_array)
-        det_nms = det_array[keep_indices]
-        h_nms = h_array[keep_indices]
+        bboxes_xyxy = detections[:, :4].astype(np.float32)
+        scores = detections[:, 4].astype(np.float32)
 
-        # Sort by score descending
-        sorted_indices = np.argsort(det_nms[:, 4])[::-1]
-        sorted_det = det_nms[sorted_indices]
-        sorted_h = h_nms[sorted_indices]
-
-        scores = sorted_det[:, 4]
-        bboxes_xyxy = sorted_det[:, :4]
-        best_h = sorted_h[0]  # height of best bbox
+        # NMS trả về chỉ số đã sắp theo score giảm dần
+        keep = self.nms(bboxes_xyxy, scores)
+        bboxes_xyxy = bboxes_xyxy[keep]
+        scores = scores[keep]
 
+        # height of best bbox
+        best_h = float(bboxes_xyxy[0, 3] - bboxes_xyxy[0, 1])
         pixel_per_cm = self.cal_pixel_per_cm(best_h)
 
         return scores, bboxes_xyxy, pixel_per_cm
 
-    def nms(self, dets: np.ndarray) -> list[int]:
-        thresh = self.settings.box_detector.conf
-        x1 = dets[:, 0]
-        y1 = dets[:, 1]
-        x2 = dets[:, 2]
-        y2 = dets[:, 3]
-        scores = dets[:, 4]
-
-        areas = (x2 - x1 + 1) * (y2 - y1 + 1)
-        order = scores.argsort()[::-1]
-
-        keep: list[int] = []
-        while order.size > 0:
-            i = order[0]
-            keep.append(int(i))
-            xx1 = np.maximum(x1[i], x1[order[1:]])
-            yy1 = np.maximum(y1[i], y1[order[1:]])
-            xx2 = np.minimum(x2[i], x2[order[1:]])
-            yy2 = np.minimum(y2[i], y2[order[1:]])
-
-            w = np.maximum(0.0, xx2 - xx1 + 1)
-            h = np.maximum(0.0, yy2 - yy1 + 1)
-            inter = w * h
-            ovr = inter / (areas[i] + areas[order[1:]] - inter)
-
-            inds = np.where(ovr <= thresh)[0]
-            order = order[inds + 1]
-
-        return keep
+    def nms(self, bboxes_xyxy: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        """
+        Class-agnostic NMS with `box_detector.iou_threshold`.
+
+        Returns:
+            indices of the kept boxes sorted by descending score, at most `box_detector.max_det`
+        """
+        bboxes_xywh = np.concatenate(
+            [bboxes_xyxy[:, :2], bboxes_xyxy[:, 2:] - bboxes_xyxy[:, :2]], axis=1,
+        )
+        # stub của cv2 khai báo Sequence, binding nhận thẳng ndarray: không chuyển sang list
+        keep = cv2.dnn.NMSBoxes(
+            bboxes_xywh, scores,  # type: ignore[arg-type]
+            score_threshold=0.0,
+            nms_threshold=self.settings.box_detector.iou_threshold,
+        )
+        return np.asarray(keep, dtype=np.int64).reshape(-1)[:self.settings.box_detector.max_det]
 
     def cal_pixel_per_cm(self, h_box_det: float) -> float:
         return h_box_det / self.settings.box_detector.base_h
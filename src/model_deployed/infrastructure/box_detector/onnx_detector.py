@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+from typing import Tuple
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+from common.logs.logs import get_logger
+from common.settings.models import BoxDetectorSettings
+
+logger = get_logger(__name__)
+
+LETTERBOX_COLOR = (114, 114, 114)
+
+
+def resolve_onnx_path(settings: BoxDetectorSettings) -> str:
+    """Return the ONNX weights of the box detector, exporting them once if needed
+
+    `box_detector.onnx_path` defaults to `model_path` with a `.onnx` suffix.
+    Exporting a `.pt` checkpoint needs ultralytics (and torch); loading an
+    existing `.onnx` file does not.
+    """
+    onnx_path = Path(settings.onnx_path or Path(settings.model_path).with_suffix('.onnx'))
+    if onnx_path.exists():
+        return str(onnx_path)
+
+    logger.info(f'Export {settings.model_path} to ONNX', extra={'imgsz': settings.imgsz})
+    from ultralytics import YOLO
+
+    exported = YOLO(settings.model_path).export(
+        format='onnx', imgsz=settings.imgsz, dynamic=True, simplify=True,
+    )
+    Path(exported).replace(onnx_path)
+    return str(onnx_path)
+
+
+class OnnxBoxDetector:
+    """YOLO box detector running an exported ONNX graph on ONNX Runtime.
+
+    Pre-processing (letterbox, normalisation) and decoding of the raw
+    `(batch, 4 + classes, anchors)` output are done in NumPy, so neither torch
+    nor ultralytics is imported. The session is thread-safe and shared by all
+    inference threads.
+
+    Args:
+        settings (BoxDetectorSettings): box detector settings
+    """
+
+    def __init__(self, settings: BoxDetectorSettings) -> None:
+        self.imgsz = settings.imgsz
+        self.iou_threshold = settings.iou_threshold
+        self.max_det = settings.max_det
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = settings.intra_op_threads
+        options.inter_op_num_threads = settings.inter_op_threads
+
+        onnx_path = resolve_onnx_path(settings)
+        logger.info(
+            f'Load ONNX box detector {onnx_path}',
+            extra={
+                'intra_op_threads': settings.intra_op_threads,
+                'inter_op_threads': settings.inter_op_threads,
+            },
+        )
+        self.session = ort.InferenceSession(
+            onnx_path, sess_options=options, providers=['CPUExecutionProvider'],
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Graph export với batch cố định (int) -> chạy từng ảnh một
+        self.fixed_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+
+    def __call__(self, imgs: List[np.ndarray], conf: float) -> List[np.ndarray]:
+        """Detect boxes on a list of BGR images
+
+        Returns:
+            List[np.ndarray]: one (K, 6) float32 array per image holding
+                x1, y1, x2, y2 (original image pixels), confidence and class
+        """
+        letterboxed = [self.letterbox(img) for img in imgs]
+        batch = np.stack([blob for blob, _, _ in letterboxed])
+
+        if self.fixed_batch is None:
+            outputs = self.session.run(None, {self.input_name: batch})[0]
+        else:
+            outputs = np.concatenate([
+                self.session.run(None, {self.input_name: batch[i:i + self.fixed_batch]})[0]
+                for i in range(0, len(batch), self.fixed_batch)
+            ])
+
+        return [
+            self.decode(output, ratio, pad, img.shape[:2], conf)
+            for output, (_, ratio, pad), img in zip(outputs, letterboxed, imgs)
+        ]
+
+    def letterbox(self, img: np.ndarray) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+        """Resize keeping the aspect ratio, pad to a square and convert to a CHW float blob
+
+        Returns:
+            Tuple[np.ndarray, float, Tuple[float, float]]: blob (3, imgsz, imgsz),
+                resize ratio and (pad_x, pad_y)
+        """
+        h, w = img.shape[:2]
+        ratio = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+        pad_x, pad_y = (self.imgsz - new_w) / 2, (self.imgsz - new_h) / 2
+
+        if (new_w, new_h) != (w, h):
+            img = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+        left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+        img = cv2.copyMakeBorder(
+            img, top, bottom, left, right, cv2.BORDER_CONSTANT, value=LETTERBOX_COLOR,
+        )
+
+        blob = cv2.cvtColor(img, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)
+        return np.ascontiguousarray(blob, dtype=np.float32) / 255.0, ratio, (pad_x, pad_y)
+
+    def decode(
+        self,
+        output: np.ndarray,
+        ratio: float,
+        pad: Tuple[float, float],
+        img_shape: Tuple[int, int],
+        conf: float,
+    ) -> np.ndarray:
+        """Raw output (4 + classes, anchors) of one image → (K, 6) detections"""
+        preds = output.T
+        class_scores = preds[:, 4:]
+        cls = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(preds)), cls]
+
+        keep = scores >= conf
+        if not keep.any():
+            return np.empty((0, 6), dtype=np.float32)
+        preds, scores, cls = preds[keep], scores[keep], cls[keep]
+
+        # cx, cy, w, h trên ảnh letterbox -> x1, y1, x2, y2 trên ảnh gốc
+        boxes = np.empty((len(preds), 4), dtype=np.float32)
+        boxes[:, :2] = preds[:, :2] - preds[:, 2:4] / 2
+        boxes[:, 2:] = preds[:, :2] + preds[:, 2:4] / 2
+        boxes -= np.array([pad[0], pad[1], pad[0], pad[1]], dtype=np.float32)
+        boxes /= ratio
+        img_h, img_w = img_shape
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, img_w)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, img_h)
+
+        # NMS theo từng lớp như ultralytics: dịch box của mỗi lớp ra vùng riêng
+        offsets = cls[:, None].astype(np.float32) * max(img_h, img_w)
+        shifted = boxes + offsets
+        # stub của cv2 khai báo Sequence, binding nhận thẳng ndarray: không chuyển sang list
+        keep = cv2.dnn.NMSBoxes(
+            np.concatenate([shifted[:, :2], shifted[:, 2:] - shifted[:, :2]], axis=1),  # type: ignore[arg-type]
+            scores,
+            conf,
+            self.iou_threshold,
+        )
+        indices = np.asarray(keep, dtype=np.int64).reshape(-1)[:self.max_det]
+
+        return np.concatenate(
+            [boxes[indices], scores[indices, None], cls[indices, None].astype(np.float32)],
+            axis=1,
+        )
@@ -3,19 +3,28 @@ from __future__ import annotations
 from abc import ABC
 from abc import abstractmethod
 from typing import List
+from typing import Union
 
+import numpy as np
 from common.bases import BaseModel
 from common.bases import BaseService
+from common.executor import get_executor
 from common.logs.logs import get_logger
+from common.metrics import stage_timer
 from common.settings import Settings
 from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
 
+from .geometry import compare_heights
+from .geometry import NUM_LANDMARKS
+from .geometry import to_landmark_array
+
 logger = get_logger(__name__)
 
 
 class CalHeightInput(BaseModel):
     # Danh sách các bộ điểm pose landmarks (ví dụ: nhiều người, hoặc nhiều khung hình)
-    landmarks: List[List[NormalizedLandmark]]
+    # hoặc mảng (N, 33, 3) đã gom sẵn
+    landmarks: Union[np.ndarray, List[List[NormalizedLandmark]]]
     img_width: float                  # Chiều rộng ảnh gốc (pixel)
     img_height: float                 # Chiều cao ảnh gốc (pixel)
     px_per_cm: float                  # Tỷ lệ quy đổi pixel → cm
@@ -37,8 +46,47 @@ class CalHeightOutput(BaseModel):
 class CalHeight(BaseService, ABC):
     settings: Settings
 
-    @abstractmethod
     async def process(self, inputs: CalHeightInput) -> CalHeightOutput:
+        # Phần tính toán hình học chạy trên pool riêng, không chặn event loop
+        return await get_executor('height_calculator').run(self.compute, inputs)
+
+    def compute(self, inputs: CalHeightInput) -> CalHeightOutput:
+        # Gom landmarks của mọi người thành một mảng (N, 33, 3), tính một lần
+        landmarks = to_landmark_array(inputs.landmarks)
+        if landmarks.shape[1] != NUM_LANDMARKS:
+            raise ValueError(
+                f'Expected {NUM_LANDMARKS} landmarks per person, got {landmarks.shape[1]}',
+            )
+        with stage_timer('calc_height', self.settings.height_calculator.mode):
+            distances = self.calc_segments(
+                landmarks=landmarks,
+                img_w=inputs.img_width,
+                img_h=inputs.img_height,
+                px_per_cm=inputs.px_per_cm,
+            )
+            heights = distances.sum(axis=-1)
+            cm_sum, diffs = compare_heights(heights, distances)
+        logger.info(f'✅ pixcel per cm {inputs.px_per_cm}')
+        logger.info(f'height {heights.tolist()}')
+
+        return CalHeightOutput(
+            heights=heights.tolist(),
+            distances=distances.tolist(),
+            cm_direct=heights.tolist(),
+            cm_sum=cm_sum.tolist(),
+            diffs=diffs.tolist(),
+        )
+
+    @abstractmethod
+    def calc_segments(self, landmarks: np.ndarray, img_w: float, img_h: float, px_per_cm: float) -> np.ndarray:
+        """Length in cm of the 7 body segments of every person
+
+        Args:
+            landmarks (np.ndarray): normalized landmarks of shape (N, 33, 3)
+
+        Returns:
+            np.ndarray: array of shape (N, 7)
+        """
         ...
 
     @classmethod
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from typing import Any
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+# Chỉ số landmark MediaPipe Pose dùng để tính chiều cao
+NOSE = 0
+MOUTH_LEFT = 9
+MOUTH_RIGHT = 10
+SHOULDER_LEFT = 11
+SHOULDER_RIGHT = 12
+HIP_LEFT = 23
+HIP_RIGHT = 24
+KNEE_LEFT = 25
+ANKLE_LEFT = 27
+HEEL_LEFT = 29
+FOOT_INDEX_LEFT = 31
+
+# Các landmark mà 2 bộ tính chiều cao thực sự dùng tới
+HEIGHT_LANDMARKS = (
+    NOSE, MOUTH_LEFT, MOUTH_RIGHT, SHOULDER_LEFT, SHOULDER_RIGHT,
+    HIP_LEFT, HIP_RIGHT, KNEE_LEFT, ANKLE_LEFT, HEEL_LEFT, FOOT_INDEX_LEFT,
+)
+
+NUM_LANDMARKS = 33
+NUM_SEGMENTS = 7
+# Tỉ lệ khoảng cách mũi → đỉnh đầu so với mũi → miệng
+NOSE_TO_TOP_OF_HEAD_RATIO = 3.236
+
+
+def to_landmark_array(landmarks: Any) -> np.ndarray:
+    """Pack the landmarks of every person into one float32 array
+
+    Args:
+        landmarks: np.ndarray of shape (N, K, >=3), or a list (one item per
+            person) of K landmarks given as objects with `x`, `y`, `z`
+            attributes (NormalizedLandmark) or as dicts with those keys
+
+    Returns:
+        np.ndarray: array of shape (N, K, 3) holding x, y, z, K = 33 unless
+            a landmark subset was sent
+    """
+    if isinstance(landmarks, np.ndarray):
+        array = np.asarray(landmarks, dtype=np.float32)
+    else:
+        array = np.array(
+            [
+                [
+                    (lm['x'], lm['y'], lm['z']) if isinstance(lm, dict) else (lm.x, lm.y, lm.z)
+                    for lm in person
+                ]
+                for person in landmarks
+            ],
+            dtype=np.float32,
+        )
+
+    if array.size == 0:
+        return np.empty((0, NUM_LANDMARKS, 3), dtype=np.float32)
+    if array.ndim != 3 or array.shape[2] < 3:
+        raise ValueError(f'Expected landmarks of shape (N, K, 3), got {array.shape}')
+    return array[..., :3]
+
+
+def expand_landmarks(landmarks: np.ndarray, indices: Sequence[int]) -> np.ndarray:
+    """Scatter a landmark subset (N, K, C) back to its place in an (N, 33, C) array
+
+    Landmarks outside the subset are filled with NaN.
+
+    Raises:
+        ValueError: if the subset misses a landmark used by the height calculation
+    """
+    missing = set(HEIGHT_LANDMARKS) - set(indices)
+    if missing:
+        raise ValueError(f'Missing landmarks for height calculation: {sorted(missing)}')
+    if landmarks.ndim != 3 or landmarks.shape[1] != len(indices):
+        raise ValueError(
+            f'Expected landmarks of shape (N, {len(indices)}, C), got {landmarks.shape}',
+        )
+
+    full = np.full(
+        (landmarks.shape[0], NUM_LANDMARKS, landmarks.shape[2]), np.nan, dtype=np.float32,
+    )
+    full[:, list(indices)] = landmarks
+    return full
+
+
+def distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Euclidean distance between matching points of `a` and `b` (..., D)"""
+    return np.linalg.norm(a - b, axis=-1)
+
+
+def midpoint(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a + b) / 2
+
+
+def perpendicular_distance_2d(point: np.ndarray, line_start: np.ndarray, line_end: np.ndarray) -> np.ndarray:
+    """Distance from `point` to the line through `line_start` and `line_end` (..., 2)
+
+    Uses the slope/intercept form of the line; a vertical line falls back to
+    the difference of x coordinates.
+    """
+    dx = line_end[..., 0] - line_start[..., 0]
+    dy = line_end[..., 1] - line_start[..., 1]
+    vertical = dx == 0
+    slope = dy / np.where(vertical, 1, dx)
+    intercept = line_start[..., 1] - slope * line_start[..., 0]
+    dist = np.abs(slope * point[..., 0] - point[..., 1] + intercept) / np.sqrt(slope ** 2 + 1)
+    return np.where(vertical, np.abs(point[..., 0] - line_start[..., 0]), dist)
+
+
+def perpendicular_distance_3d(point: np.ndarray, line_start: np.ndarray, line_end: np.ndarray) -> np.ndarray:
+    """Distance from `point` to the line through `line_start` and `line_end` (..., 3)"""
+    line_vec = line_end - line_start
+    point_vec = point - line_start
+    line_unitvec = line_vec / np.linalg.norm(line_vec, axis=-1, keepdims=True)
+    t = np.sum(line_unitvec * point_vec, axis=-1, keepdims=True)
+    return np.linalg.norm(point_vec - line_unitvec * t, axis=-1)
+
+
+def segment_lengths(points: np.ndarray) -> np.ndarray:
+    """Length of the 7 body segments of every person
+
+    Segments, from bottom to top: ankle → heel/foot line, knee → ankle,
+    hip → knee, mid shoulder → mid hip, mid mouth → mid shoulder,
+    nose → mouth line and nose → top of head.
+
+    Args:
+        points (np.ndarray): landmarks of shape (N, 33, D) with D = 2 (image
+            plane, pixel or normalized) or D = 3 (normalized x, y, z)
+
+    Returns:
+        np.ndarray: array of shape (N, 7)
+    """
+    perpendicular = perpendicular_distance_3d if points.shape[-1] == 3 else perpendicular_distance_2d
+
+    mid_shoulder = midpoint(points[:, SHOULDER_LEFT], points[:, SHOULDER_RIGHT])
+    mid_hip = midpoint(points[:, HIP_LEFT], points[:, HIP_RIGHT])
+    mid_mouth = midpoint(points[:, MOUTH_LEFT], points[:, MOUTH_RIGHT])
+
+    nose_mouth = perpendicular(
+        points[:, NOSE], points[:, MOUTH_LEFT], points[:, MOUTH_RIGHT],
+    )
+    return np.stack(
+        [
+            perpendicular(
+                points[:, ANKLE_LEFT], points[:, HEEL_LEFT], points[:, FOOT_INDEX_LEFT],
+            ),
+            distance(points[:, KNEE_LEFT], points[:, ANKLE_LEFT]),
+            distance(points[:, HIP_LEFT], points[:, KNEE_LEFT]),
+            distance(mid_shoulder, mid_hip),
+            distance(mid_mouth, mid_shoulder),
+            nose_mouth,
+            NOSE_TO_TOP_OF_HEAD_RATIO * nose_mouth,
+        ],
+        axis=-1,
+    )
+
+
+def to_pixels(landmarks: np.ndarray, img_w: float, img_h: float) -> np.ndarray:
+    """Normalized (N, 33, >=2) landmarks → integer pixel coordinates (N, 33, 2)
+
+    Coordinates are truncated toward zero like `int(x * img_w)`.
+    """
+    xy = landmarks[..., :2].astype(np.float64)
+    return np.trunc(xy * np.array([img_w, img_h], dtype=np.float64))
+
+
+def segments_2d(landmarks: np.ndarray, img_w: float, img_h: float, px_per_cm: float) -> np.ndarray:
+    """Segment lengths in cm measured on the image plane, shape (N, 7)"""
+    return segment_lengths(to_pixels(landmarks, img_w, img_h)) / px_per_cm
+
+
+def segments_3d(landmarks: np.ndarray, img_w: float, img_h: float, px_per_cm: float) -> np.ndarray:
+    """Segment lengths in cm corrected by the depth of each segment, shape (N, 7)
+
+    Each pixel length is scaled by the ratio between its 3D and its 2D length
+    in normalized coordinates.
+    """
+    normalized = landmarks[..., :3].astype(np.float64)
+    ratio = segment_lengths(normalized) / segment_lengths(normalized[..., :2])
+    return segments_2d(landmarks, img_w, img_h, px_per_cm) * ratio
+
+
+def compare_heights(heights: np.ndarray, distances: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sum of the segments of every person and its gap to the direct height
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: sums and absolute differences, shape (N,)
+    """
+    cm_sum = distances.sum(axis=-1)
+    return cm_sum, np.abs(heights - cm_sum)
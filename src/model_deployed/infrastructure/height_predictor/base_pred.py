@@ -2,11 +2,13 @@ from __future__ import annotations
 
 from abc import ABC
 from abc import abstractmethod
+from typing import Any
 from typing import List
 
 from common.bases import BaseModel
 from common.bases import BaseService
 from common.logs.logs import get_logger
+from common.metrics import stage_timer
 from common.settings import Settings
 
 logger = get_logger(__name__)
@@ -23,10 +25,21 @@ class HeightPredictorModelOutput(BaseModel):
 class HeightPredictorModel(BaseService, ABC):
     settings: Settings
 
+    @property
+    @abstractmethod
+    def model_loaded(self) -> Any:
+        # nạp model ở lần gọi đầu, warmup lúc khởi động gọi trước
+        ...
+
     @abstractmethod
     def process(self, inputs: HeightPredictorModelInput) -> HeightPredictorModelOutput:
         ...
 
+    def predict(self, inputs: HeightPredictorModelInput) -> HeightPredictorModelOutput:
+        # `process` có đo thời gian, dùng cho request thật (warmup gọi thẳng `process`)
+        with stage_timer('height_predictor', self.settings.height_predictor.mode):
+            return self.process(inputs)
+
     @classmethod
     def get_service(cls, settings: Settings) -> HeightPredictorModel:
         mode = settings.height_predictor.mode.upper()
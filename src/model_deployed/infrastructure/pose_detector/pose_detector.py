@@ -1,65 +1,171 @@
 from __future__ import annotations
 
+import threading
 from functools import cached_property
 from typing import List
+from typing import Optional
+from typing import Sequence
 
 import cv2
 import mediapipe as mp
 import numpy as np
 from common.bases import BaseModel
 from common.bases import BaseService
+from common.executor import get_executor
 from common.logs.logs import get_logger
+from common.metrics import stage_timer
 from common.settings import Settings
+from common.wire import NUM_LANDMARKS
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
 from mediapipe.tasks.python.vision.pose_landmarker import PoseLandmarkerResult
 
+from .video_session import PoseSessionManager
+
 logger = get_logger(__name__)
 
 
 class PoseDetectorModelInput(BaseModel):
     img: np.ndarray  # Input hình ảnh dạng numpy array
+    # Chỉ lấy một phần landmark (vd. 11 điểm dùng để tính chiều cao)
+    landmark_indices: Optional[List[int]] = None
 
 
 class PoseDetectorModelOutput(BaseModel):
-    # Danh sách các landmarks cho từng người (List người x List điểm)
-    pose_landmarks: List[List[dict]]
+    # Mảng landmarks (số người, số điểm, 4) float32: x, y, z, visibility
+    landmarks: np.ndarray
     img_width: float
     img_height: float
+    # Chỉ số các điểm có trong `landmarks`, None nếu đủ 33 điểm
+    landmark_indices: Optional[List[int]] = None
+
+    @property
+    def pose_landmarks(self) -> List[List[dict]]:
+        # Danh sách các landmarks cho từng người (List người x List điểm)
+        return [
+            [
+                {'x': x, 'y': y, 'z': z, 'visibility': visibility}
+                for x, y, z, visibility in person
+            ] for person in self.landmarks.tolist()
+        ]
 
 
 class PoseDetectorModel(BaseService):
     settings: Settings
 
     @cached_property
-    def model_loaded(self):
+    def thread_local(self) -> threading.local:
+        return threading.local()
+
+    @property
+    def model_loaded(self) -> vision.PoseLandmarker:
+        # PoseLandmarker không thread-safe -> mỗi luồng inference giữ 1 instance
+        landmarker = getattr(self.thread_local, 'landmarker', None)
+        if landmarker is None:
+            landmarker = self.create_landmarker()
+            self.thread_local.landmarker = landmarker
+        return landmarker
+
+    @cached_property
+    def sessions(self) -> PoseSessionManager:
+        return PoseSessionManager(
+            create_landmarker=lambda: self.create_landmarker(vision.RunningMode.VIDEO),
+            idle_s=self.settings.pose_detector.session_idle_s,
+            max_sessions=self.settings.pose_detector.max_sessions,
+        )
+
+    def create_landmarker(
+        self, running_mode: vision.RunningMode = vision.RunningMode.IMAGE,
+    ) -> vision.PoseLandmarker:
         # Load pose detection model
         base_options = python.BaseOptions(
             model_asset_path=self.settings.pose_detector.model_path,
         )
-        options = vision.PoseLandmarkerOptions(
-            base_options=base_options,
-            output_segmentation_masks=True,
-        )
+        if running_mode == vision.RunningMode.IMAGE:
+            options = vision.PoseLandmarkerOptions(
+                base_options=base_options,
+                output_segmentation_masks=True,
+            )
+        else:
+            # Video: chỉ cần landmarks, không tính mask cho từng frame
+            options = vision.PoseLandmarkerOptions(
+                base_options=base_options,
+                running_mode=running_mode,
+                num_poses=self.settings.pose_detector.num_poses,
+                output_segmentation_masks=self.settings.pose_detector.output_segmentation_masks,
+            )
         return vision.PoseLandmarker.create_from_options(options)
 
     async def process(self, inputs: PoseDetectorModelInput) -> PoseDetectorModelOutput:
         # Gọi forward để trích xuất pose landmarks
-        pose_landmarks = self.forward(inputs.img)
-        serialized_landmarks = [
-            [
-                {'x': lm.x, 'y': lm.y, 'z': lm.z} for lm in landmarks
-            ] for landmarks in pose_landmarks
-        ]
+        pose_landmarks = await get_executor('pose_detector').run(
+            self.forward, inputs.img,
+        )
 
         img_h, img_w = inputs.img.shape[:2]
         return PoseDetectorModelOutput(
-            pose_landmarks=serialized_landmarks,
+            landmarks=self.pack_landmarks(pose_landmarks, inputs.landmark_indices),
             img_height=float(img_h),
             img_width=float(img_w),
+            landmark_indices=inputs.landmark_indices,
         )
 
+    async def process_frame(
+        self,
+        session_id: str,
+        inputs: PoseDetectorModelInput,
+        timestamp_ms: Optional[int] = None,
+    ) -> PoseDetectorModelOutput:
+        # Frame tiếp theo của một video: dùng lại tracking của session.
+        # Lấy manager trên event loop để các luồng inference không cùng tạo 2 bản
+        sessions = self.sessions
+        pose_landmarks = await get_executor('pose_detector').run(
+            sessions.detect, session_id, inputs.img, timestamp_ms,
+        )
+
+        img_h, img_w = inputs.img.shape[:2]
+        return PoseDetectorModelOutput(
+            landmarks=self.pack_landmarks(pose_landmarks, inputs.landmark_indices),
+            img_height=float(img_h),
+            img_width=float(img_w),
+            landmark_indices=inputs.landmark_indices,
+        )
+
+    async def close_session(self, session_id: str) -> bool:
+        # đóng landmarker có thể phải chờ frame đang chạy -> không chạy trên event loop
+        return await get_executor('pose_detector').run(self.sessions.close, session_id)
+
+    @staticmethod
+    def pack_landmarks(
+        pose_landmarks: List[List[NormalizedLandmark]],
+        indices: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        """
+        Gom landmarks của mọi người vào một mảng float32 (số người, 33, 4).
+
+        Args:
+            pose_landmarks (List[List[NormalizedLandmark]]): Kết quả của `forward`.
+            indices (Optional[Sequence[int]]): Chỉ giữ lại các điểm này.
+
+        Returns:
+            np.ndarray: Mảng x, y, z, visibility của từng điểm.
+        """
+        if not pose_landmarks:
+            return np.empty(
+                (0, NUM_LANDMARKS if indices is None else len(indices), 4), dtype=np.float32,
+            )
+        packed = np.array(
+            [
+                [(lm.x, lm.y, lm.z, lm.visibility or 0.0) for lm in landmarks]
+                for landmarks in pose_landmarks
+            ],
+            dtype=np.float32,
+        )
+        if indices is not None:
+            packed = packed[:, list(indices)]
+        return packed
+
     def forward(self, img: np.ndarray) -> List[List[NormalizedLandmark]]:
         """
         Thực hiện phát hiện pose landmark và trả về danh sách landmark cho từng người.
@@ -72,9 +178,11 @@ class PoseDetectorModel(BaseService):
         """
         img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
-        detection_result: PoseLandmarkerResult = self.model_loaded.detect(
-            image,
-        )
+        landmarker = self.model_loaded
+        with stage_timer('mediapipe_detect', 'image'):
+            detection_result: PoseLandmarkerResult = landmarker.detect(
+                image,
+            )
 
         if not detection_result.pose_landmarks:
             logger.warning('No pose landmarks detected.')
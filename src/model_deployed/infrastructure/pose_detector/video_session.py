@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from common.logs.logs import get_logger
+from common.metrics import stage_timer
+from mediapipe.tasks.python import vision
+from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+
+logger = get_logger(__name__)
+
+
+class PoseVideoSession:
+    """Pose landmarker in VIDEO running mode following one camera feed.
+
+    MediaPipe tracks the person between frames and only reruns the person
+    detector when tracking is lost, which requires strictly increasing
+    timestamps. Frames of a session are processed one at a time.
+
+    Args:
+        session_id (str): id of the camera feed
+        landmarker (vision.PoseLandmarker): landmarker created in VIDEO mode
+    """
+
+    def __init__(self, session_id: str, landmarker: vision.PoseLandmarker) -> None:
+        self.session_id = session_id
+        self.landmarker = landmarker
+        self.lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.last_used = self.started_at
+        self.last_timestamp_ms = -1
+        self.frames = 0
+        self.closed = False
+
+    def detect(self, img: np.ndarray, timestamp_ms: Optional[int] = None) -> List[List[NormalizedLandmark]]:
+        """
+        Phát hiện pose trên frame tiếp theo của video.
+
+        Args:
+            img (np.ndarray): Frame đầu vào (BGR).
+            timestamp_ms (Optional[int]): Thời điểm của frame, mặc định là thời gian kể từ frame đầu.
+
+        Returns:
+            List[List[NormalizedLandmark]]: Danh sách landmark của từng người.
+        """
+        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=img_rgb)
+
+        with self.lock:
+            if self.closed:
+                raise RuntimeError(f'Pose session {self.session_id} is closed')
+            if timestamp_ms is None:
+                timestamp_ms = int((time.monotonic() - self.started_at) * 1000)
+            # MediaPipe yêu cầu timestamp tăng ngặt giữa các frame
+            timestamp_ms = max(timestamp_ms, self.last_timestamp_ms + 1)
+            with stage_timer('mediapipe_detect', 'video'):
+                result = self.landmarker.detect_for_video(image, timestamp_ms)
+            self.last_timestamp_ms = timestamp_ms
+            self.last_used = time.monotonic()
+            self.frames += 1
+
+        return result.pose_landmarks or []
+
+    def close(self) -> None:
+        with self.lock:
+            if not self.closed:
+                self.closed = True
+                self.landmarker.close()
+
+
+class PoseSessionManager:
+    """Keeps the video sessions alive and evicts them when idle.
+
+    Idle sessions are evicted on every access. When `max_sessions` are open,
+    the least recently used session is closed to make room for a new one.
+
+    Args:
+        create_landmarker (Callable[[], vision.PoseLandmarker]): factory of VIDEO mode landmarkers
+        idle_s (float): seconds without frame after which a session is closed
+        max_sessions (int): maximum number of open sessions
+    """
+
+    def __init__(
+        self,
+        create_landmarker: Callable[[], vision.PoseLandmarker],
+        idle_s: float,
+        max_sessions: int,
+    ) -> None:
+        self.create_landmarker = create_landmarker
+        self.idle_s = idle_s
+        self.max_sessions = max(1, max_sessions)
+        self._sessions: Dict[str, PoseVideoSession] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_or_create(self, session_id: str) -> PoseVideoSession:
+        """Open session `session_id`, created on its first frame"""
+        expired = self._pop_expired()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+        if session is not None:
+            self._close_all(expired)
+            return session
+
+        # nạp model ngoài lock: không chặn frame của các session khác trong lúc nạp
+        landmarker = self.create_landmarker()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                while len(self._sessions) >= self.max_sessions:
+                    lru_id = min(self._sessions, key=lambda key: self._sessions[key].last_used)
+                    expired.append(self._sessions.pop(lru_id))
+                session = PoseVideoSession(session_id, landmarker)
+                self._sessions[session_id] = session
+                landmarker = None
+                logger.info(f'Open pose session {session_id}')
+            session.last_used = time.monotonic()
+
+        if landmarker is not None:
+            # frame khác của cùng session đã mở session trước: bỏ landmarker thừa
+            landmarker.close()
+        # đóng landmarker ngoài lock: có thể phải chờ frame đang chạy của session đó
+        self._close_all(expired)
+        return session
+
+    def detect(
+        self, session_id: str, img: np.ndarray, timestamp_ms: Optional[int] = None,
+    ) -> List[List[NormalizedLandmark]]:
+        """Detect poses on the next frame of session `session_id`"""
+        return self.get_or_create(session_id).detect(img, timestamp_ms)
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._close_all([session])
+        return True
+
+    def close_all(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        self._close_all(sessions)
+
+    def _pop_expired(self) -> List[PoseVideoSession]:
+        now = time.monotonic()
+        with self._lock:
+            expired_ids = [
+                session_id for session_id, session in self._sessions.items()
+                if now - session.last_used > self.idle_s
+            ]
+            return [self._sessions.pop(session_id) for session_id in expired_ids]
+
+    @staticmethod
+    def _close_all(sessions: List[PoseVideoSession]) -> None:
+        for session in sessions:
+            logger.info(f'Close pose session {session.session_id} after {session.frames} frames')
+            session.close()
@@ -1,24 +1,64 @@
 from __future__ import annotations
 
+import asyncio
+from contextlib import asynccontextmanager
+
+from apis.helper import AdmissionMiddleware
+from apis.helper import DeadlineMiddleware
 from apis.helper import LoggingMiddleware
+from apis.helper import MetricsMiddleware
+from apis.helper import ProfilingMiddleware
+from apis.helper import TracingMiddleware
 from apis.routers.box_detector import box_detector
+from apis.routers.debug import debug
+from apis.routers.health import health
 from apis.routers.height_caculator import height_cal
 from apis.routers.height_predictor import height_predictor
+from apis.routers.measure import measure
+from apis.routers.metrics import metrics
 from apis.routers.pose_detector import pose_detector
+from app.model_container import get_model_container
 from asgi_correlation_id import CorrelationIdMiddleware
+from common.executor import shutdown_executors
 from common.logs import get_logger
 from common.logs import setup_logging
+from common.metrics import setup_metrics
+from common.tracing import shutdown_tracing
+from common.utils import get_settings
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 setup_logging(json_logs=False)
 logger = get_logger('api')
+setup_metrics()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load + warmup model chạy nền: /health/live trả lời ngay, /health/ready báo khi xong
+    startup_task = None
+    if get_settings().startup.preload:
+        startup_task = asyncio.create_task(get_model_container().start())
+    yield
+    if startup_task is not None and not startup_task.done():
+        startup_task.cancel()
+    # đóng các session video còn mở rồi dừng các pool inference khi tắt service
+    get_model_container().pose_detector.sessions.close_all()
+    shutdown_executors()
+    shutdown_tracing()
+
 
-app = FastAPI(title='Model Deployed API - AI cal height', version='1.0.0')
+app = FastAPI(title='Model Deployed API - AI cal height', version='1.0.0', lifespan=lifespan)
 
 
 # add middleware to generate correlation id
+# giới hạn tải đặt trong cùng: request bị từ chối vẫn được log, đo và trace
+app.add_middleware(AdmissionMiddleware, settings=get_settings().admission)
+app.add_middleware(DeadlineMiddleware, settings=get_settings().deadline)
 app.add_middleware(LoggingMiddleware, logger=logger)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(ProfilingMiddleware, settings=get_settings().profiling)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(CorrelationIdMiddleware)
 
 app.add_middleware(
@@ -45,6 +85,22 @@ app.include_router(
     height_predictor,
 )
 
+app.include_router(
+    measure,
+)
+
+app.include_router(
+    health,
+)
+
+
+app.include_router(
+    metrics,
+)
+
+app.include_router(
+    debug,
+)
 
 if __name__ == '__main__':
     import uvicorn
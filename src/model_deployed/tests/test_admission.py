@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from common.admission import AdmissionLimiter
+
+
+class TestAdmissionLimiter(unittest.TestCase):
+    def test_sheds_beyond_waiting_queue(self):
+        async def run():
+            limiter = AdmissionLimiter('test', max_concurrent=1, max_waiting=1, max_wait_s=1.0)
+            self.assertTrue(await limiter.acquire())
+
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            self.assertEqual(limiter.waiting, 1)
+            # 1 request đang chạy + 1 request đang chờ: request tiếp theo bị từ chối ngay
+            self.assertFalse(await limiter.acquire())
+
+            limiter.release()
+            self.assertTrue(await waiter)
+            self.assertEqual((limiter.active, limiter.waiting), (1, 0))
+            limiter.release()
+
+        asyncio.run(run())
+
+    def test_wait_is_bounded(self):
+        async def run():
+            limiter = AdmissionLimiter('test', max_concurrent=1, max_waiting=4, max_wait_s=0.01)
+            self.assertTrue(await limiter.acquire())
+            self.assertFalse(await limiter.acquire())
+            self.assertEqual(limiter.waiting, 0)
+
+        asyncio.run(run())
+
+    def test_burst_admits_up_to_limit(self):
+        async def run():
+            limiter = AdmissionLimiter('test', max_concurrent=2, max_waiting=0, max_wait_s=1.0)
+            return await asyncio.gather(*(limiter.acquire() for _ in range(5)))
+
+        self.assertEqual(asyncio.run(run()), [True, True, False, False, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
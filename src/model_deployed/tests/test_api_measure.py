@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import json
+import os
+import unittest
+
+import requests  # type: ignore
+
+
+class TestMeasureAPI(unittest.TestCase):
+    def setUp(self) -> None:
+        self.image_path = '/mnt/d/project/DATN/DATN_PhamDangDong/resource/data/data/processed_data/1_DungThang_PhamNgocThach_5_183.jpg'
+        self.api_url = 'http://localhost:5000/v1/measure'
+
+        if not os.path.exists(self.image_path):
+            raise FileNotFoundError(f'Image not found: {self.image_path}')
+
+    def test_measure_api(self):
+        with open(self.image_path, 'rb') as img_file:
+            files = {
+                'file': ('measure_image.jpg', img_file, 'image/jpeg'),
+            }
+            response = requests.post(self.api_url, files=files)
+
+        print('Status Code:', response.status_code)
+        print('Response JSON:')
+        print(json.dumps(response.json(), indent=4, ensure_ascii=False))
+
+        self.assertEqual(response.status_code, 200)
+        info = response.json()['info']
+        for field in ['heights', 'distances', 'px_per_cm']:
+            self.assertIn(field, info)
+        self.assertEqual(len(info['heights']), len(info['distances']))
+        self.assertGreater(info['px_per_cm'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
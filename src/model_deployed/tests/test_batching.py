@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from common.batching import MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.calls: list[list[int]] = []
+
+        async def batch_fn(items: list[int]) -> list[int]:
+            self.calls.append(list(items))
+            return [item * 10 for item in items]
+
+        self.batch_fn = batch_fn
+
+    def test_concurrent_requests_are_coalesced(self):
+        batcher = MicroBatcher(
+            batch_fn=self.batch_fn, max_batch_size=8, max_wait_ms=20,
+        )
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        results = asyncio.run(run())
+
+        # Mỗi request nhận đúng kết quả của mình, chỉ 1 lần gọi batch
+        self.assertEqual(results, [0, 10, 20, 30, 40])
+        self.assertEqual(self.calls, [[0, 1, 2, 3, 4]])
+
+    def test_batch_size_is_bounded(self):
+        batcher = MicroBatcher(
+            batch_fn=self.batch_fn, max_batch_size=2, max_wait_ms=20,
+        )
+
+        async def run():
+            return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+        results = asyncio.run(run())
+
+        self.assertEqual(results, [0, 10, 20, 30, 40])
+        self.assertEqual([len(call) for call in self.calls], [2, 2, 1])
+
+    def test_error_is_routed_to_every_waiter(self):
+        async def failing_fn(items: list[int]) -> list[int]:
+            raise RuntimeError('model failed')
+
+        batcher = MicroBatcher(
+            batch_fn=failing_fn, max_batch_size=4, max_wait_ms=5,
+        )
+
+        async def run():
+            return await asyncio.gather(
+                *(batcher.submit(i) for i in range(3)), return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+from common import get_settings
+from infrastructure.box_detector import BoxDetectorModel
+
+
+class TestBoxPostprocess(unittest.TestCase):
+
+    def setUp(self) -> None:
+        settings = get_settings()
+        box_settings = settings.box_detector.model_copy(
+            update={'iou_threshold': 0.5, 'max_det': 2, 'base_h': 10.0},
+        )
+        self.model = BoxDetectorModel(
+            settings=settings.model_copy(update={'box_detector': box_settings}),
+        )
+        # x1, y1, x2, y2, conf, cls
+        self.detections = np.array(
+            [
+                [0, 0, 100, 200, 0.6, 0],
+                [2, 2, 100, 200, 0.9, 0],     # trùng box đầu (IoU > 0.5)
+                [300, 0, 350, 50, 0.8, 0],
+                [500, 0, 550, 80, 0.7, 0],
+                [700, 0, 750, 80, 0.1, 0],    # dưới ngưỡng conf
+            ],
+            dtype=np.float32,
+        )
+
+    def test_nms_top_k_and_pixel_per_cm(self):
+        scores, bboxes, pixel_per_cm = self.model.postprocess(self.detections, threshold=0.5)
+
+        # Box 0.6 bị box 0.9 loại, chỉ giữ max_det=2 box điểm cao nhất
+        np.testing.assert_allclose(scores, [0.9, 0.8])
+        np.testing.assert_allclose(bboxes, [[2, 2, 100, 200], [300, 0, 350, 50]])
+        self.assertAlmostEqual(pixel_per_cm, 198 / 10.0)
+
+    def test_iou_threshold_is_independent_of_conf(self):
+        # conf thấp không còn làm NMS gộp các box gần nhau
+        scores, _, _ = self.model.postprocess(self.detections, threshold=0.05)
+
+        self.assertEqual(len(scores), 2)
+        np.testing.assert_allclose(scores, [0.9, 0.8])
+
+    def test_no_detection(self):
+        scores, bboxes, pixel_per_cm = self.model.postprocess(self.detections, threshold=0.95)
+
+        self.assertEqual(scores.shape, (0,))
+        self.assertEqual(bboxes.shape, (0, 4))
+        self.assertEqual(pixel_per_cm, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
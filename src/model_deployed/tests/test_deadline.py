@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+
+from apis.helper.middlewares import DeadlineMiddleware
+from common.batching import MicroBatcher
+from common.deadline import check_deadline
+from common.deadline import DEADLINE
+from common.deadline import deadline_headers
+from common.deadline import DeadlineExceeded
+from common.deadline import get_deadline
+from common.deadline import reset_deadline
+from common.deadline import set_deadline
+from common.executor import InferenceExecutor
+from common.logs import setup_logging
+from common.settings.models import DeadlineSettings
+
+
+class TestDeadline(unittest.TestCase):
+    def test_check_and_propagate(self):
+        token = set_deadline(time.time() + 10)
+        try:
+            check_deadline('stage')
+            self.assertIn(DEADLINE, deadline_headers())
+        finally:
+            reset_deadline(token)
+        self.assertEqual(deadline_headers(), {})
+
+        token = set_deadline(time.time() - 1)
+        try:
+            with self.assertRaises(DeadlineExceeded):
+                check_deadline('stage')
+        finally:
+            reset_deadline(token)
+
+    def test_executor_skips_expired_call(self):
+        executor = InferenceExecutor('test', max_workers=1, max_queue=1)
+        calls = []
+
+        async def run():
+            token = set_deadline(time.time() - 1)
+            try:
+                await executor.run(calls.append, 1)
+            finally:
+                reset_deadline(token)
+
+        try:
+            with self.assertRaises(DeadlineExceeded):
+                asyncio.run(run())
+        finally:
+            executor.shutdown()
+        self.assertEqual(calls, [])
+
+    def test_batch_drops_expired_items(self):
+        batches = []
+
+        async def batch_fn(items):
+            # batch không chạy theo deadline của request mở batch
+            batches.append((list(items), get_deadline()))
+            return items
+
+        async def submit(item, deadline):
+            token = set_deadline(deadline)
+            try:
+                return await batcher.submit(item)
+            finally:
+                reset_deadline(token)
+
+        async def run():
+            now = time.time()
+            return await asyncio.gather(
+                submit('live', now + 10), submit('late', now - 1), return_exceptions=True,
+            )
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=5)
+        live, late = asyncio.run(run())
+        self.assertEqual(live, 'live')
+        self.assertIsInstance(late, DeadlineExceeded)
+        self.assertEqual(batches, [(['live'], None)])
+
+
+class TestDeadlineMiddleware(unittest.TestCase):
+    body = {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    @classmethod
+    def setUpClass(cls):
+        # ExceptionHandler cần logger structlog đã cấu hình như lúc app khởi động
+        setup_logging(json_logs=False, log_level='WARNING')
+
+    def setUp(self):
+        self.cancelled = False
+
+    async def slow_app(self, scope, receive, send):
+        try:
+            # đọc body như FastAPI trước khi gọi endpoint
+            await receive()
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+    def call(self, headers, messages):
+        middleware = DeadlineMiddleware(self.slow_app, DeadlineSettings(default_timeout_s=0.05))
+        sent = []
+        scope = {
+            'type': 'http', 'method': 'POST', 'path': '/v1/box_detector',
+            'headers': [(key.lower().encode(), value.encode()) for key, value in headers.items()],
+        }
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(10)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(asyncio.wait_for(middleware(scope, receive, send), 2))
+        return sent
+
+    def test_times_out_with_504(self):
+        sent = self.call({}, [self.body])
+        self.assertTrue(self.cancelled)
+        self.assertEqual(sent[0]['status'], 504)
+
+    def test_header_deadline_in_the_past(self):
+        sent = self.call({DEADLINE: str(time.time() - 1)}, [self.body])
+        self.assertEqual(sent[0]['status'], 504)
+
+    def test_disconnect_cancels_request(self):
+        sent = self.call(
+            {DEADLINE: str(time.time() + 10)},
+            [self.body, {'type': 'http.disconnect'}],
+        )
+        self.assertTrue(self.cancelled)
+        self.assertEqual(sent, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
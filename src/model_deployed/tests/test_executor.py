@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import unittest
+
+from common.executor import InferenceExecutor
+
+
+class TestInferenceExecutor(unittest.TestCase):
+    def setUp(self) -> None:
+        self.executor = InferenceExecutor(name='test', max_workers=2, max_queue=1)
+
+    def tearDown(self) -> None:
+        self.executor.shutdown()
+
+    def test_run_off_event_loop(self):
+        async def run():
+            loop_thread = threading.current_thread().name
+            worker_thread = await self.executor.run(
+                lambda: threading.current_thread().name,
+            )
+            return loop_thread, worker_thread
+
+        loop_thread, worker_thread = asyncio.run(run())
+
+        self.assertNotEqual(loop_thread, worker_thread)
+        self.assertTrue(worker_thread.startswith('infer-test'))
+
+    def test_in_flight_is_bounded(self):
+        peak = 0
+        lock = threading.Lock()
+        running = 0
+
+        def blocking_call():
+            nonlocal peak, running
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        async def run():
+            max_seen = 0
+
+            async def watch():
+                nonlocal max_seen
+                for _ in range(20):
+                    max_seen = max(max_seen, self.executor.in_flight)
+                    await asyncio.sleep(0.005)
+
+            await asyncio.gather(
+                watch(), *(self.executor.run(blocking_call) for _ in range(8)),
+            )
+            return max_seen
+
+        max_in_flight = asyncio.run(run())
+
+        # 2 luồng chạy song song, tối đa 2 + 1 lời gọi được nhận vào pool
+        self.assertLessEqual(peak, 2)
+        self.assertLessEqual(max_in_flight, self.executor.capacity)
+        self.assertEqual(self.executor.in_flight, 0)
+
+    def test_run_on_all_workers(self):
+        # Mỗi luồng worker chạy đúng 1 lần (dùng để load model thread-local)
+        thread_names = asyncio.run(
+            self.executor.run_on_all_workers(lambda: threading.current_thread().name),
+        )
+
+        self.assertEqual(len(thread_names), 2)
+        self.assertEqual(len(set(thread_names)), 2)
+
+    def test_run_on_all_workers_propagates_errors(self):
+        def fail():
+            raise RuntimeError('load failed')
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(self.executor.run_on_all_workers(fail))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+from infrastructure.calculate import geometry
+
+
+class TestGeometry(unittest.TestCase):
+
+    def test_perpendicular_distance_2d(self):
+        point = np.array([[0.0, 2.0], [3.0, 5.0]])
+        line_start = np.array([[0.0, 0.0], [1.0, 0.0]])
+        line_end = np.array([[2.0, 2.0], [1.0, 4.0]])
+
+        dist = geometry.perpendicular_distance_2d(point, line_start, line_end)
+
+        # Đường y = x và đường thẳng đứng x = 1
+        np.testing.assert_allclose(dist, [np.sqrt(2), 2.0])
+
+    def test_perpendicular_distance_3d(self):
+        point = np.array([[0.0, 3.0, 4.0]])
+        line_start = np.array([[0.0, 0.0, 0.0]])
+        line_end = np.array([[2.0, 0.0, 0.0]])
+
+        dist = geometry.perpendicular_distance_3d(point, line_start, line_end)
+
+        np.testing.assert_allclose(dist, [5.0])
+
+    def test_to_landmark_array_from_dicts(self):
+        landmarks = [[{'x': i / 33, 'y': 0.5, 'z': 0.0, 'visibility': 1.0} for i in range(33)]]
+
+        array = geometry.to_landmark_array(landmarks)
+
+        self.assertEqual(array.shape, (1, 33, 3))
+        self.assertEqual(array.dtype, np.float32)
+        self.assertEqual(geometry.to_landmark_array([]).shape, (0, 33, 3))
+
+    def test_batch_matches_single_person(self):
+        rng = np.random.default_rng(0)
+        landmarks = rng.random((16, 33, 3)).astype(np.float32)
+
+        batch_2d = geometry.segments_2d(landmarks, 640, 480, 2.5)
+        batch_3d = geometry.segments_3d(landmarks, 640, 480, 2.5)
+
+        self.assertEqual(batch_2d.shape, (16, geometry.NUM_SEGMENTS))
+        for i in range(len(landmarks)):
+            np.testing.assert_allclose(
+                geometry.segments_2d(landmarks[i:i + 1], 640, 480, 2.5)[0], batch_2d[i],
+            )
+            np.testing.assert_allclose(
+                geometry.segments_3d(landmarks[i:i + 1], 640, 480, 2.5)[0], batch_3d[i],
+            )
+
+    def test_segments_2d_use_truncated_pixels(self):
+        landmarks = np.zeros((1, 33, 3), dtype=np.float32)
+        landmarks[0, geometry.KNEE_LEFT, :2] = (0.5, 0.5)
+        landmarks[0, geometry.ANKLE_LEFT, :2] = (0.5, 0.9)
+
+        segments = geometry.segments_2d(landmarks, 100, 99, 2.0)
+
+        # int(0.9 * 99) - int(0.5 * 99) = 89 - 49 pixel
+        self.assertAlmostEqual(segments[0, 1], 40 / 2.0)
+        self.assertAlmostEqual(
+            segments[0, 6], geometry.NOSE_TO_TOP_OF_HEAD_RATIO * segments[0, 5],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import unittest
+
+from common.executor import get_executor
+from common.executor import shutdown_executors
+from common.metrics import ExecutorCollector
+from common.metrics import STAGE_LATENCY
+from common.metrics import stage_timer
+
+
+class TestMetrics(unittest.TestCase):
+    def tearDown(self) -> None:
+        shutdown_executors()
+
+    def _stage_count(self, stage: str, mode: str) -> float:
+        for metric in STAGE_LATENCY.collect():
+            for sample in metric.samples:
+                if sample.name.endswith('_count') and sample.labels == {'stage': stage, 'mode': mode}:
+                    return sample.value
+        return 0.0
+
+    def test_stage_timer_observes_on_error(self):
+        before = self._stage_count('test_stage', 'test')
+
+        with stage_timer('test_stage', 'test'):
+            pass
+        with self.assertRaises(ValueError):
+            with stage_timer('test_stage', 'test'):
+                raise ValueError('boom')
+
+        self.assertEqual(self._stage_count('test_stage', 'test'), before + 2)
+
+    def test_executor_collector_reads_executors(self):
+        executor = get_executor('height_calculator')
+        families = {family.name: family for family in ExecutorCollector().collect()}
+
+        capacity = {
+            sample.labels['executor']: sample.value
+            for sample in families['inference_executor_capacity'].samples
+        }
+        self.assertEqual(capacity['height_calculator'], executor.capacity)
+        self.assertIn('inference_executor_queue_depth', families)
+        self.assertIn('inference_executor_in_flight', families)
+
+
+if __name__ == '__main__':
+    unittest.main()
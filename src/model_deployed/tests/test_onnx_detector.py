@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import onnx
+from common.settings.models import BoxDetectorSettings
+from infrastructure.box_detector.onnx_detector import OnnxBoxDetector
+from onnx import helper
+from onnx import numpy_helper
+from onnx import TensorProto
+
+# 3 anchor giả lập output YOLO (cx, cy, w, h, score): 2 box chồng nhau và 1 box điểm thấp
+RAW_OUTPUT = np.array(
+    [[
+        [320, 322, 100],
+        [320, 321, 100],
+        [100, 100, 10],
+        [200, 200, 10],
+        [0.9, 0.8, 0.1],
+    ]],
+    dtype=np.float32,
+)
+
+
+def build_fake_yolo(path: str) -> None:
+    """Graph ONNX trả về RAW_OUTPUT cho mỗi ảnh trong batch"""
+    nodes = [
+        helper.make_node('Shape', ['images'], ['shape']),
+        helper.make_node('Gather', ['shape', 'zero'], ['batch'], axis=0),
+        helper.make_node('Concat', ['batch', 'rest'], ['out_shape'], axis=0),
+        helper.make_node('Expand', ['raw', 'out_shape'], ['output0']),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        'fake_yolo',
+        [helper.make_tensor_value_info('images', TensorProto.FLOAT, ['batch', 3, 640, 640])],
+        [helper.make_tensor_value_info('output0', TensorProto.FLOAT, ['batch', 5, 3])],
+        [
+            numpy_helper.from_array(RAW_OUTPUT, 'raw'),
+            numpy_helper.from_array(np.array([0], dtype=np.int64), 'zero'),
+            numpy_helper.from_array(np.array([5, 3], dtype=np.int64), 'rest'),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 13)])
+    model.ir_version = 8
+    onnx.save(model, path)
+
+
+class TestOnnxBoxDetector(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        onnx_path = os.path.join(self.tmp_dir.name, 'fake.onnx')
+        build_fake_yolo(onnx_path)
+        self.detector = OnnxBoxDetector(
+            settings=BoxDetectorSettings(
+                model_path='unused.pt', conf=0.5, backend='onnx', onnx_path=onnx_path,
+            ),
+        )
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_boxes_are_mapped_back_to_original_image(self):
+        landscape = np.zeros((480, 640, 3), dtype=np.uint8)
+        portrait = np.zeros((1280, 960, 3), dtype=np.uint8)
+
+        detections = self.detector([landscape, portrait], conf=0.5)
+
+        # Box trùng bị NMS loại, box điểm thấp bị lọc theo conf
+        self.assertEqual([len(det) for det in detections], [1, 1])
+        # Ảnh 640x480: chỉ có padding 80px theo chiều dọc
+        np.testing.assert_allclose(detections[0][0], [270, 140, 370, 340, 0.9, 0], rtol=1e-6)
+        # Ảnh 960x1280: thu nhỏ 0.5, padding 80px theo chiều ngang
+        np.testing.assert_allclose(detections[1][0], [380, 440, 580, 840, 0.9, 0], rtol=1e-6)
+
+    def test_letterbox_shape(self):
+        blob, ratio, pad = self.detector.letterbox(np.zeros((480, 640, 3), dtype=np.uint8))
+
+        self.assertEqual(blob.shape, (3, 640, 640))
+        self.assertEqual(blob.dtype, np.float32)
+        self.assertEqual(ratio, 1.0)
+        self.assertEqual(pad, (0.0, 80.0))
+
+    def test_unknown_backend_is_rejected(self):
+        for backend in ('ONNX', 'onxx'):
+            with self.assertRaises(ValueError):
+                BoxDetectorSettings(model_path='unused.pt', conf=0.5, backend=backend)
+
+
+if __name__ == '__main__':
+    unittest.main()
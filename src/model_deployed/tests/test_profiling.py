@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import marshal
+import threading
+import time
+import unittest
+
+from common.profiling import get_profile_store
+from common.profiling import profile_request
+from common.profiling import ProfileSession
+from common.profiling import ProfileStore
+from common.profiling import run_profiled
+
+
+def busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class TestProfiling(unittest.TestCase):
+    def test_sampler_covers_attached_threads(self):
+        session = ProfileSession('req-1', 'cpu', 'POST /v1/test', interval_s=0.001)
+
+        with profile_request(session):
+            # như InferenceExecutor: luồng worker chạy trong context của request
+            ctx = contextvars.copy_context()
+            worker = threading.Thread(target=ctx.run, args=(run_profiled, busy_wait, 0.05), name='infer-test_0')
+            worker.start()
+            worker.join()
+            busy_wait(0.02)
+
+        profile = get_profile_store().get('req-1')
+        document = json.loads(profile.data)
+        names = {thread_profile['name'] for thread_profile in document['profiles']}
+        frames = {frame['name'] for frame in document['shared']['frames']}
+        self.assertIn('infer-test_0', names)
+        self.assertIn('busy_wait', frames)
+
+    def test_cprofile_mode_returns_pstats(self):
+        session = ProfileSession('req-2', 'cprofile', 'POST /v1/test', interval_s=0.001)
+        session.start()
+        busy_wait(0.005)
+        profile = session.stop()
+
+        stats = marshal.loads(profile.data)
+        self.assertEqual(profile.media_type, 'application/octet-stream')
+        self.assertTrue(any(func[2] == 'busy_wait' for func in stats))
+
+    def test_run_profiled_without_session(self):
+        self.assertEqual(run_profiled(sum, [1, 2, 3]), 6)
+
+    def test_store_keeps_most_recent(self):
+        store = ProfileStore(max_profiles=2)
+        for profile_id in ('a', 'b', 'c'):
+            session = ProfileSession(profile_id, 'cpu', 'GET /', interval_s=0.001)
+            session.start()
+            store.add(session.stop())
+
+        self.assertIsNone(store.get('a'))
+        self.assertEqual([profile['profile_id'] for profile in store.list()], ['c', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+from common.result_cache import MISS
+from common.result_cache import DISK_SWEEP_EVERY
+from common.result_cache import ResultCache
+from infrastructure.pose_detector import PoseDetectorModelOutput
+
+
+class TestResultCache(unittest.TestCase):
+
+    def make_cache(self, **kwargs) -> ResultCache:
+        options = {'name': 'box_detector', 'version': 'v1', 'max_entries': 2, 'ttl_s': 60.0}
+        options.update(kwargs)
+        return ResultCache(**options)
+
+    def test_hit_and_miss(self):
+        cache = self.make_cache()
+        key = cache.key(b'image-bytes')
+
+        self.assertIs(asyncio.run(cache.get(key)), MISS)
+        asyncio.run(cache.set(key, np.arange(3)))
+        np.testing.assert_array_equal(asyncio.run(cache.get(key)), np.arange(3))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_key_depends_on_bytes_version_and_params(self):
+        cache = self.make_cache()
+        key = cache.key(b'image-bytes')
+
+        self.assertEqual(key, cache.key(b'image-bytes'))
+        self.assertNotEqual(key, cache.key(b'other-bytes'))
+        self.assertNotEqual(key, cache.key(b'image-bytes', [0, 9, 10]))
+        self.assertNotEqual(key, self.make_cache(version='v2').key(b'image-bytes'))
+
+    def test_lru_eviction(self):
+        cache = self.make_cache()
+
+        async def fill():
+            await cache.set('a', 1)
+            await cache.set('b', 2)
+            await cache.get('a')            # 'a' mới được dùng -> 'b' bị loại
+            await cache.set('c', 3)
+            return await cache.get('a'), await cache.get('b'), await cache.get('c')
+
+        self.assertEqual(asyncio.run(fill()), (1, MISS, 3))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl_expiry(self):
+        cache = self.make_cache(ttl_s=0.01)
+        asyncio.run(cache.set('a', 1))
+        time.sleep(0.02)
+
+        self.assertIs(asyncio.run(cache.get('a')), MISS)
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as disk_dir:
+            asyncio.run(self.make_cache(disk_dir=disk_dir).set('a', {'score': 0.9}))
+
+            # Cache mới (vd. sau khi restart) đọc lại kết quả từ đĩa
+            cache = self.make_cache(disk_dir=disk_dir)
+            self.assertEqual(asyncio.run(cache.get('a')), {'score': 0.9})
+            self.assertEqual(cache.stats()['disk_hits'], 1)
+
+    def test_disk_tier_stores_model_outputs_as_json(self):
+        output = PoseDetectorModelOutput(
+            landmarks=np.arange(8, dtype=np.float32).reshape(1, 2, 4), img_width=640, img_height=480,
+            landmark_indices=[0, 9],
+        )
+        with tempfile.TemporaryDirectory() as disk_dir:
+            asyncio.run(self.make_cache(disk_dir=disk_dir, model_type=PoseDetectorModelOutput).set('a', output))
+            self.assertEqual([path.name for path in Path(disk_dir, 'box_detector').iterdir()], ['a.json'])
+
+            cache = self.make_cache(disk_dir=disk_dir, model_type=PoseDetectorModelOutput)
+            cached = asyncio.run(cache.get('a'))
+            self.assertEqual(cached.landmarks.dtype, np.float32)
+            np.testing.assert_array_equal(cached.landmarks, output.landmarks)
+            self.assertEqual(cached.landmark_indices, [0, 9])
+
+    def test_disk_tier_is_bounded(self):
+        with tempfile.TemporaryDirectory() as disk_dir:
+            cache = self.make_cache(disk_dir=disk_dir, max_disk_entries=3, ttl_s=0)
+            folder = Path(disk_dir, 'box_detector')
+            # file pickle của phiên bản cũ và file hết hạn bị xoá ở lần dọn đầu tiên
+            (folder / 'old.pkl').write_bytes(b'pickle')
+
+            async def fill():
+                for index in range(DISK_SWEEP_EVERY + 1):
+                    await cache.set(f'k{index}', index)
+                    # mtime tăng dần: file cũ nhất bị xoá trước
+                    os.utime(folder / f'k{index}.json', (index, index))
+
+            asyncio.run(fill())
+            names = sorted(path.name for path in folder.iterdir())
+            self.assertEqual(len(names), 3)
+            self.assertNotIn('old.pkl', names)
+            self.assertIn(f'k{DISK_SWEEP_EVERY}.json', names)
+
+    def test_disabled(self):
+        cache = self.make_cache(enabled=False)
+        asyncio.run(cache.set('a', 1))
+
+        self.assertIs(asyncio.run(cache.get('a')), MISS)
+
+
+if __name__ == '__main__':
+    unittest.main()
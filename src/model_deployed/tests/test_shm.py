@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import unittest
+from multiprocessing import shared_memory
+
+import numpy as np
+from common.shm import SharedImage
+
+
+class TestSharedImage(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.image = np.arange(4 * 5 * 3, dtype=np.uint8).reshape(4, 5, 3)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.image.nbytes)
+        np.ndarray(self.image.shape, dtype=np.uint8, buffer=self.shm.buf)[...] = self.image
+
+    def tearDown(self) -> None:
+        self.shm.close()
+        self.shm.unlink()
+
+    def test_open_is_zero_copy(self):
+        shared_image = SharedImage(self.shm.name, '4,5,3', 'uint8')
+        img = shared_image.open()
+
+        np.testing.assert_array_equal(img, self.image)
+        # ghi từ phía logic_app thấy ngay, không có bản sao
+        self.shm.buf[0] = 255
+        self.assertEqual(img[0, 0, 0], 255)
+        del img
+        shared_image.close()
+
+    def test_invalid_handles(self):
+        for name, shape, dtype in [
+            (self.shm.name, '4,5', 'uint8'),
+            (self.shm.name, '4,5,3', 'float32'),
+            (self.shm.name, '40,50,3', 'uint8'),       # lớn hơn segment
+            ('psm_missing_segment', '4,5,3', 'uint8'),
+        ]:
+            shared_image = SharedImage(name, shape, dtype)
+            with self.assertRaises(ValueError):
+                shared_image.open()
+            shared_image.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from common.tracing import inject_headers
+from common.tracing import parse_traceparent
+from common.tracing import SpanExporter
+from common.tracing import Tracer
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / 'trace.jsonl'
+        self.tracer = Tracer(
+            service='test', enabled=True, sample_ratio=1.0,
+            exporter=SpanExporter('test', str(self.path), 'jsonl'),
+        )
+
+    def tearDown(self) -> None:
+        self.tracer.close()
+        self.tmp_dir.cleanup()
+
+    def _exported(self) -> list:
+        self.tracer.close()
+        return [json.loads(line) for line in self.path.read_text().splitlines()]
+
+    def test_parse_traceparent(self):
+        trace_id, parent_id = 'a' * 32, 'b' * 16
+        self.assertEqual(parse_traceparent(f'00-{trace_id}-{parent_id}-01'), (trace_id, parent_id, True))
+        self.assertEqual(parse_traceparent(f'00-{trace_id}-{parent_id}-00'), (trace_id, parent_id, False))
+        self.assertIsNone(parse_traceparent('garbage'))
+        self.assertIsNone(parse_traceparent(f'00-{"0" * 32}-{parent_id}-01'))
+        self.assertIsNone(parse_traceparent(None))
+
+    def test_children_join_the_remote_trace(self):
+        remote = f'00-{"a" * 32}-{"b" * 16}-01'
+        with self.tracer.start_trace('POST /v1/box_detector', traceparent=remote) as root:
+            with self.tracer.span('decode') as child:
+                headers = inject_headers({'accept': 'application/json'})
+
+        spans = {span['name']: span for span in self._exported()}
+        self.assertEqual(root.trace_id, 'a' * 32)
+        self.assertEqual(spans['POST /v1/box_detector']['parent_id'], 'b' * 16)
+        self.assertEqual(spans['decode']['parent_id'], root.span_id)
+        self.assertEqual(headers['traceparent'], f'00-{"a" * 32}-{child.span_id}-01')
+        self.assertEqual(headers['accept'], 'application/json')
+
+    def test_error_is_recorded(self):
+        with self.assertRaises(ValueError):
+            with self.tracer.start_trace('request'):
+                with self.tracer.span('stage'):
+                    raise ValueError('boom')
+
+        spans = self._exported()
+        self.assertEqual(len(spans), 2)
+        self.assertTrue(all('boom' in span['attributes']['error'] for span in spans))
+
+    def test_unsampled_trace_is_not_exported(self):
+        with self.tracer.start_trace('request', traceparent=f'00-{"a" * 32}-{"b" * 16}-00') as root:
+            with self.tracer.span('stage') as child:
+                pass
+
+        self.assertFalse(root.sampled)
+        self.assertIsNone(child)
+        self.tracer.close()
+        self.assertFalse(self.path.exists())
+
+    def test_span_outside_trace_is_ignored(self):
+        with self.tracer.span('warmup') as span:
+            self.assertIsNone(span)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+from infrastructure.pose_detector.video_session import PoseSessionManager
+
+
+class RecordingLandmarker:
+    """Landmarker giả: ghi lại timestamp của từng frame"""
+
+    def __init__(self) -> None:
+        self.timestamps = []
+        self.closed = False
+
+    def detect_for_video(self, image, timestamp_ms: int):
+        self.timestamps.append(timestamp_ms)
+        return SimpleNamespace(pose_landmarks=[])
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class TestPoseSessionManager(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.landmarkers = []
+        self.frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def make_manager(self, idle_s: float = 60.0, max_sessions: int = 2) -> PoseSessionManager:
+        def create_landmarker():
+            landmarker = RecordingLandmarker()
+            self.landmarkers.append(landmarker)
+            return landmarker
+
+        return PoseSessionManager(create_landmarker, idle_s=idle_s, max_sessions=max_sessions)
+
+    def test_session_is_reused_with_increasing_timestamps(self):
+        manager = self.make_manager()
+        for timestamp_ms in (100, 100, 50, 200):
+            manager.detect('cam-1', self.frame, timestamp_ms)
+
+        self.assertEqual(len(self.landmarkers), 1)
+        self.assertEqual(self.landmarkers[0].timestamps, [100, 101, 102, 200])
+
+    def test_idle_sessions_are_evicted(self):
+        manager = self.make_manager(idle_s=0.01)
+        manager.detect('cam-1', self.frame)
+        time.sleep(0.02)
+        manager.detect('cam-2', self.frame)
+
+        self.assertEqual(len(manager), 1)
+        self.assertTrue(self.landmarkers[0].closed)
+
+    def test_least_recently_used_session_is_closed_at_capacity(self):
+        manager = self.make_manager(max_sessions=2)
+        manager.detect('cam-1', self.frame)
+        manager.detect('cam-2', self.frame)
+        manager.detect('cam-1', self.frame)
+        manager.detect('cam-3', self.frame)
+
+        self.assertEqual([landmarker.closed for landmarker in self.landmarkers], [False, True, False])
+
+    def test_close(self):
+        manager = self.make_manager()
+        manager.detect('cam-1', self.frame)
+
+        self.assertTrue(manager.close('cam-1'))
+        self.assertFalse(manager.close('cam-1'))
+        self.assertTrue(self.landmarkers[0].closed)
+
+    def test_concurrent_first_frames_open_one_session(self):
+        # 2 frame đầu của cùng session cùng nạp model: nạp không giữ lock của manager
+        barrier = threading.Barrier(2, timeout=5)
+
+        def create_landmarker():
+            landmarker = RecordingLandmarker()
+            self.landmarkers.append(landmarker)
+            barrier.wait()
+            return landmarker
+
+        manager = PoseSessionManager(create_landmarker, idle_s=60.0, max_sessions=2)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            sessions = list(pool.map(manager.get_or_create, ['cam-1', 'cam-1']))
+
+        self.assertIs(sessions[0], sessions[1])
+        self.assertEqual(len(manager), 1)
+        # landmarker thừa được đóng, landmarker của session vẫn mở
+        self.assertEqual(sorted(landmarker.closed for landmarker in self.landmarkers), [False, True])
+        self.assertFalse(sessions[0].landmarker.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import unittest
+
+import numpy as np
+from common.wire import decode_npy
+from common.wire import encode_npy
+from common.wire import is_npy
+from common.wire import parse_landmark_indices
+from infrastructure.calculate.geometry import expand_landmarks
+from infrastructure.calculate.geometry import HEIGHT_LANDMARKS
+
+
+class TestWire(unittest.TestCase):
+
+    def test_npy_round_trip(self):
+        landmarks = np.random.default_rng(0).random((3, 33, 4)).astype(np.float32)
+
+        decoded = decode_npy(encode_npy(landmarks))
+
+        self.assertEqual(decoded.dtype, np.float32)
+        np.testing.assert_array_equal(decoded, landmarks)
+
+    def test_content_type(self):
+        self.assertTrue(is_npy('application/x-npy'))
+        self.assertTrue(is_npy('application/x-npy; charset=binary'))
+        self.assertFalse(is_npy('application/json'))
+        self.assertFalse(is_npy(None))
+
+    def test_parse_landmark_indices(self):
+        self.assertIsNone(parse_landmark_indices(None))
+        self.assertEqual(parse_landmark_indices('10,0,9,9'), [0, 9, 10])
+        with self.assertRaises(ValueError):
+            parse_landmark_indices('0,33')
+
+    def test_expand_height_subset(self):
+        landmarks = np.random.default_rng(1).random((2, 33, 4)).astype(np.float32)
+        subset = landmarks[:, list(HEIGHT_LANDMARKS)]
+
+        full = expand_landmarks(subset, HEIGHT_LANDMARKS)
+
+        # Các điểm được gửi trở về đúng vị trí, phần còn lại là NaN
+        np.testing.assert_array_equal(full[:, list(HEIGHT_LANDMARKS)], subset)
+        self.assertTrue(np.isnan(full[:, 1]).all())
+        with self.assertRaises(ValueError):
+            expand_landmarks(subset[:, :5], HEIGHT_LANDMARKS[:5])
+
+
+if __name__ == '__main__':
+    unittest.main()